@@ -0,0 +1,156 @@
+"""
+FFmpeg command-line builders shared by the recorder and its helpers.
+
+This module provides the argument lists for:
+- Screen capture input (gdigrab on Windows, x11grab on Linux)
+- Video encoding with the selected encoder profile
+- Video filters, such as duplicate frame dropping
+- Splitting one capture into several cropped region outputs, after hiding redaction masks,
+  plus optional low-rate preview and idle detection branches
+"""
+
+import os
+import platform
+
+from .idle import get_sample_filters
+from .preview import get_preview_filters
+from .profiles import DEFAULT_PROFILE, build_profile_args, get_profile
+from .redaction import build_redaction_graph
+
+
+def build_capture_input_args(region, framerate):
+    """
+    Build the FFmpeg input arguments that grab the screen.
+
+    Args:
+        region (tuple): (x, y, w, h) to capture, or None for the full screen
+        framerate (int): Capture frame rate
+
+    Returns:
+        list: FFmpeg arguments, ending with the input
+    """
+    system = platform.system()
+    args = ["-framerate", str(framerate)]
+
+    if system == "Windows":
+        args.extend(["-f", "gdigrab"])
+        if region:
+            x, y, w, h = region
+            args.extend(["-offset_x", str(x), "-offset_y", str(y), "-video_size", f"{w}x{h}"])
+        args.extend(["-draw_mouse", "1", "-i", "desktop"])
+
+    elif system == "Linux":
+        args.extend(["-f", "x11grab"])
+        display = os.environ.get("DISPLAY", ":0.0")
+        if region:
+            x, y, w, h = region
+            args.extend(["-video_size", f"{w}x{h}", "-i", f"{display}+{x},{y}"])
+        else:
+            args.extend(["-i", display])
+    else:
+        raise RuntimeError(f"Unsupported OS for screen recording: {system}")
+
+    return args
+
+
+def build_encoder_args(encoder_settings):
+    """
+    Build the FFmpeg video encoding arguments.
+
+    Args:
+        encoder_settings (dict): {"preset": str, "threads": int}, threads 0 means automatic,
+            plus an optional "qp" for constant quantizer (0 is lossless) and an optional
+            "profile" name for the rest of the encoder options
+
+    Returns:
+        list: FFmpeg output arguments for the video encoder
+    """
+    profile = get_profile(encoder_settings.get("profile", DEFAULT_PROFILE))
+    return build_profile_args(
+        profile, encoder_settings["preset"], encoder_settings["threads"], encoder_settings.get("qp")
+    )
+
+
+def get_decimate_filter(framerate):
+    """
+    Build the filter that drops frames identical to the previous one.
+
+    At least one frame per second is kept on a static screen, so progress
+    (and the stall watchdog) keeps moving and segments still get their keyframes.
+    """
+    return f"mpdecimate=max_drop={framerate}"
+
+
+def build_filter_args(filters, variable_frame_rate=False):
+    """
+    Build the FFmpeg arguments applying a chain of video filters.
+
+    Args:
+        filters (list): Filter descriptions, applied in order
+        variable_frame_rate (bool): Keep the filtered timestamps as they are, instead of
+            duplicating frames back up to a constant frame rate
+
+    Returns:
+        list: FFmpeg output arguments
+    """
+    args = []
+    if filters:
+        args.extend(["-vf", ",".join(filters)])
+    if variable_frame_rate:
+        args.extend(["-fps_mode", "vfr"])
+    return args
+
+
+def get_bounding_region(regions):
+    """Get the smallest (x, y, w, h) region containing all the given regions."""
+    left = min(x for x, _, _, _ in regions)
+    top = min(y for _, y, _, _ in regions)
+    right = max(x + w for x, _, w, _ in regions)
+    bottom = max(y + h for _, y, _, h in regions)
+    return left, top, right - left, bottom - top
+
+
+def build_split_crop_graph(origin, regions, filters, masks=None, preview=False, idle_sample=False):
+    """
+    Build a filter graph that splits the captured video into cropped outputs.
+
+    Args:
+        origin (tuple): (x, y) screen position of the captured area's top-left corner
+        regions (list): (x, y, w, h) screen regions, one per output, or None for the whole capture
+        filters (list): Filters applied to each output after cropping
+        masks (list): Redaction masks hidden before splitting, from redaction.get_masks()
+        preview (bool): Also output a thumbnail of the first region, labelled [preview] (see preview.py)
+        idle_sample (bool): Also output idle detection samples of the first region, labelled [idle] (see idle.py)
+
+    Returns:
+        str: -filter_complex graph, with outputs labelled [out0], [out1]...
+    """
+    origin_x, origin_y = origin
+    crops = []
+    for region in regions:
+        crop = None
+        if region:
+            x, y, w, h = region
+            # Encoders need even dimensions
+            crop = f"crop={w - w % 2}:{h - h % 2}:{x - origin_x}:{y - origin_y}"
+        crops.append(crop)
+
+    chains = []
+    source = "0:v"
+    if masks:
+        chains.append(build_redaction_graph(masks, source, "redacted"))
+        source = "redacted"
+    extra_branches = []
+    if preview:
+        extra_branches.append((get_preview_filters(crops[0]), "preview"))
+    if idle_sample:
+        extra_branches.append((get_sample_filters(crops[0]), "idle"))
+    branches = len(regions) + len(extra_branches)
+    chains.append(f"[{source}]split={branches}" + "".join(f"[in{i}]" for i in range(branches)))
+    for i, crop in enumerate(crops):
+        output_filters = [crop] if crop else []
+        output_filters.extend(filters)
+        chains.append(f"[in{i}]{','.join(output_filters) or 'null'}[out{i}]")
+    for i, (branch_filters, label) in enumerate(extra_branches, start=len(regions)):
+        chains.append(f"[in{i}]{','.join(branch_filters)}[{label}]")
+    return ";".join(chains)
@@ -2,7 +2,8 @@
 Configuration management for screen recorder application.
 
 This module handles persistent storage and retrieval of application settings
-including recording region coordinates and UI panel positions.
+including recording region coordinates (plus named extra regions), UI panel
+positions and cached encoder calibration results.
 """
 
 import json
@@ -11,7 +12,58 @@ import os
 CONFIG_FILE = os.path.join(os.getcwd(), "config.json")
 
 CAPTURE_REGION = "capture_region"
+CAPTURE_REGIONS = "capture_regions"
+REDACTION_MASKS = "redaction_masks"
 MAIN_PANEL_POSITION = "main_panel_position"
+ENCODER_CALIBRATION = "encoder_calibration"
+ENCODER_GOVERNOR = "encoder_governor"
+SEGMENT_SECONDS = "segment_seconds"
+SEGMENT_MAX_MB = "segment_max_mb"
+PREARM_CAPTURE = "prearm_capture"
+REPLAY_SECONDS = "replay_seconds"
+CAPTURE_PROFILE = "capture_profile"
+CAPTURE_BACKEND = "capture_backend"
+DROP_DUPLICATE_FRAMES = "drop_duplicate_frames"
+IDLE_PAUSE_SECONDS = "idle_pause_seconds"
+IDLE_PAUSE_MARKERS = "idle_pause_markers"
+SPOOL_DIR = "spool_dir"
+MAX_RECORDING_MB = "max_recording_mb"
+MAX_RECORDING_SECONDS = "max_recording_seconds"
+ADAPTIVE_CAPTURE = "adaptive_capture"
+CAPTURE_PIXEL_BUDGET = "capture_pixel_budget"
+ENCODER_PROFILES = "encoder_profiles"
+RECORDING_PROFILE = "recording_profile"
+EDITOR_PROFILE = "editor_profile"
+ROI_ENCODING = "roi_encoding"
+TIMELAPSE_INTERVAL = "timelapse_interval"
+SCREENSHOT_FORMAT = "screenshot_format"
+BURST_COUNT = "burst_count"
+BURST_INTERVAL = "burst_interval"
+STREAM_URL = "stream_url"
+STREAM_SAVE_LOCAL = "stream_save_local"
+LIVE_PREVIEW = "live_preview"
+SCHEDULING = "scheduling"
+MAX_FFMPEG_JOBS = "max_ffmpeg_jobs"
+
+CAPTURE_PROFILE_STANDARD = "standard"
+CAPTURE_PROFILE_TWO_STAGE = "two_stage"
+
+CAPTURE_BACKEND_FFMPEG = "ffmpeg"
+CAPTURE_BACKEND_X11SHM = "x11shm"
+
+MASK_BLUR = "blur"
+MASK_BOX = "box"
+
+SCREENSHOT_PNG = "png"
+SCREENSHOT_WEBP = "webp"
+
+SPOOL_RAM = "ram"  # spool_dir value selecting RAM-backed tmpfs
+
+DEFAULT_SEGMENT_SECONDS = 10
+DEFAULT_REPLAY_SECONDS = 30
+DEFAULT_TIMELAPSE_INTERVAL = 5
+DEFAULT_BURST_COUNT = 5
+DEFAULT_BURST_INTERVAL = 0.2
 
 
 def _load_config():
@@ -34,6 +86,13 @@ def _save_config(data):
         print(f"Failed to save config: {e}")
 
 
+def _get_number(key, default):
+    value = _load_config().get(key, default)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+        return value
+    return default
+
+
 def get_region():
     """
     Get the saved recording region coordinates.
@@ -60,6 +119,75 @@ def set_region(region):
     _save_config(data)
 
 
+def get_named_regions():
+    """
+    Get the extra named regions recorded alongside the capture region.
+
+    Returns:
+        list: (name, (x, y, width, height)) tuples, empty if none are set
+    """
+    data = _load_config()
+    regions = data.get(CAPTURE_REGIONS)
+    if not isinstance(regions, list):
+        return []
+
+    named_regions = []
+    for entry in regions:
+        if not isinstance(entry, dict):
+            continue
+        name, region = entry.get("name"), entry.get("region")
+        if isinstance(name, str) and name and isinstance(region, list) and len(region) == 4:
+            named_regions.append((name, tuple(region)))
+    return named_regions
+
+
+def set_named_regions(named_regions):
+    """
+    Save the extra named regions recorded alongside the capture region.
+
+    Args:
+        named_regions (list): (name, (x, y, width, height)) tuples
+    """
+    data = _load_config()
+    data[CAPTURE_REGIONS] = [{"name": name, "region": list(region)} for name, region in named_regions]
+    _save_config(data)
+
+
+def get_redaction_masks():
+    """
+    Get the screen rectangles hidden in everything captured.
+
+    Returns:
+        list: ((x, y, width, height), style) tuples, style is MASK_BOX (default) or MASK_BLUR
+    """
+    data = _load_config()
+    masks = data.get(REDACTION_MASKS)
+    if not isinstance(masks, list):
+        return []
+
+    redaction_masks = []
+    for entry in masks:
+        if not isinstance(entry, dict):
+            continue
+        region = entry.get("region")
+        if isinstance(region, list) and len(region) == 4:
+            style = MASK_BLUR if entry.get("style") == MASK_BLUR else MASK_BOX
+            redaction_masks.append((tuple(region), style))
+    return redaction_masks
+
+
+def set_redaction_masks(masks):
+    """
+    Save the screen rectangles hidden in everything captured.
+
+    Args:
+        masks (list): ((x, y, width, height), style) tuples
+    """
+    data = _load_config()
+    data[REDACTION_MASKS] = [{"region": list(region), "style": style} for region, style in masks]
+    _save_config(data)
+
+
 def get_panel_position():
     """
     Get the saved UI panel position.
@@ -84,3 +212,320 @@ def set_panel_position(position):
     data = _load_config()
     data[MAIN_PANEL_POSITION] = list(position)
     _save_config(data)
+
+
+def get_encoder_calibration():
+    """
+    Get the cached encoder benchmark results.
+
+    Returns:
+        dict: Region size bucket (as a string) -> {"preset", "threads", "speed"}
+    """
+    data = _load_config()
+    calibration = data.get(ENCODER_CALIBRATION)
+    if isinstance(calibration, dict):
+        return calibration
+    return {}
+
+
+def set_encoder_calibration(calibration):
+    """
+    Save encoder benchmark results.
+
+    Args:
+        calibration (dict): Region size bucket -> encoder settings
+    """
+    data = _load_config()
+    data[ENCODER_CALIBRATION] = calibration
+    _save_config(data)
+
+
+def is_encoder_governor_enabled():
+    """
+    Check whether the realtime encoder speed governor is enabled.
+
+    Returns:
+        bool: True unless explicitly disabled in the config file
+    """
+    data = _load_config()
+    return data.get(ENCODER_GOVERNOR, True) is not False
+
+
+def get_segment_rotation():
+    """
+    Get the segment rotation limits for crash-safe recording.
+
+    Returns:
+        tuple: (seconds per segment, max segment size in bytes or 0 for no limit)
+    """
+    seconds = _get_number(SEGMENT_SECONDS, DEFAULT_SEGMENT_SECONDS) or DEFAULT_SEGMENT_SECONDS
+    max_mb = _get_number(SEGMENT_MAX_MB, 0)
+    return seconds, int(max_mb * 1024 * 1024)
+
+
+def is_prearm_enabled():
+    """
+    Check whether capture should be pre-started while the overlay is ready to record.
+
+    Returns:
+        bool: True unless explicitly disabled in the config file
+    """
+    data = _load_config()
+    return data.get(PREARM_CAPTURE, True) is not False
+
+
+def get_replay_seconds():
+    """
+    Get how many seconds the instant replay buffer keeps.
+
+    Returns:
+        float: Length of the instant replay, in seconds
+    """
+    return _get_number(REPLAY_SECONDS, DEFAULT_REPLAY_SECONDS) or DEFAULT_REPLAY_SECONDS
+
+
+def get_capture_profile():
+    """
+    Get how recordings are captured.
+
+    Returns:
+        str: CAPTURE_PROFILE_STANDARD (encode while recording) or
+            CAPTURE_PROFILE_TWO_STAGE (lossless capture, transcode after stop)
+    """
+    data = _load_config()
+    if data.get(CAPTURE_PROFILE) == CAPTURE_PROFILE_TWO_STAGE:
+        return CAPTURE_PROFILE_TWO_STAGE
+    return CAPTURE_PROFILE_STANDARD
+
+
+def get_capture_backend():
+    """
+    Get how the screen is grabbed on Linux.
+
+    Returns:
+        str: CAPTURE_BACKEND_FFMPEG (FFmpeg's x11grab) or
+            CAPTURE_BACKEND_X11SHM (MIT-SHM grabs piped to FFmpeg as rawvideo)
+    """
+    data = _load_config()
+    if data.get(CAPTURE_BACKEND) == CAPTURE_BACKEND_X11SHM:
+        return CAPTURE_BACKEND_X11SHM
+    return CAPTURE_BACKEND_FFMPEG
+
+
+def is_duplicate_frame_dropping_enabled():
+    """
+    Check whether unchanged frames should be dropped, for variable frame rate recordings.
+
+    Returns:
+        bool: True only if enabled in the config file
+    """
+    data = _load_config()
+    return data.get(DROP_DUPLICATE_FRAMES) is True
+
+
+def get_idle_pause_seconds():
+    """
+    Get how long the recorded region must stay unchanged before encoding pauses.
+
+    Returns:
+        float: Idle timeout in seconds, or 0 if idle auto-pause is disabled
+    """
+    return _get_number(IDLE_PAUSE_SECONDS, 0)
+
+
+def is_idle_pause_marker_enabled():
+    """
+    Check whether skipped idle time should be marked with a chapter in the recording.
+
+    Returns:
+        bool: True unless explicitly disabled in the config file
+    """
+    data = _load_config()
+    return data.get(IDLE_PAUSE_MARKERS, True) is not False
+
+
+def get_spool_dir():
+    """
+    Get the directory for temporary video files.
+
+    Returns:
+        str: A directory path, SPOOL_RAM for RAM-backed tmpfs, or None for the system temp dir
+    """
+    data = _load_config()
+    spool_dir = data.get(SPOOL_DIR)
+    if isinstance(spool_dir, str) and spool_dir:
+        return spool_dir
+    return None
+
+
+def get_recording_caps():
+    """
+    Get the limits at which a recording is stopped automatically.
+
+    Returns:
+        tuple: (max size in bytes, max duration in seconds), 0 for no limit
+    """
+    max_mb = _get_number(MAX_RECORDING_MB, 0)
+    return int(max_mb * 1024 * 1024), _get_number(MAX_RECORDING_SECONDS, 0)
+
+
+def is_adaptive_capture_enabled():
+    """
+    Check whether capture frame rate and resolution adapt to the region size and machine.
+
+    Returns:
+        bool: True only if enabled in the config file
+    """
+    data = _load_config()
+    return data.get(ADAPTIVE_CAPTURE) is True
+
+
+def get_capture_pixel_budget():
+    """
+    Get the configured capture budget, overriding the one derived from calibration.
+
+    Returns:
+        float: Pixels per second this machine should capture and encode, or 0 if not set
+    """
+    return _get_number(CAPTURE_PIXEL_BUDGET, 0) * 1_000_000
+
+
+def get_encoder_profiles():
+    """
+    Get the user-defined encoder profiles.
+
+    Returns:
+        dict: Profile name -> profile fields (see profiles.py), empty if none are set
+    """
+    data = _load_config()
+    user_profiles = data.get(ENCODER_PROFILES)
+    if not isinstance(user_profiles, dict):
+        return {}
+    return {name: fields for name, fields in user_profiles.items() if isinstance(fields, dict)}
+
+
+def get_recording_profile():
+    """
+    Get the name of the encoder profile used for recordings.
+
+    Returns:
+        str: Profile name, or None for the default
+    """
+    data = _load_config()
+    name = data.get(RECORDING_PROFILE)
+    return name if isinstance(name, str) else None
+
+
+def get_editor_profile():
+    """
+    Get the name of the encoder profile used by the editor's re-encoding tools.
+
+    Returns:
+        str: Profile name, or None for the default
+    """
+    data = _load_config()
+    name = data.get(EDITOR_PROFILE)
+    return name if isinstance(name, str) else None
+
+
+def is_roi_encoding_enabled():
+    """
+    Check whether recordings spend more bits around the mouse cursor (see roi.py).
+
+    Returns:
+        bool: True only if enabled in the config file
+    """
+    data = _load_config()
+    return data.get(ROI_ENCODING) is True
+
+
+def get_timelapse_interval():
+    """
+    Get how often a timelapse grabs a frame.
+
+    Returns:
+        float: Seconds between frames
+    """
+    return _get_number(TIMELAPSE_INTERVAL, DEFAULT_TIMELAPSE_INTERVAL) or DEFAULT_TIMELAPSE_INTERVAL
+
+
+def get_screenshot_format():
+    """
+    Get the image format screenshots are saved in.
+
+    Returns:
+        str: SCREENSHOT_PNG (default) or SCREENSHOT_WEBP
+    """
+    data = _load_config()
+    if data.get(SCREENSHOT_FORMAT) == SCREENSHOT_WEBP:
+        return SCREENSHOT_WEBP
+    return SCREENSHOT_PNG
+
+
+def get_burst_settings():
+    """
+    Get how many screenshots a burst takes, and how far apart.
+
+    Returns:
+        tuple: (number of screenshots, seconds between them)
+    """
+    count = int(_get_number(BURST_COUNT, DEFAULT_BURST_COUNT)) or DEFAULT_BURST_COUNT
+    return count, _get_number(BURST_INTERVAL, DEFAULT_BURST_INTERVAL)
+
+
+def get_stream_url():
+    """
+    Get the URL to stream live to, e.g. "udp://127.0.0.1:5000?pkt_size=1316".
+
+    Returns:
+        str: udp://, srt:// or rtmp:// URL, or None if not set
+    """
+    data = _load_config()
+    url = data.get(STREAM_URL)
+    return url if isinstance(url, str) and url else None
+
+
+def is_stream_local_copy_enabled():
+    """
+    Check whether live streams are also saved to a local video.
+
+    Returns:
+        bool: True unless explicitly disabled in the config file
+    """
+    data = _load_config()
+    return data.get(STREAM_SAVE_LOCAL, True) is not False
+
+
+def is_live_preview_enabled():
+    """
+    Check whether the controls show a live thumbnail of the recording (see preview.py).
+
+    Returns:
+        bool: True unless explicitly disabled in the config file
+    """
+    data = _load_config()
+    return data.get(LIVE_PREVIEW, True) is not False
+
+
+def get_scheduling_overrides():
+    """
+    Get the user's changes to the process scheduling policies (see scheduling.py).
+
+    Returns:
+        dict: Job class -> policy fields to override, empty if none are set
+    """
+    data = _load_config()
+    overrides = data.get(SCHEDULING)
+    if not isinstance(overrides, dict):
+        return {}
+    return {job_class: fields for job_class, fields in overrides.items() if isinstance(fields, dict)}
+
+
+def get_max_ffmpeg_jobs():
+    """
+    Get how many FFmpeg jobs may run at once.
+
+    Returns:
+        int: Maximum number of jobs, or 0 to pick one from the number of CPU cores
+    """
+    return int(_get_number(MAX_FFMPEG_JOBS, 0))
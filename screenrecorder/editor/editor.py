@@ -1,9 +1,11 @@
+import os
 import tkinter as tk
 from tkinter_videoplayer import VideoPlayer
 
 from .. import theme
 from .toolbar import Toolbar
 from .history import EditHistory
+from ..ranges import delete_ranges
 
 
 class EditorWindow:
@@ -49,10 +51,98 @@ class EditorWindow:
         # Pack video player after toolbar
         self.video_player.frame.pack(fill=tk.BOTH, expand=True)
         self.filename = video_path
+        self.transcode_label = None
+        self._transcode = None  # (job, progress listener, done listener), while a transcode is tracked
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
 
     def on_history_change(self, new_value):
         self.video_player.src = new_value
 
+    def track_transcode(self, job):
+        """
+        Show the progress of a background transcode, and switch to its output when done.
+
+        Editing is disabled until then, so edits aren't made on the temporary capture.
+        """
+        self.toolbar.set_enabled(False)
+        self.transcode_label = tk.Label(
+            self.root,
+            text="Optimizing video...",
+            bg=theme.TOAST_BG,
+            fg=theme.TOAST_FG,
+            font=theme.FONT_NORMAL,
+            padx=theme.TOAST_PADX,
+            pady=theme.TOAST_PADY // 2,
+        )
+        self.transcode_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        # Job events arrive on its worker thread, so hand them over to the Tk thread
+        def on_progress(fraction):
+            self._call_on_tk(self._on_transcode_progress, fraction)
+
+        def on_done(output_path):
+            self._call_on_tk(self._on_transcode_done, job)
+
+        job.add_event_listener("progress", on_progress)
+        job.add_event_listener("done", on_done)
+        self._transcode = (job, on_progress, on_done)
+        if job.done:
+            self._on_transcode_done(job)
+
+    def _call_on_tk(self, callback, *args):
+        try:
+            self.root.after(0, callback, *args)
+        except (tk.TclError, RuntimeError):
+            pass  # The window is being destroyed, and _on_destroy() detaches the job
+
+    def _on_destroy(self, event):
+        if event.widget is not self.root or not self._transcode:
+            return
+        # Closed before the transcode was handled: nothing here will pick up its output
+        job, on_progress, on_done = self._transcode
+        self._transcode = None
+        job.remove_event_listener("progress", on_progress)
+        job.remove_event_listener("done", on_done)
+        job.detach()
+
+    def _on_transcode_progress(self, fraction):
+        if self.transcode_label:
+            self.transcode_label.config(text=f"Optimizing video... {fraction * 100:.0f}%")
+
+    def _on_transcode_done(self, job):
+        from ..utils import copy_files_to_clipboard
+
+        if not self.transcode_label:
+            return  # Already handled
+
+        if self._transcode:
+            _, on_progress, on_done = self._transcode
+            self._transcode = None
+            job.remove_event_listener("progress", on_progress)
+            job.remove_event_listener("done", on_done)
+
+        self.transcode_label.destroy()
+        self.transcode_label = None
+        self.toolbar.set_enabled(True)
+
+        if not job.output_path:
+            self.show_error("Failed to optimize video, keeping the original capture")
+            return
+
+        self.history.replace(job.input_path, job.output_path)
+        try:
+            copy_files_to_clipboard(job.output_path)
+            self.show_success("Video optimized and copied to clipboard!")
+        except Exception as e:
+            self.show_error(f"Failed to copy: {e}")
+
+        # The lossless capture is large, so don't leave it behind
+        try:
+            os.unlink(job.input_path)
+        except OSError:
+            pass
+        delete_ranges(job.input_path)
+
     def get_current_file(self):
         return self.history.get_current()
 
@@ -38,6 +38,13 @@ class EditHistory(EventDispatcher):
             return True
         return False
 
+    def replace(self, old_value, new_value):
+        """Replace every occurrence of an entry, e.g. when a file is superseded."""
+        self.history = [new_value if value == old_value else value for value in self.history]
+
+        if self.history[self.current_index] == new_value:
+            self.dispatch_event("change", new_value=new_value)
+
     def get_current(self):
         """Get the currently active entry."""
         return self.history[self.current_index]
@@ -0,0 +1,154 @@
+"""
+Export popup window for exporting several formats at once.
+
+The current video is decoded once by a single ffmpeg process, which splits the
+decoded frames into one scaling/encoding chain per selected target. Encoders
+run in parallel, so the export takes about as long as the slowest target.
+"""
+
+import tkinter as tk
+from tkinter import filedialog
+import os
+
+from ... import scheduling
+from ... import theme
+from ... import ui
+from ...utils import get_ffmpeg_path
+from ... import config
+from ...profiles import build_profile_args, get_extension, get_filetypes, get_profile
+from .popup_base import ToolPopup
+
+# Each target encodes with an encoder profile ("profile": None is the editor's profile),
+# optionally overriding some of its fields
+EXPORT_TARGETS = [
+    {
+        "id": "mp4",
+        "label": "Full size",
+        "suffix": "",
+        "height": None,
+        "profile": None,
+        "overrides": {},
+    },
+    {
+        "id": "preview",
+        "label": "Preview (480p MP4)",
+        "suffix": "-preview",
+        "height": 480,
+        "profile": "motion",
+        "overrides": {"preset": "veryfast", "crf": 28},
+    },
+    {
+        "id": "webm",
+        "label": "WebM (VP9)",
+        "suffix": "",
+        "height": None,
+        "profile": "webm-share",
+        "overrides": {},
+    },
+]
+
+
+def get_target_profile(target):
+    """Get the encoder profile of an export target, with the target's overrides applied."""
+    profile = dict(get_profile(target["profile"] or config.get_editor_profile()))
+    profile.update(target["overrides"])
+    return profile
+
+
+def build_export_command(ffmpeg_path, input_path, targets, base_path):
+    """
+    Build one ffmpeg command that exports the input to several targets.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        input_path (str): Video to export
+        targets (list): Entries of EXPORT_TARGETS to export
+        base_path (str): Output path without extension, each target adds its suffix (and its id,
+            if its path would otherwise be the same as another target's)
+
+    Returns:
+        tuple: (command, list of output paths)
+    """
+    # Decode once, then split the frames into one chain per target
+    chains = [f"[0:v]split={len(targets)}" + "".join(f"[in{i}]" for i in range(len(targets)))]
+    for i, target in enumerate(targets):
+        scale = f"scale=-2:'min({target['height']},ih)'" if target["height"] else "null"
+        chains.append(f"[in{i}]{scale}[out{i}]")
+
+    cmd = [ffmpeg_path, "-y", "-i", input_path, "-filter_complex", ";".join(chains)]
+    output_paths = []
+    for i, target in enumerate(targets):
+        profile = get_target_profile(target)
+        output_path = base_path + target["suffix"] + get_extension(profile)
+        if output_path in output_paths:
+            # e.g. "Full size" with a WebM editor profile, next to the WebM target
+            output_path = f"{base_path}{target['suffix']}-{target['id']}{get_extension(profile)}"
+        cmd.extend(["-map", f"[out{i}]", "-map", "0:a?"])
+        cmd.extend(build_profile_args(profile))
+        cmd.append(output_path)
+        output_paths.append(output_path)
+    return cmd, output_paths
+
+
+class ExportPopup(ToolPopup):
+    def __init__(self, parent, editor):
+        super().__init__(parent, "Export Video", "Export")
+
+        self.editor = editor
+
+        # UI components
+        self.target_vars = {}
+
+    def create_content(self):
+        ui.Label(self.content_frame, text="Formats to export:", font=theme.FONT_BOLD).pack(anchor=tk.W, pady=(0, 10))
+
+        for target in EXPORT_TARGETS:
+            var = tk.BooleanVar(value=target["id"] != "webm")
+            tk.Checkbutton(
+                self.content_frame,
+                text=target["label"],
+                variable=var,
+                font=theme.FONT_NORMAL,
+                bg=theme.COLOR_BG,
+                fg=theme.COLOR_FG,
+                activebackground=theme.COLOR_BG,
+                activeforeground=theme.COLOR_FG,
+                selectcolor=theme.INPUT_COLOR_BG,
+                anchor="w",
+            ).pack(fill=tk.X)
+            self.target_vars[target["id"]] = var
+
+    def apply_action(self):
+        """Export all selected formats with a single ffmpeg run."""
+        targets = [target for target in EXPORT_TARGETS if self.target_vars[target["id"]].get()]
+        if not targets:
+            self.editor.show_info("No formats selected. Nothing to export.")
+            return
+
+        profile = get_profile(config.get_editor_profile())
+        save_path = filedialog.asksaveasfilename(
+            parent=self.popup_window,
+            defaultextension=get_extension(profile),
+            filetypes=get_filetypes(profile),
+            title="Export video as...",
+        )
+        if not save_path:
+            return
+
+        base_path = os.path.splitext(save_path)[0]
+        cmd, output_paths = build_export_command(get_ffmpeg_path(), self.editor.get_current_file(), targets, base_path)
+
+        # Execute ffmpeg command
+        process = scheduling.run(cmd, scheduling.JOB_EDITOR, capture_output=True, text=True)
+
+        if process.returncode == 0:
+            names = ", ".join(os.path.basename(path) for path in output_paths)
+            self.editor.show_success(f"Exported {names}")
+        else:
+            self.editor.show_error(f"Export failed: {process.stderr}")
+            # Clean up partial outputs on failure
+            for path in output_paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
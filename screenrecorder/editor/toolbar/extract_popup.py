@@ -0,0 +1,92 @@
+"""
+Extract popup window for copying out the ranges marked while recording.
+
+Marked ranges start on keyframes (see ranges.py), so each one is extracted
+frame-exactly by stream copy, without re-encoding.
+"""
+
+import tkinter as tk
+from tkinter import filedialog
+import os
+
+from ... import scheduling
+from ... import theme
+from ... import ui
+from ...utils import get_ffmpeg_path
+from ...ranges import build_extract_command, read_ranges
+from .popup_base import ToolPopup
+
+
+class ExtractPopup(ToolPopup):
+    def __init__(self, parent, editor):
+        super().__init__(parent, "Extract Marked Ranges", "Extract")
+
+        self.editor = editor
+
+        # UI components
+        self.ranges = []
+        self.range_vars = []
+
+    def show(self):
+        self.ranges = read_ranges(self.editor.get_current_file())
+        if not self.ranges:
+            self.editor.show_info("This video has no ranges marked while recording.")
+            return
+        super().show()
+
+    def create_content(self):
+        ui.Label(self.content_frame, text="Ranges to extract:", font=theme.FONT_BOLD).pack(anchor=tk.W, pady=(0, 10))
+
+        self.range_vars = []
+        for start, end in self.ranges:
+            var = tk.BooleanVar(value=True)
+            tk.Checkbutton(
+                self.content_frame,
+                text=f"{start:.2f}s to {end:.2f}s  ({end - start:.1f}s)",
+                variable=var,
+                font=theme.FONT_NORMAL,
+                bg=theme.COLOR_BG,
+                fg=theme.COLOR_FG,
+                activebackground=theme.COLOR_BG,
+                activeforeground=theme.COLOR_FG,
+                selectcolor=theme.INPUT_COLOR_BG,
+                anchor="w",
+            ).pack(fill=tk.X)
+            self.range_vars.append(var)
+
+    def apply_action(self):
+        """Copy each selected range into its own file."""
+        selected = [marked_range for marked_range, var in zip(self.ranges, self.range_vars) if var.get()]
+        if not selected:
+            self.editor.show_info("No ranges selected. Nothing to extract.")
+            return
+
+        save_path = filedialog.asksaveasfilename(
+            parent=self.popup_window,
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4")],
+            title="Extract ranges as...",
+        )
+        if not save_path:
+            return
+
+        base_path = os.path.splitext(save_path)[0]
+        current_video = self.editor.get_current_file()
+        output_paths = []
+        for index, (start, end) in enumerate(selected, start=1):
+            output_path = save_path if len(selected) == 1 else f"{base_path}-{index}.mp4"
+            cmd = build_extract_command(get_ffmpeg_path(), current_video, start, end, output_path)
+
+            # Execute ffmpeg command
+            process = scheduling.run(cmd, scheduling.JOB_EDITOR, capture_output=True, text=True)
+            if process.returncode != 0:
+                self.editor.show_error(f"Extract failed: {process.stderr}")
+                try:
+                    os.unlink(output_path)
+                except OSError:
+                    pass
+                return
+            output_paths.append(output_path)
+
+        names = ", ".join(os.path.basename(path) for path in output_paths)
+        self.editor.show_success(f"Extracted {names}")
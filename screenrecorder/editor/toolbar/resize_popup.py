@@ -4,13 +4,15 @@ Resize popup window for video resizing functionality.
 
 import tkinter as tk
 import os
-import subprocess
-import tempfile
 import cv2
 
+from ... import scheduling
 from ... import theme
 from ... import ui
 from ...utils import get_ffmpeg_path
+from ... import spool
+from ... import config
+from ...profiles import build_profile_args, get_extension, get_profile
 from .popup_base import ToolPopup
 
 
@@ -169,8 +171,8 @@ class ResizePopup(ToolPopup):
             return
 
         # Create temporary file for resized video
-        temp_fd, temp_path = tempfile.mkstemp(suffix=".mp4")
-        os.close(temp_fd)
+        profile = get_profile(config.get_editor_profile())
+        temp_path = spool.create_temp_file(get_extension(profile))
 
         # Build ffmpeg command
         current_video = self.editor.get_current_file()
@@ -182,14 +184,14 @@ class ResizePopup(ToolPopup):
             current_video,
             "-vf",
             f"scale={new_width}:{new_height}",
-            "-c:a",
-            "copy",  # Copy audio without re-encoding
-            "-y",  # Overwrite output file
-            temp_path,
+            *build_profile_args(profile),
         ]
+        if not profile.get("audio_codec"):
+            cmd.extend(["-c:a", "copy"])  # Copy audio without re-encoding, unless the profile encodes it
+        cmd.extend(["-y", temp_path])  # Overwrite output file
 
         # Execute ffmpeg command
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = scheduling.run(cmd, scheduling.JOB_EDITOR, capture_output=True, text=True)
 
         if process.returncode == 0:
             # Success - update video player and history
@@ -1,10 +1,14 @@
+import os
 import tkinter as tk
 from tkinter import filedialog
 
-from ... import theme, ui
+from ... import config, scheduling, theme, ui
+from ...profiles import build_profile_args, get_extension, get_filetypes, get_profile
 from .resize_popup import ResizePopup
 from .trim_popup import TrimPopup
-from ...utils import copy_files_to_clipboard
+from .export_popup import ExportPopup
+from .extract_popup import ExtractPopup
+from ...utils import copy_files_to_clipboard, get_ffmpeg_path
 
 SEPARATOR = {"name": "separator"}
 
@@ -17,17 +21,21 @@ class Toolbar:
         self.menu = [
             {
                 "save": {"name": "Save", "icon": "save", "command": self.save_file},
+                "export": {"name": "Export", "icon": "file-export", "command": self.open_export_popup},
                 "copy": {"name": "Copy", "icon": "copy", "command": self.copy_to_clipboard},
                 "undo": {"name": "Undo", "icon": "undo", "command": self.perform_undo, "disabled": True},
             },
             {
                 "trim": {"name": "Trim", "icon": "cut", "command": self.open_trim_popup},
                 "resize": {"name": "Resize", "icon": "expand-arrows-alt", "command": self.open_resize_popup},
+                "extract": {"name": "Extract", "icon": "film", "command": self.open_extract_popup},
             },
         ]
 
         self.trim_popup = TrimPopup(self.parent, self.editor)
         self.resize_popup = ResizePopup(self.parent, self.editor)
+        self.export_popup = ExportPopup(self.parent, self.editor)
+        self.extract_popup = ExtractPopup(self.parent, self.editor)
 
         # Create main toolbar frame
         toolbar_frame = tk.Frame(parent, bg=theme.COLOR_BG)
@@ -55,19 +63,43 @@ class Toolbar:
 
         self.editor.history.add_event_listener("change", self.update_undo_button_state)
 
+    def set_enabled(self, enabled):
+        """Enable or disable all toolbar buttons, e.g. while the video is being transcoded."""
+        for group in self.menu:
+            for item in group.values():
+                item["button"].config(state=tk.NORMAL if enabled else tk.DISABLED)
+
+        if enabled:
+            self.update_undo_button_state(self.editor.get_current_file())
+
     def save_file(self):
+        profile = get_profile(config.get_editor_profile())
         save_path = filedialog.asksaveasfilename(
-            defaultextension=".mp4", filetypes=[("MP4 files", "*.mp4")], title="Save video as..."
+            defaultextension=get_extension(profile), filetypes=get_filetypes(profile), title="Save video as..."
         )
         if save_path:
             try:
                 current_file = self.editor.get_current_file()
-                with open(current_file, "rb") as src, open(save_path, "wb") as dst:
-                    dst.write(src.read())
+                if os.path.splitext(save_path)[1].lower() == os.path.splitext(current_file)[1].lower():
+                    with open(current_file, "rb") as src, open(save_path, "wb") as dst:
+                        dst.write(src.read())
+                else:
+                    # Another container than the current file's, e.g. a WebM editor profile
+                    self._encode(current_file, save_path, profile)
                 self.editor.show_success(f"Saved to {save_path}")
             except Exception as e:
                 self.editor.show_error(f"Failed to save: {e}")
 
+    def _encode(self, input_path, output_path, profile):
+        """Encode the video with a profile, into the container its extension names."""
+        cmd = [get_ffmpeg_path(), "-i", input_path, *build_profile_args(profile)]
+        if not profile.get("audio_codec"):
+            cmd.extend(["-c:a", "copy"])
+        cmd.extend(["-y", output_path])
+        process = scheduling.run(cmd, scheduling.JOB_EDITOR, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr)
+
     def copy_to_clipboard(self):
         try:
             current_file = self.editor.get_current_file()
@@ -92,3 +124,9 @@ class Toolbar:
 
     def open_resize_popup(self):
         self.resize_popup.show()
+
+    def open_export_popup(self):
+        self.export_popup.show()
+
+    def open_extract_popup(self):
+        self.extract_popup.show()
@@ -4,11 +4,11 @@ Trim popup window for video trimming functionality.
 
 import tkinter as tk
 import os
-import subprocess
-import tempfile
 
+from ... import scheduling
 from ... import theme
 from ...utils import get_ffmpeg_path
+from ... import spool
 from ... import ui
 from .popup_base import ToolPopup
 
@@ -131,8 +131,7 @@ class TrimPopup(ToolPopup):
         self.end_time_var.set(f"{end_time:.1f}")
 
         # Create temporary file for trimmed video
-        temp_fd, temp_path = tempfile.mkstemp(suffix=".mp4")
-        os.close(temp_fd)
+        temp_path = spool.create_temp_file(".mp4")
 
         # Build ffmpeg command
         current_video = self.editor.get_current_file()
@@ -155,7 +154,7 @@ class TrimPopup(ToolPopup):
         ]
 
         # Execute ffmpeg command
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = scheduling.run(cmd, scheduling.JOB_EDITOR, capture_output=True, text=True)
 
         if process.returncode == 0:
             # Success - update video player and history
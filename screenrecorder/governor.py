@@ -0,0 +1,357 @@
+"""
+Realtime encoder speed governor for screen recordings.
+
+This module picks x264 encoder settings that the current machine can sustain:
+- A one-time benchmark per region size, cached in the config file. It runs
+  only while nothing is being captured, under the same scheduling policy and
+  thread cap as capture (see scheduling.py), so it measures what a recording
+  will actually get
+- Live monitoring of the encoding speed reported by FFmpeg
+- Stepping down to a cheaper preset when capture falls behind realtime
+- Adaptive capture frame rate and downscaling, within a per-machine pixel budget
+"""
+
+import os
+import threading
+import time
+
+from . import config
+from . import scheduling
+
+# x264 presets, from the most expensive (best compression) to the cheapest
+PRESETS = ["medium", "fast", "faster", "veryfast", "superfast", "ultrafast"]
+DEFAULT_PRESET = "medium"
+
+CALIBRATION_SPEED = 1.25  # Benchmark speed required, leaves headroom for the recorded app
+CALIBRATION_SECONDS = 2  # Length of the synthetic clip encoded per benchmark run
+SIZE_BUCKET_PIXELS = 250_000  # Regions are calibrated in buckets of this many pixels
+
+SLOW_SPEED = 0.97  # Live speed below this counts as falling behind
+SLOW_SAMPLES = 4  # Consecutive slow reports before stepping down
+WARMUP_SECONDS = 3  # Speed reports are unreliable while the encoder ramps up
+
+# Adaptive capture: keep text legible by lowering the frame rate before the resolution
+ADAPTIVE_FRAMERATES = [30, 24, 20]
+ADAPTIVE_SCALES = [1.0, 0.75, 0.5]
+OVERLOAD_FRAMERATES = [30, 24, 20, 15, 10]  # Steps taken when overloaded during recording
+DEFAULT_PIXEL_BUDGET = 1920 * 1080 * 30  # Pixels per second, when the machine isn't calibrated yet
+
+
+def get_size_bucket(width, height):
+    """Round a region's pixel count up to its calibration bucket."""
+    pixels = width * height
+    return -(-pixels // SIZE_BUCKET_PIXELS) * SIZE_BUCKET_PIXELS
+
+
+def get_thread_candidates():
+    """Thread counts worth benchmarking on this machine, within capture's thread cap, most threads first."""
+    cpus = os.cpu_count() or 1
+    cap = scheduling.get_thread_cap(scheduling.JOB_CAPTURE)
+    if cap:
+        cpus = min(cpus, cap)
+    return sorted({cpus, max(1, cpus // 2)}, reverse=True)
+
+
+def benchmark(ffmpeg_path, width, height, framerate, preset, threads):
+    """
+    Encode a short synthetic clip and measure how fast it ran.
+
+    Returns:
+        float: Encoding speed as a multiple of realtime (0.0 on failure)
+    """
+    cmd = [
+        ffmpeg_path,
+        "-hide_banner",
+        "-nostats",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={width}x{height}:rate={framerate}",
+        "-t",
+        str(CALIBRATION_SECONDS),
+        "-vcodec",
+        "libx264",
+        "-preset",
+        preset,
+        "-threads",
+        str(threads),
+        "-pix_fmt",
+        "yuv420p",
+        "-f",
+        "null",
+        "-",
+    ]
+
+    start_time = time.monotonic()
+    process = scheduling.run(cmd, scheduling.JOB_CAPTURE, capture_output=True)
+    elapsed = time.monotonic() - start_time
+
+    if process.returncode != 0 or elapsed <= 0:
+        return 0.0
+    return CALIBRATION_SECONDS / elapsed
+
+
+def calibrate(ffmpeg_path, width, height, framerate, should_stop=None):
+    """
+    Find the most efficient x264 settings this machine can run in realtime.
+
+    Presets are tried from the most expensive to the cheapest, and the first one
+    that keeps up (with headroom) wins.
+
+    Args:
+        should_stop: Optional callable, checked around each benchmark run. If it
+            returns True (e.g. a capture started), the runs are too pessimistic
+            to keep and calibration gives up.
+
+    Returns:
+        dict: {"preset": str, "threads": int, "speed": float}, or None if stopped
+    """
+    # Encoders need even dimensions
+    width += width % 2
+    height += height % 2
+
+    best = None
+    for preset in PRESETS:
+        for threads in get_thread_candidates():
+            if should_stop and should_stop():
+                return None
+            speed = benchmark(ffmpeg_path, width, height, framerate, preset, threads)
+            if should_stop and should_stop():
+                return None
+            print(f"Calibration: {width}x{height} preset={preset} threads={threads} speed={speed:.2f}x")
+
+            if best is None or speed > best["speed"]:
+                best = {"preset": preset, "threads": threads, "speed": round(speed, 2)}
+            if speed >= CALIBRATION_SPEED:
+                return {"preset": preset, "threads": threads, "speed": round(speed, 2)}
+
+    # Nothing kept up, so use whatever was fastest
+    return best
+
+
+def choose_capture_settings(width, height, pixel_budget):
+    """
+    Pick the capture frame rate and downscale for a region, within a pixel budget.
+
+    Returns:
+        dict: {"framerate": int, "scale": float}, scale 1.0 meaning no downscale
+    """
+    for scale in ADAPTIVE_SCALES:
+        for framerate in ADAPTIVE_FRAMERATES:
+            if width * height * scale * scale * framerate <= pixel_budget:
+                return {"framerate": framerate, "scale": scale}
+    return {"framerate": OVERLOAD_FRAMERATES[-1], "scale": ADAPTIVE_SCALES[-1]}
+
+
+def get_lower_framerate(framerate):
+    """Get the next lower frame rate to try when overloaded, or None if already at the lowest."""
+    lower = [rate for rate in OVERLOAD_FRAMERATES if rate < framerate]
+    return lower[0] if lower else None
+
+
+class EncoderGovernor:
+    """Chooses and adjusts encoder settings for a recording session."""
+
+    def __init__(self, framerate):
+        self.framerate = framerate
+        self.settings = None
+        self.capture = {"framerate": framerate, "scale": 1.0}  # Capture settings of the recording
+        self.history = []  # One entry per encoder configuration used in a recording
+
+        self._calibrating = set()
+        self._calibration_lock = threading.Lock()
+        self._uncalibrated = None  # (ffmpeg_path, region) recorded without a calibration
+        self._session_start = None
+        self._slow_samples = 0
+
+    def get_cached_settings(self, region):
+        """Get the calibrated settings for a region, or None if not benchmarked yet."""
+        if not region:
+            return None
+        _, _, w, h = region
+        settings = config.get_encoder_calibration().get(str(get_size_bucket(w, h)))
+        if isinstance(settings, dict) and settings.get("preset") in PRESETS:
+            return settings
+        return None
+
+    def calibrate_in_background(self, ffmpeg_path, region, should_stop=None):
+        """
+        Benchmark the machine for a region size, unless already cached or running.
+
+        Args:
+            should_stop: Optional callable telling whether capture has started, see calibrate()
+        """
+        if not region or self.get_cached_settings(region):
+            return
+
+        _, _, w, h = region
+        bucket = get_size_bucket(w, h)
+        with self._calibration_lock:
+            if bucket in self._calibrating:
+                return
+            self._calibrating.add(bucket)
+
+        threading.Thread(
+            target=self._calibrate, args=(ffmpeg_path, region, bucket, should_stop), daemon=True
+        ).start()
+
+    def calibrate_pending(self, should_stop=None):
+        """Benchmark the region last recorded without a calibration, if any. Call once nothing is being captured."""
+        pending, self._uncalibrated = self._uncalibrated, None
+        if pending:
+            self.calibrate_in_background(*pending, should_stop=should_stop)
+
+    def _calibrate(self, ffmpeg_path, region, bucket, should_stop):
+        _, _, width, height = region
+        try:
+            settings = calibrate(ffmpeg_path, width, height, self.framerate, should_stop)
+            if settings is None:
+                print("Calibration interrupted by a capture, retrying once it's over")
+                self._uncalibrated = self._uncalibrated or (ffmpeg_path, region)
+            else:
+                calibration = config.get_encoder_calibration()
+                calibration[str(bucket)] = settings
+                config.set_encoder_calibration(calibration)
+                print(f"Calibration saved: {settings['preset']} with {settings['threads']} threads")
+        except Exception as e:
+            print(f"Calibration failed: {e}")
+        finally:
+            with self._calibration_lock:
+                self._calibrating.discard(bucket)
+
+    def get_pixel_budget(self, region):
+        """
+        Get how many pixels per second this machine can capture and encode in realtime.
+
+        Derived from the region's calibration (with the same headroom that calibration
+        requires), unless configured explicitly.
+        """
+        budget = config.get_capture_pixel_budget()
+        if budget:
+            return budget
+
+        cached = self.get_cached_settings(region)
+        if cached and cached.get("speed"):
+            _, _, w, h = region
+            return w * h * self.framerate * cached["speed"] / CALIBRATION_SPEED
+        return DEFAULT_PIXEL_BUDGET
+
+    def set_capture(self, framerate, scale):
+        """Record a change of capture frame rate or downscale, as a new configuration."""
+        self.capture = {"framerate": framerate, "scale": scale}
+        if self.history:
+            self._start_entry()
+
+    def begin(self, ffmpeg_path, region):
+        """
+        Start a new recording session.
+
+        Uses the cached calibration for the region. If there is none, the default
+        preset is used for now, and calibrate_pending() benchmarks the region for
+        next time once the capture is over (benchmarking now would compete with it).
+
+        Returns:
+            dict: {"preset": str, "threads": int} to encode with
+        """
+        cached = self.get_cached_settings(region)
+        if cached:
+            self.settings = {"preset": cached["preset"], "threads": int(cached.get("threads", 0))}
+        else:
+            self.settings = {"preset": DEFAULT_PRESET, "threads": 0}  # 0 lets x264 decide
+            if region:
+                self._uncalibrated = (ffmpeg_path, region)
+
+        self.history = []
+        self._session_start = time.monotonic()
+        self._start_entry()
+        return dict(self.settings)
+
+    def _start_entry(self):
+        self._slow_samples = 0
+        self.history.append(
+            {
+                "preset": self.settings["preset"],
+                "threads": self.settings["threads"],
+                "framerate": self.capture["framerate"],
+                "scale": self.capture["scale"],
+                "started_at": time.monotonic() - self._session_start,
+                "entry_start": time.monotonic(),
+                "min_speed": None,
+                "last_speed": None,
+            }
+        )
+
+    def observe(self, speed):
+        """
+        Record a live speed report from FFmpeg.
+
+        Returns:
+            bool: True if the encoder has fallen behind and should step down
+        """
+        if not self.history:
+            return False
+
+        entry = self.history[-1]
+        entry["last_speed"] = speed
+        if time.monotonic() - entry["entry_start"] < WARMUP_SECONDS:
+            return False
+
+        if entry["min_speed"] is None or speed < entry["min_speed"]:
+            entry["min_speed"] = speed
+
+        if speed < SLOW_SPEED:
+            self._slow_samples += 1
+        else:
+            self._slow_samples = 0
+
+        return self.is_overloaded() and self.settings["preset"] != PRESETS[-1]
+
+    def is_overloaded(self):
+        """Check whether the encoder has been falling behind, whatever the preset."""
+        return self._slow_samples >= SLOW_SAMPLES
+
+    def step_down(self):
+        """
+        Switch to the next cheaper preset.
+
+        Returns:
+            dict: New settings, or None if already at the cheapest preset
+        """
+        index = PRESETS.index(self.settings["preset"])
+        if index + 1 >= len(PRESETS):
+            return None
+
+        self.settings = {"preset": PRESETS[index + 1], "threads": self.settings["threads"]}
+        print(f"Encoder falling behind, switching to preset {self.settings['preset']}")
+        self._start_entry()
+        return dict(self.settings)
+
+    def get_report(self):
+        """
+        Summarize the encoder settings used in the last recording.
+
+        Returns:
+            str: Human-readable report, one line per configuration
+        """
+        lines = []
+        for entry in self.history:
+            threads = entry["threads"] or "auto"
+            min_speed = f"{entry['min_speed']:.2f}x" if entry["min_speed"] is not None else "n/a"
+            lines.append(
+                f"  from {entry['started_at']:.1f}s: preset={entry['preset']} threads={threads} "
+                f"fps={entry['framerate']} scale={entry['scale']:g} min speed={min_speed}"
+            )
+        return "Encoder settings used:\n" + "\n".join(lines)
+
+    def get_capture_summary(self):
+        """
+        Summarize the capture settings used in the last recording, for the video's metadata.
+
+        Returns:
+            str: e.g. "fps=30 scale=0.75 preset=veryfast; from 62.0s: fps=24 scale=0.75 preset=ultrafast"
+        """
+        parts = []
+        for entry in self.history:
+            settings = f"fps={entry['framerate']} scale={entry['scale']:g} preset={entry['preset']}"
+            parts.append(f"from {entry['started_at']:.1f}s: {settings}" if parts else settings)
+        return "; ".join(parts)
@@ -0,0 +1,223 @@
+"""
+Idle detection for the recorded region.
+
+The region is sampled a couple of times a second, downscaled to grayscale.
+While recording, the samples come from the capture itself, so the screen is
+never grabbed twice: FFmpeg writes them from an extra low-rate branch of its
+filter graph (like the live preview, see preview.py), and the MIT-SHM backend
+hands over its frames through a frame listener. While idle, the capture is
+paused, so the region is grabbed directly until it changes.
+
+Like FFmpeg's mpdecimate, each sample is compared block by block with the last
+sample that counted as a change: it's a change if any block differs by more
+than BLOCK_DIFF_HI, or if more than CHANGED_FRACTION of the blocks differ by
+more than BLOCK_DIFF_LO. A blinking caret, a clock or a spinner stays below
+those limits, and flips back and forth rather than drifting further from the
+reference, so it doesn't keep the region active. Typing does drift, so it
+counts after a character or two. When nothing changes for long enough, the
+region counts as idle, and it becomes active again on the next change.
+"""
+
+import os
+import re
+import threading
+import time
+
+from PIL import Image, ImageChops, ImageGrab
+
+SAMPLE_INTERVAL = 0.5  # Seconds between samples of the region
+SAMPLE_WIDTH = 480  # Samples are downscaled to at most this wide, which averages out thin details
+BLOCK_SIZE = 8  # Pixels per block side, in the downscaled sample
+BLOCK_DIFF_HI = 10  # Mean difference (0-255) of one block that counts as a change on its own
+BLOCK_DIFF_LO = 3  # Mean difference of a block that counts towards CHANGED_FRACTION
+CHANGED_FRACTION = 0.05  # Fraction of blocks above BLOCK_DIFF_LO that counts as a change
+SAMPLE_FILENAME = "idle.pgm"
+
+PGM_HEADER_PATTERN = re.compile(rb"P5\s+(\d+)\s+(\d+)\s+(\d+)\s")
+
+
+def get_sample_path(session_dir):
+    """Get the path of the idle detection sample FFmpeg writes into a session directory."""
+    return os.path.join(session_dir, SAMPLE_FILENAME)
+
+
+def get_sample_filters(crop=None):
+    """
+    Build the filter chain of the idle sample branch.
+
+    Args:
+        crop (str): Optional crop filter of the main output, so only the recorded region is watched
+
+    Returns:
+        list: Filter descriptions, dropping frames before anything else runs
+    """
+    filters = [f"fps={1 / SAMPLE_INTERVAL:g}"]
+    if crop:
+        filters.append(crop)
+    filters.extend(["format=gray", f"scale=w='min(iw,{SAMPLE_WIDTH})':h=-2:flags=area"])
+    return filters
+
+
+def build_sample_output_args(sample_path):
+    """
+    Build the FFmpeg output arguments writing the [idle] branch to a single, overwritten file.
+
+    Returns:
+        list: FFmpeg output arguments
+    """
+    return ["-map", "[idle]", "-c:v", "pgm", "-f", "image2", "-update", "1", sample_path]
+
+
+def read_sample(sample_path):
+    """
+    Load the idle sample FFmpeg last wrote.
+
+    Returns:
+        tuple: (PIL.Image, modification time in ns), or None if there is no complete sample
+    """
+    try:
+        mtime = os.stat(sample_path).st_mtime_ns
+        with open(sample_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    # FFmpeg rewrites the file in place, so skip samples caught halfway through being written
+    match = PGM_HEADER_PATTERN.match(data)
+    if not match:
+        return None
+    w, h, _ = (int(value) for value in match.groups())
+    if len(data) < match.end() + w * h:
+        return None
+    return Image.frombytes("L", (w, h), data[match.end() : match.end() + w * h]), mtime
+
+
+def downscale_sample(image):
+    """Downscale a grayscale image to at most SAMPLE_WIDTH wide, averaging out thin details."""
+    if image.width > SAMPLE_WIDTH:
+        image = image.resize((SAMPLE_WIDTH, max(1, image.height * SAMPLE_WIDTH // image.width)), Image.BOX)
+    return image
+
+
+def sample_from_frame(frame):
+    """
+    Turn a captured BGRX frame into a sample.
+
+    Args:
+        frame (numpy.ndarray): (height, width, 4) frame, e.g. from shm_capture.X11ShmGrabber
+
+    Returns:
+        PIL.Image: Grayscale sample, at most SAMPLE_WIDTH wide
+    """
+    height, width = frame.shape[:2]
+    image = Image.frombuffer("RGB", (width, height), frame.tobytes(), "raw", "BGRX", 0, 1)
+    return downscale_sample(image.convert("L"))
+
+
+def grab_sample(region):
+    """Grab a downscaled grayscale sample of a region, or of the full screen if region is None."""
+    bbox = None
+    if region:
+        x, y, w, h = region
+        bbox = (x, y, x + w, y + h)
+    return downscale_sample(ImageGrab.grab(bbox=bbox, all_screens=True).convert("L"))
+
+
+def is_changed(reference, sample):
+    """Check whether a sample differs enough from the reference sample to count as activity."""
+    if reference is None or reference.size != sample.size:
+        return True
+
+    blocks = (max(1, sample.width // BLOCK_SIZE), max(1, sample.height // BLOCK_SIZE))
+    # Mean absolute difference of each block
+    block_diffs = ImageChops.difference(reference, sample).resize(blocks, Image.BOX)
+    histogram = block_diffs.histogram()
+    if any(histogram[BLOCK_DIFF_HI + 1 :]):
+        return True
+    changed_blocks = sum(histogram[BLOCK_DIFF_LO + 1 :])
+    return changed_blocks > CHANGED_FRACTION * blocks[0] * blocks[1]
+
+
+class IdleDetector:
+    """
+    Watches a screen region for sustained inactivity.
+
+    Samples of the running capture come from sample_path (written by FFmpeg)
+    and from add_frame() (called by the MIT-SHM backend).
+
+    Callbacks are called on the detector's thread:
+        on_idle(): The region has not changed for idle_seconds
+        on_active(): The region changed again after being idle
+    """
+
+    def __init__(self, region, idle_seconds, on_idle, on_active, sample_path=None):
+        self.region = region
+        self.idle_seconds = idle_seconds
+        self.on_idle = on_idle
+        self.on_active = on_active
+        self.sample_path = sample_path
+        self.idle = False
+
+        self._stop_event = threading.Event()
+        self._frame_sample = None  # Newest sample from add_frame(), not taken yet
+        self._frame_sampled_at = None
+        self._sample_mtime = None  # Of the last sample read from sample_path
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def add_frame(self, frame, timestamp):
+        """Frame listener: sample a captured frame, at most once per SAMPLE_INTERVAL."""
+        if self._frame_sampled_at is not None and timestamp - self._frame_sampled_at < SAMPLE_INTERVAL:
+            return
+        self._frame_sampled_at = timestamp
+        self._frame_sample = sample_from_frame(frame)
+
+    def _take_capture_sample(self):
+        """Get a new sample of the running capture, or None if there is none since the last one."""
+        sample, self._frame_sample = self._frame_sample, None
+        if sample is not None or not self.sample_path:
+            return sample
+
+        result = read_sample(self.sample_path)
+        if not result or result[1] == self._sample_mtime:
+            return None
+        sample, self._sample_mtime = result
+        return sample
+
+    def _run(self):
+        reference = None  # Sample at the last change
+        last_change = time.monotonic()
+
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            if self.idle:
+                # The capture is paused, so nothing else is grabbing the region
+                try:
+                    sample = grab_sample(self.region)
+                except Exception as e:
+                    print(f"Idle detection stopped: {e}")
+                    return
+            else:
+                sample = self._take_capture_sample()
+                if sample is None:
+                    continue  # Capture paused by the user, or restarting
+
+            now = time.monotonic()
+            if reference is None:
+                # Samples of the capture and of a grab are scaled differently, so never compare across them
+                reference = sample
+            elif is_changed(reference, sample):
+                reference = sample
+                last_change = now
+                if self.idle:
+                    self.idle = False
+                    reference = None
+                    self.on_active()
+            elif not self.idle and now - last_change >= self.idle_seconds:
+                self.idle = True
+                reference = None
+                self._frame_sample = None
+                self.on_idle()
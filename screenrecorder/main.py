@@ -3,7 +3,8 @@ Screen recorder application entry point.
 
 This module initializes and runs the screen recording application with:
 - System tray integration
-- Global keyboard shortcuts (Alt+S to show, Esc to hide)
+- Global keyboard shortcuts (Alt+S to show, Esc to hide, Alt+R to save replay,
+  Alt+M to mark the in/out points of a range while recording)
 - Overlay window for screen region selection and recording controls
 """
 
@@ -12,6 +13,10 @@ import keyboard
 from .recorder import ScreenRecorder
 from .overlay import OverlayWindow
 from .tray import create_tray_icon
+from .utils import get_ffmpeg_path
+from .probe import get_capabilities
+from .segments import find_orphaned_sessions, recover_sessions
+from .spool import measure_write_speed_in_background
 
 # Global reference to overlay window for keep_alive function
 overlay_window = None
@@ -23,6 +28,11 @@ def keep_alive():
         overlay_window.root.after(1000, keep_alive)
 
 
+def _recover_crashed_recordings(session_dirs):
+    for video_path in recover_sessions(get_ffmpeg_path(), session_dirs):
+        print(f"Recovered interrupted recording: {video_path}")
+
+
 def main():
     global overlay_window
 
@@ -33,6 +43,24 @@ def main():
     recorder = ScreenRecorder()
     overlay_window = OverlayWindow(recorder)
 
+    # Join the segments of any recording that was interrupted by a crash
+    orphaned_sessions = find_orphaned_sessions()
+    if orphaned_sessions:
+        threading.Thread(target=_recover_crashed_recordings, args=(orphaned_sessions,), daemon=True).start()
+
+    # List what FFmpeg supports (cached on disk after the first run), without delaying startup
+    threading.Thread(target=get_capabilities, daemon=True).start()
+
+    # Test the spool's write speed for the recording preflight, without delaying startup
+    measure_write_speed_in_background()
+
+    # Benchmark the encoder for the saved region once, without delaying startup (or competing with a capture).
+    # A missing FFmpeg is only reported here: recording reports it again when Record is pressed.
+    try:
+        recorder.governor.calibrate_in_background(get_ffmpeg_path(), recorder.region, recorder.is_capturing)
+    except FileNotFoundError as e:
+        print(f"Skipping encoder calibration: {e}")
+
     # Set up system tray
     tray_icon = create_tray_icon(overlay_window)
     threading.Thread(target=tray_icon.run, daemon=True).start()
@@ -40,12 +68,20 @@ def main():
     # Set up global keyboard shortcuts
     keyboard.add_hotkey("alt+s", overlay_window.show)
     keyboard.add_hotkey("esc", overlay_window.hide)
+    keyboard.add_hotkey("alt+r", overlay_window.save_replay)
+    keyboard.add_hotkey("alt+m", overlay_window.mark_range)
 
     try:
         keep_alive()
         overlay_window.mainloop()
     except KeyboardInterrupt:
         print("Exiting...")
+    finally:
+        # Don't leave background FFmpeg captures running after exit
+        recorder.disarm()
+        recorder.stop_replay()
+        recorder.stop_timelapse()
+        recorder.stop_stream()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,9 @@
 Controls panel for overlay recording.
 
 This module provides the floating button panel that appears during
-recording mode, containing record/stop, region selection, and close buttons.
+recording mode, containing record/stop, pause/resume, screenshot, region
+selection, and close buttons, plus live recording stats (dropped frames, speed)
+and a live preview thumbnail while recording.
 """
 
 import tkinter as tk
@@ -13,6 +15,9 @@ from .. import ui
 
 RECORD_LABEL = "Record"
 STOP_LABEL = "Stop"
+PAUSE_LABEL = "Pause"
+RESUME_LABEL = "Resume"
+SCREENSHOT_LABEL = "Screenshot"
 SELECT_LABEL = "Select region to capture"
 CLOSE_LABEL = "Close"
 
@@ -20,24 +25,28 @@ CLOSE_LABEL = "Close"
 class Controls:
     """Floating button panel for overlay recording controls."""
 
-    def __init__(self, parent, on_record, on_select, on_close):
+    def __init__(self, parent, on_record, on_pause, on_select, on_close, on_screenshot):
         """
         Initialize the UI button panel.
 
         Args:
             parent: Parent tkinter window
             on_record: Callback for record/stop button
+            on_pause: Callback for pause/resume button
             on_select: Callback for region selection button
             on_close: Callback for close button
+            on_screenshot: Callback for screenshot button
         """
         self.drag_icon = icon_to_image(
             "grip-vertical", fill=theme.DRAG_ICON_COLOR, scale_to_width=theme.DRAG_ICON_SIZE // 2
         )
         self.rec_icon = icon_to_image("circle", fill=theme.RECORD_ICON_COLOR, scale_to_width=theme.ICON_SIZE)
         self.stop_icon = icon_to_image("stop", fill=theme.STOP_ICON_COLOR, scale_to_width=theme.ICON_SIZE)
+        self.pause_icon = icon_to_image("pause", fill=theme.PAUSE_ICON_COLOR, scale_to_width=theme.ICON_SIZE)
+        self.resume_icon = icon_to_image("play", fill=theme.PAUSE_ICON_COLOR, scale_to_width=theme.ICON_SIZE)
 
         self._setup_window(parent)
-        self._create_buttons(on_record, on_select, on_close)
+        self._create_buttons(on_record, on_pause, on_select, on_close, on_screenshot)
         self._setup_drag_behavior()
         self.position = get_panel_position()
 
@@ -57,7 +66,7 @@ class Controls:
             pady=theme.OVERLAY_PANEL_PADY,
         )
 
-    def _create_buttons(self, on_record, on_select, on_close):
+    def _create_buttons(self, on_record, on_pause, on_select, on_close, on_screenshot):
         """Create all buttons using the button factory."""
         # Drag handle
         self.drag_icon = self.create_drag_handle(self.button_win)
@@ -69,6 +78,21 @@ class Controls:
         )
         self.record_btn.pack(side="left", padx=theme.BTN_PACK_PADX)
 
+        # Pause button, only shown while recording
+        self.pause_btn = ui.Button(
+            self.button_win, PAUSE_LABEL, command=on_pause, icon_name="pause", icon_color=theme.PAUSE_ICON_COLOR
+        )
+
+        # Screenshot button, also usable while recording
+        self.screenshot_btn = ui.Button(
+            self.button_win,
+            SCREENSHOT_LABEL,
+            command=on_screenshot,
+            icon_name="camera",
+            icon_color=theme.SCREENSHOT_ICON_COLOR,
+        )
+        self.screenshot_btn.pack(side="left", padx=theme.BTN_PACK_PADX)
+
         # Region select button
         self.select_btn = ui.Button(
             self.button_win,
@@ -85,6 +109,12 @@ class Controls:
         )
         self.close_btn.pack(side="left", padx=theme.BTN_PACK_PADX)
 
+        # Live recording stats, only shown while recording
+        self.stats_label = ui.Label(self.button_win, text="", fg=theme.COLOR_TERTIARY, width=22, anchor="w")
+
+        # Live preview thumbnail, shown once the first frame arrives
+        self.preview_label = tk.Label(self.button_win, bg=theme.OVERLAY_PANEL_BG, bd=0)
+
     def _setup_drag_behavior(self):
         """Setup drag and drop behavior for the panel."""
         self._drag_data = {"x": 0, "y": 0}
@@ -105,6 +135,9 @@ class Controls:
             win_w = self.record_btn.winfo_reqwidth() + self.select_btn.winfo_reqwidth() + 40
         if win_h <= 1:
             win_h = max(self.record_btn.winfo_reqheight(), self.select_btn.winfo_reqheight()) + 20
+        # Grow to fit widgets shown since the last time (e.g. the stats label)
+        win_w = max(win_w, self.button_win.winfo_reqwidth())
+        win_h = max(win_h, self.button_win.winfo_reqheight())
         if self.position:
             x, y = self.position
             # Ensure panel stays within screen bounds
@@ -153,6 +186,11 @@ class Controls:
             # Disable other buttons while recording
             self.select_btn.config(state="disabled")
             self.close_btn.config(state="disabled")
+            self.set_paused_state(False)
+            self.pause_btn.config(state="normal")
+            self.pause_btn.pack(side="left", padx=theme.BTN_PACK_PADX, after=self.record_btn)
+            self.stats_label.config(text="Starting...", fg=theme.COLOR_TERTIARY)
+            self.stats_label.pack(side="left", padx=theme.BTN_PACK_PADX)
         else:
             self.record_btn.config(
                 text=RECORD_LABEL,
@@ -170,9 +208,58 @@ class Controls:
             # Re-enable other buttons when not recording
             self.select_btn.config(state="normal")
             self.close_btn.config(state="normal")
+            self.pause_btn.pack_forget()
+            self.stats_label.pack_forget()
+            self.preview_label.pack_forget()
+            self.preview_label.config(image="")
+            self.preview_label.image = None
+
+    def set_paused_state(self, paused):
+        if paused:
+            self.pause_btn.config(text=RESUME_LABEL, image=self.resume_icon)
+            self.pause_btn.image = self.resume_icon
+        else:
+            self.pause_btn.config(text=PAUSE_LABEL, image=self.pause_icon)
+            self.pause_btn.image = self.pause_icon
+
+    def set_stats(self, stats, paused=False):
+        """
+        Show live recording stats.
+
+        Args:
+            stats: RecordingStats of the current recording
+            paused (bool): Whether capture is paused (by the user or while idle)
+        """
+        if paused:
+            self.stats_label.config(text=f"Paused at {stats.out_time:.0f}s", fg=theme.COLOR_TERTIARY)
+            return
+
+        if stats.stalled:
+            self.stats_label.config(text="Stalled: no new frames", fg=theme.COLOR_SECONDARY)
+            return
+
+        speed = f"{stats.speed:.2f}x" if stats.speed is not None else "--"
+        self.stats_label.config(text=f"Dropped {stats.drop_frames}  |  {speed}", fg=theme.COLOR_TERTIARY)
+
+    def set_preview(self, image):
+        """
+        Show a live preview frame.
+
+        Args:
+            image (tk.PhotoImage): Thumbnail of the recording
+        """
+        previous = getattr(self.preview_label, "image", None)
+        self.preview_label.config(image=image)
+        self.preview_label.image = image  # Keep reference
+        if previous is None or (previous.width(), previous.height()) != (image.width(), image.height()):
+            # First frame, or the thumbnail changed size: grow the panel to fit
+            self.preview_label.pack(side="left", padx=theme.BTN_PACK_PADX, after=self.stats_label)
+            self.show()
 
     def disable(self):
         self.record_btn.config(state="disabled")
+        self.pause_btn.config(state="disabled")
+        self.screenshot_btn.config(state="disabled")
         self.select_btn.config(state="disabled")
         self.close_btn.config(state="disabled")
 
@@ -1,9 +1,23 @@
 from .types import Mode
+from .. import config
+from .. import theme
+
+MIN_MASK_SIZE = 8  # Smaller right-drags count as a click, which removes the mask under the pointer
+SHIFT_MASK = 0x0001
 
 
 class ReadyMode(Mode):
+    """
+    Region selected, waiting for Record.
+
+    Drag the region to move or resize it. Right-drag draws a redaction mask
+    (a solid box, or a blur with Shift held), right-click removes one.
+    """
+
     def __init__(self, overlay):
         super().__init__(overlay)
+        self._mask_start = None
+        self._mask_preview = None
 
     def enter(self):
         self.overlay.selecting = False
@@ -17,6 +31,13 @@ class ReadyMode(Mode):
         self._ensure_controls_on_top()
         self.overlay._update_clickthrough()
 
+        # Open the capture device now, so pressing Record starts without delay
+        self._arm()
+
+    def exit(self):
+        # No-op if recording has started from the armed capture
+        self.overlay.recorder.disarm()
+
     def handle_mouse_down(self, event):
         self.overlay.controls.button_win.lift()
         if self.overlay.recorder.region:
@@ -34,6 +55,49 @@ class ReadyMode(Mode):
     def handle_mouse_motion(self, event):
         self.overlay.recording_region.update_cursor(event.x, event.y)
 
+    def handle_right_mouse_down(self, event):
+        self._mask_start = (event.x, event.y)
+
+    def handle_right_mouse_drag(self, event):
+        if not self._mask_start:
+            return
+        x0, y0 = self._mask_start
+        if self._mask_preview:
+            self.overlay.canvas.delete(self._mask_preview)
+        self._mask_preview = self.overlay.canvas.create_rectangle(
+            x0, y0, event.x, event.y, outline=theme.MASK_OUTLINE_COLOR, width=2, dash=(4, 2)
+        )
+
+    def handle_right_mouse_up(self, event):
+        if not self._mask_start:
+            return
+        x0, y0 = self._mask_start
+        self._mask_start = None
+        self._mask_preview = None
+
+        masks = config.get_redaction_masks()
+        x, y = min(x0, event.x), min(y0, event.y)
+        w, h = abs(event.x - x0), abs(event.y - y0)
+        if w < MIN_MASK_SIZE and h < MIN_MASK_SIZE:
+            # A click: remove the newest mask under the pointer
+            for index in reversed(range(len(masks))):
+                (mx, my, mw, mh), _ = masks[index]
+                if mx <= event.x < mx + mw and my <= event.y < my + mh:
+                    del masks[index]
+                    break
+            else:
+                return
+        else:
+            style = config.MASK_BLUR if event.state & SHIFT_MASK else config.MASK_BOX
+            masks.append(((x, y, w, h), style))
+
+        config.set_redaction_masks(masks)
+        self.overlay._redraw_overlay()
+
+        # The armed capture was started with the old masks
+        self.overlay.recorder.disarm()
+        self._arm()
+
     def _handle_region_manipulation(self, event):
         region_changed = self.overlay.recording_region.handle_drag(
             event.x, event.y
@@ -47,8 +111,16 @@ class ReadyMode(Mode):
             from ..config import set_region
 
             set_region(self.overlay.recorder.region)
+            self._arm()  # Re-arm capture for the moved/resized region
         self.overlay.recording_region.finish_operation()
 
+    def _arm(self):
+        """Pre-arm capture, or skip it: Record then starts capture itself (and reports what's wrong)."""
+        try:
+            self.overlay.recorder.arm()
+        except OSError as e:
+            print(f"Skipping pre-armed capture: {e}")
+
     def _ensure_controls_on_top(self):
         self.overlay.controls.button_win.lift()
         self.overlay.root.after(500, self._ensure_controls_on_top)
@@ -57,15 +129,31 @@ class ReadyMode(Mode):
         self._start_recording()
 
     def _start_recording(self):
-        self.overlay.recorder.start()
+        recorder = self.overlay.recorder
+        recorder.start(defer_start=True)
+        if not recorder.recording:
+            return  # Refused, e.g. not enough free space
         self.overlay.controls.set_recording_state(True)
         self.overlay.enter_recording_mode()
 
+        # The armed capture has been grabbing this mode's dimmed, outlined overlay,
+        # so the recording only starts once the recording mode's overlay is drawn
+        self.overlay.root.update_idletasks()
+        recorder.start_from_now()
+
     def draw_overlay(self):
         sw, sh = self.overlay.root.winfo_screenwidth(), self.overlay.root.winfo_screenheight()
         self.overlay.canvas.create_rectangle(0, 0, sw, sh, fill="black")
         if self.overlay.recorder.region:
             self.overlay.recording_region.draw(False)  # Not recording yet
+        self._draw_masks()
+
+    def _draw_masks(self):
+        for (x, y, w, h), style in config.get_redaction_masks():
+            fill = theme.MASK_BLUR_FILL if style == config.MASK_BLUR else theme.MASK_BOX_FILL
+            self.overlay.canvas.create_rectangle(
+                x, y, x + w, y + h, fill=fill, outline=theme.MASK_OUTLINE_COLOR, width=2, dash=(4, 2)
+            )
 
     def get_transparency(self):
         return 0.3
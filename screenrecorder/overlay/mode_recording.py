@@ -1,9 +1,17 @@
 from .types import Mode
+from ..preview import PREVIEW_FRAMERATE, PreviewReader
+
+
+STATS_REFRESH_MS = 500
+PREVIEW_REFRESH_MS = 1000 // PREVIEW_FRAMERATE
 
 
 class RecordingMode(Mode):
     def __init__(self, overlay):
         super().__init__(overlay)
+        self._stats_job = None
+        self._preview_job = None
+        self._preview_reader = None
 
     def enter(self):
         # Recording mode assumes we're already recording
@@ -14,6 +22,44 @@ class RecordingMode(Mode):
         self.overlay.controls.show()
         self.overlay._redraw_overlay()
         self.overlay._update_clickthrough()
+        self._refresh_stats()
+
+        preview_path = self.overlay.recorder.get_preview_path()
+        if preview_path:
+            self._preview_reader = PreviewReader(preview_path)
+            self._refresh_preview()
+
+    def exit(self):
+        if self._stats_job:
+            self.overlay.root.after_cancel(self._stats_job)
+            self._stats_job = None
+        if self._preview_job:
+            self.overlay.root.after_cancel(self._preview_job)
+            self._preview_job = None
+        self._preview_reader = None
+
+    def _refresh_stats(self):
+        recorder = self.overlay.recorder
+        if recorder.auto_stopped:
+            # Stopped by a size/duration cap or a full spool
+            finalized, recorder.auto_stopped = recorder.auto_stopped, None
+            self._on_recording_stopped(finalized)
+            return
+
+        telemetry = recorder.telemetry
+        if telemetry and telemetry.stats.updated_at is not None:
+            self.overlay.controls.set_stats(telemetry.stats, paused=recorder.paused)
+        self._stats_job = self.overlay.root.after(STATS_REFRESH_MS, self._refresh_stats)
+
+    def _refresh_preview(self):
+        recorder = self.overlay.recorder
+        if not recorder.paused:
+            frame = self._preview_reader.read()
+            if frame:
+                image, load_seconds = frame
+                self.overlay.controls.set_preview(image)
+                recorder.telemetry.add_preview_frame(load_seconds)
+        self._preview_job = self.overlay.root.after(PREVIEW_REFRESH_MS, self._refresh_preview)
 
     def handle_mouse_motion(self, event):
         # Fixed cursor during recording
@@ -22,22 +68,50 @@ class RecordingMode(Mode):
     def toggle_recording(self):
         self._stop_recording()
 
+    def toggle_pause(self):
+        recorder = self.overlay.recorder
+        if recorder.paused_by_user:
+            recorder.resume()
+        else:
+            recorder.pause()
+        self.overlay.controls.set_paused_state(recorder.paused_by_user)
+
+    def mark_range(self):
+        kind = self.overlay.recorder.mark_range()
+        if kind:
+            print(f"Marked range {kind}")
+
     def _stop_recording(self):
-        self.overlay.recorder.stop()
+        self._on_recording_stopped(self.overlay.recorder.stop())
+
+    def _on_recording_stopped(self, finalized):
         self.overlay.controls.set_recording_state(False)
         self.overlay.enter_waiting_mode()
 
-        if self.overlay.recorder.temp_video_path:
-            self._handle_recorded_video()
+        # Open the editor on the Tk thread once the recording has been finalized
+        finalized.add_done_callback(lambda future: self.overlay.root.after(0, self._on_recording_finalized, future))
+
+    def _on_recording_finalized(self, future):
+        video_path = future.result()
+        if video_path:
+            self._handle_recorded_video(video_path)
 
-    def _handle_recorded_video(self):
+    def _handle_recorded_video(self, video_path):
         from ..utils import copy_files_to_clipboard
         from ..editor import EditorWindow as PreviewEditorWindow
 
         try:
-            copy_files_to_clipboard(self.overlay.recorder.temp_video_path)
-            preview = PreviewEditorWindow(self.overlay.recorder.temp_video_path)
-            preview.show_toast("Video copied to clipboard!")
+            transcode = self.overlay.recorder.get_transcode_job(video_path)
+            if transcode:
+                # Two-stage capture: the editor copies the video once it has been transcoded
+                preview = PreviewEditorWindow(video_path)
+                preview.track_transcode(transcode)
+                return
+
+            region_videos = self.overlay.recorder.get_region_videos(video_path)
+            copy_files_to_clipboard([video_path] + list(region_videos.values()))
+            preview = PreviewEditorWindow(video_path)
+            preview.show_toast("Videos copied to clipboard!" if region_videos else "Video copied to clipboard!")
         except Exception as e:
             print(f"Failed to copy video to clipboard: {e}")
 
@@ -9,9 +9,12 @@ This module provides the transparent overlay window that handles:
 
 import tkinter as tk
 import ctypes
+import threading
+import time
 
 from ..utils import passthrough_mouse_clicks, capture_mouse_clicks
-from ..config import get_region
+from ..config import get_burst_settings, get_region
+from ..screenshot import take_burst, take_screenshot
 from .controls import Controls
 from .recording_region import RecordingRegion
 from .mode_selection import SelectionMode
@@ -62,8 +65,10 @@ class OverlayWindow:
         self.controls = Controls(
             self.root,
             on_record=self.toggle_recording,
+            on_pause=self.toggle_pause,
             on_select=self.enter_selection_mode,
             on_close=self.enter_waiting_mode,
+            on_screenshot=self.take_screenshot,
         )
 
         # Initialize recording region component
@@ -80,6 +85,9 @@ class OverlayWindow:
         self.canvas.bind("<B1-Motion>", self._on_mouse_drag)
         self.canvas.bind("<ButtonRelease-1>", self._on_mouse_up)
         self.canvas.bind("<Motion>", self._on_mouse_motion)
+        self.canvas.bind("<ButtonPress-3>", lambda e: self.current_mode.handle_right_mouse_down(e))
+        self.canvas.bind("<B3-Motion>", lambda e: self.current_mode.handle_right_mouse_drag(e))
+        self.canvas.bind("<ButtonRelease-3>", lambda e: self.current_mode.handle_right_mouse_up(e))
 
     def _update_clickthrough(self):
         """Update window click-through behavior based on current mode."""
@@ -114,6 +122,15 @@ class OverlayWindow:
         if hasattr(self.current_mode, "toggle_recording"):
             self.current_mode.toggle_recording()
 
+    def toggle_pause(self):
+        if hasattr(self.current_mode, "toggle_pause"):
+            self.current_mode.toggle_pause()
+
+    def mark_range(self):
+        """Drop an in/out marker in the current recording."""
+        if hasattr(self.current_mode, "mark_range"):
+            self.current_mode.mark_range()
+
     def _on_mouse_down(self, event):
         self.current_mode.handle_mouse_down(event)
 
@@ -153,6 +170,51 @@ class OverlayWindow:
         else:
             self.enter_selection_mode()
 
+    def save_replay(self):
+        """Save the instant replay buffer and open it in the editor."""
+        saved = self.recorder.save_replay()
+        saved.add_done_callback(lambda future: self.root.after(0, self.recording_mode._on_recording_finalized, future))
+
+    def take_screenshot(self, burst=False):
+        """
+        Screenshot the region (or a burst of them) and copy the images to the clipboard.
+
+        Grabbing and saving happen on a worker thread, so the UI never waits on them.
+        """
+        region = self.recorder.region or get_region()
+        requested_at = time.monotonic()
+
+        def capture():
+            try:
+                if burst:
+                    paths = take_burst(region, *get_burst_settings())
+                else:
+                    paths = [take_screenshot(region, requested_at)]
+            except Exception as e:
+                print(f"Screenshot failed: {e}")
+                return
+            self.root.after(0, self._copy_screenshots, paths)
+
+        threading.Thread(target=capture, daemon=True).start()
+
+    def _copy_screenshots(self, paths):
+        from ..utils import copy_files_to_clipboard
+
+        try:
+            copy_files_to_clipboard(paths)
+        except Exception as e:
+            print(f"Failed to copy screenshot to clipboard: {e}")
+
+    def stop_stream(self):
+        """Stop the live stream and open its local copy in the editor."""
+        saved = self.recorder.stop_stream()
+        saved.add_done_callback(lambda future: self.root.after(0, self.recording_mode._on_recording_finalized, future))
+
+    def stop_timelapse(self):
+        """Stop the running timelapse and open it in the editor."""
+        saved = self.recorder.stop_timelapse()
+        saved.add_done_callback(lambda future: self.root.after(0, self.recording_mode._on_recording_finalized, future))
+
     def hide(self):
         self.recorder.stop()
         self.enter_waiting_mode()
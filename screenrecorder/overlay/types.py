@@ -20,6 +20,15 @@ class Mode:
     def handle_mouse_motion(self, event):
         pass
 
+    def handle_right_mouse_down(self, event):
+        pass
+
+    def handle_right_mouse_drag(self, event):
+        pass
+
+    def handle_right_mouse_up(self, event):
+        pass
+
     def draw_overlay(self):
         pass
 
@@ -0,0 +1,264 @@
+"""
+FFmpeg binary discovery and capability probe.
+
+The binary is located once per run, trying in order:
+- The SCREENRECORDER_FFMPEG environment variable
+- A "bin" folder next to the Python executable or the package
+- `ffmpeg` on $PATH
+
+Its version, encoders, filters and devices are then listed once by running
+`-version`, `-encoders`, `-filters` and `-devices`, and cached on disk, keyed
+by the binary's path and modification time, so later runs (and every
+recording, trim and resize) don't pay FFmpeg's startup cost again. Replacing
+or updating the binary invalidates the cache. The cache is a file of its own
+next to the config file, so writing it never races other config writers.
+
+If the binary can't be probed, every capability is assumed to be available,
+so a failed probe never disables a feature that would have worked. The same
+goes while another thread is probing: callers never wait for FFmpeg.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from . import config
+
+FFMPEG_PATH_ENV = "SCREENRECORDER_FFMPEG"
+PROBE_TIMEOUT = 10  # Seconds per probe command
+PROBE_CACHE_FILE = os.path.join(os.path.dirname(config.CONFIG_FILE), "ffmpeg_probe.json")
+
+FILTER_LINE_PATTERN = re.compile(r"^\s*[T.][S.][C.]?\s+(\S+)\s+\S*->\S*")
+
+_ffmpeg_path = None
+_capabilities = {}  # FFmpeg path -> FFmpegCapabilities
+_probing = set()  # FFmpeg paths being probed by some thread
+_path_lock = threading.Lock()
+_capabilities_lock = threading.Lock()
+
+
+def find_ffmpeg():
+    """
+    Search for the FFmpeg executable, without using the cached result.
+
+    Returns:
+        str: Path to FFmpeg executable, or None if not found
+    """
+    override = os.environ.get(FFMPEG_PATH_ENV)
+    if override:
+        if os.path.isfile(override):
+            return override
+        print(f"{FFMPEG_PATH_ENV} is set to '{override}', which doesn't exist")
+
+    exe_dir = os.path.dirname(sys.executable)
+    module_dir = os.path.dirname(os.path.dirname(__file__))
+    candidates = [
+        os.path.join(exe_dir, "bin", "ffmpeg.exe"),
+        os.path.join(exe_dir, "bin", "ffmpeg"),
+        os.path.join(module_dir, "bin", "ffmpeg.exe"),
+        os.path.join(module_dir, "bin", "ffmpeg"),
+    ]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+
+    return shutil.which("ffmpeg")
+
+
+def get_ffmpeg_path():
+    """
+    Locate FFmpeg executable, searching only the first time.
+
+    Returns:
+        str: Path to FFmpeg executable
+
+    Raises:
+        FileNotFoundError: If FFmpeg executable is not found
+    """
+    global _ffmpeg_path
+
+    with _path_lock:
+        if _ffmpeg_path is None:
+            _ffmpeg_path = find_ffmpeg()
+        if _ffmpeg_path is None:
+            raise FileNotFoundError(
+                "FFmpeg executable not found. Please ensure ffmpeg.exe is in the 'bin' folder next to the "
+                f"application or module directory, on the PATH, or set {FFMPEG_PATH_ENV} to its path."
+            )
+        return _ffmpeg_path
+
+
+class FFmpegCapabilities:
+    """What an FFmpeg binary supports, as listed by the binary itself."""
+
+    def __init__(self, version=None, encoders=(), filters=(), devices=(), probed=False):
+        self.version = version
+        self.encoders = set(encoders)
+        self.filters = set(filters)
+        self.devices = set(devices)  # Input devices, e.g. "gdigrab" or "x11grab"
+        self.probed = probed
+
+    def has_encoder(self, name):
+        return not self.probed or name in self.encoders
+
+    def has_filter(self, name):
+        return not self.probed or name in self.filters
+
+    def has_device(self, name):
+        return not self.probed or name in self.devices
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "encoders": sorted(self.encoders),
+            "filters": sorted(self.filters),
+            "devices": sorted(self.devices),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("version"), data.get("encoders", ()), data.get("filters", ()), data.get("devices", ()), probed=True
+        )
+
+
+def parse_listing(output):
+    """
+    Parse the entries of an `-encoders` or `-devices` listing, which follow a line of dashes.
+
+    Returns:
+        list: (flags, name) tuples
+    """
+    entries = []
+    in_entries = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not in_entries:
+            in_entries = bool(stripped) and set(stripped) == {"-"}
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2:
+            entries.append((parts[0], parts[1]))
+    return entries
+
+
+def parse_filters(output):
+    """Parse the filter names of a `-filters` listing."""
+    names = []
+    for line in output.splitlines():
+        match = FILTER_LINE_PATTERN.match(line)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def load_probe_cache():
+    """
+    Load the cached capabilities of the last probed FFmpeg binary.
+
+    Returns:
+        dict: {"path", "mtime", "version", "encoders", "filters", "devices"}, empty if not probed yet
+    """
+    try:
+        with open(PROBE_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            if isinstance(data, dict):
+                return data
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_probe_cache(data):
+    """Save probed capabilities, replacing the cache file atomically so readers never see half of it."""
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(PROBE_CACHE_FILE))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, PROBE_CACHE_FILE)
+    except OSError as e:
+        print(f"Failed to save the FFmpeg probe cache: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def run_probe(ffmpeg_path):
+    """
+    List what an FFmpeg binary supports, by running it.
+
+    Returns:
+        FFmpegCapabilities: The binary's capabilities
+
+    Raises:
+        OSError, subprocess.SubprocessError: If the binary can't be run
+    """
+
+    def list_option(option):
+        process = subprocess.run(
+            [ffmpeg_path, "-hide_banner", option],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=PROBE_TIMEOUT,
+            check=True,
+        )
+        return process.stdout
+
+    version_line = (list_option("-version").splitlines() or [""])[0].split()
+    version = version_line[2] if len(version_line) > 2 else None
+    encoders = [name for flags, name in parse_listing(list_option("-encoders"))]
+    devices = [name for flags, name in parse_listing(list_option("-devices")) if "D" in flags]
+    filters = parse_filters(list_option("-filters"))
+    return FFmpegCapabilities(version, encoders, filters, devices, probed=True)
+
+
+def get_capabilities(ffmpeg_path=None):
+    """
+    Get what an FFmpeg binary supports, probing it only if it isn't cached.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable, defaults to get_ffmpeg_path()
+
+    Returns:
+        FFmpegCapabilities: The binary's capabilities (everything assumed supported if it can't be probed)
+    """
+    try:
+        ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
+        mtime = os.stat(ffmpeg_path).st_mtime
+    except OSError:
+        return FFmpegCapabilities()
+
+    with _capabilities_lock:
+        if ffmpeg_path in _capabilities:
+            return _capabilities[ffmpeg_path]
+        if ffmpeg_path in _probing:
+            # Don't wait on FFmpeg (this may be the Tk thread): assume everything until the probe is done
+            return FFmpegCapabilities()
+        _probing.add(ffmpeg_path)
+
+    capabilities = None
+    try:
+        cached = load_probe_cache()
+        if cached.get("path") == ffmpeg_path and cached.get("mtime") == mtime:
+            capabilities = FFmpegCapabilities.from_dict(cached)
+        else:
+            try:
+                capabilities = run_probe(ffmpeg_path)
+                save_probe_cache(dict(capabilities.to_dict(), path=ffmpeg_path, mtime=mtime))
+                print(f"Probed FFmpeg {capabilities.version} at {ffmpeg_path}")
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Failed to probe FFmpeg at {ffmpeg_path}, assuming it supports everything: {e}")
+                capabilities = FFmpegCapabilities()
+    finally:
+        # Cached and no longer probing in one step, so no caller in between starts another probe
+        with _capabilities_lock:
+            if capabilities is not None:
+                _capabilities[ffmpeg_path] = capabilities
+            _probing.discard(ffmpeg_path)
+    return capabilities
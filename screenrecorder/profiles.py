@@ -0,0 +1,179 @@
+"""
+Named encoder profiles, shared by the recorder and the editor tools.
+
+A profile describes how video is encoded: codec, preset, tune, quality
+(CRF, QP or bitrate), GOP length, pixel format and container. Built-in
+profiles cover common screen recording trade-offs, and users can add or
+override profiles in the config file:
+
+    "encoder_profiles": {
+        "small-text": {"base": "screen-text", "crf": 30},
+        "hevc": {"codec": "libx265", "crf": 26}
+    }
+"""
+
+from . import config
+from . import probe
+
+DEFAULT_PROFILE = "standard"
+
+BUILTIN_PROFILES = {
+    # x264 defaults, as recordings have always been encoded
+    "standard": {
+        "codec": "libx264",
+        "preset": "medium",
+        "pix_fmt": "yuv420p",
+        "container": "mp4",
+    },
+    # Mostly static text and UI: still-image tuning and a long GOP
+    "screen-text": {
+        "codec": "libx264",
+        "preset": "medium",
+        "tune": "stillimage",
+        "crf": 24,
+        "gop": 300,
+        "pix_fmt": "yuv420p",
+        "container": "mp4",
+    },
+    # Scrolling, video playback and games: short GOP for quick seeking
+    "motion": {
+        "codec": "libx264",
+        "preset": "medium",
+        "tune": "film",
+        "crf": 22,
+        "gop": 60,
+        "pix_fmt": "yuv420p",
+        "container": "mp4",
+    },
+    # Mathematically lossless, full chroma, for keeping the original
+    "lossless-archive": {
+        "codec": "libx264",
+        "preset": "slow",
+        "qp": 0,
+        "pix_fmt": "yuv444p",
+        "container": "mkv",
+    },
+    # Live streaming: no frame reordering or lookahead, and a keyframe every second for quick joins
+    "low-latency": {
+        "codec": "libx264",
+        "preset": "veryfast",
+        "tune": "zerolatency",
+        "crf": 23,
+        "gop": 30,
+        "pix_fmt": "yuv420p",
+        "container": "mp4",
+    },
+    # Small files for sharing on the web
+    "webm-share": {
+        "codec": "libvpx-vp9",
+        "crf": 34,
+        "bitrate": "0",
+        "gop": 240,
+        "pix_fmt": "yuv420p",
+        "container": "webm",
+        "audio_codec": "libopus",
+        "args": ["-row-mt", "1", "-deadline", "good", "-cpu-used", "4"],
+    },
+}
+
+# Codecs that can be written to MPEG-TS segments, and so can be used for recording
+SEGMENT_CODECS = {"libx264", "libx265"}
+
+
+def get_profiles():
+    """
+    Get all encoder profiles, built-in and user-defined.
+
+    User profiles may name a "base" profile to start from, and override any of its fields.
+
+    Returns:
+        dict: Profile name -> profile dict
+    """
+    profiles = {name: dict(profile) for name, profile in BUILTIN_PROFILES.items()}
+    for name, overrides in config.get_encoder_profiles().items():
+        base = profiles.get(overrides.get("base"), profiles.get(name, profiles[DEFAULT_PROFILE]))
+        profile = dict(base)
+        profile.update({key: value for key, value in overrides.items() if key != "base"})
+        profiles[name] = profile
+    return profiles
+
+
+def get_missing_encoders(profile):
+    """Get the encoders a profile needs that the FFmpeg binary doesn't have (see probe.py)."""
+    capabilities = probe.get_capabilities()
+    codecs = [profile["codec"]] + ([profile["audio_codec"]] if profile.get("audio_codec") else [])
+    return [codec for codec in codecs if not capabilities.has_encoder(codec)]
+
+
+def get_profile(name):
+    """Get a profile by name, falling back to the default profile if it doesn't exist or can't be encoded."""
+    profiles = get_profiles()
+    if name not in profiles:
+        if name:
+            print(f"Unknown encoder profile '{name}', using '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE
+    elif name != DEFAULT_PROFILE:
+        missing = get_missing_encoders(profiles[name])
+        if missing:
+            print(f"Encoder profile '{name}' needs {', '.join(missing)}, which FFmpeg lacks, using '{DEFAULT_PROFILE}'")
+            name = DEFAULT_PROFILE
+    return profiles[name]
+
+
+def get_recording_profile_name():
+    """Get the name of the profile to record with, checking that it can be segmented."""
+    name = config.get_recording_profile() or DEFAULT_PROFILE
+    if get_profile(name).get("codec") not in SEGMENT_CODECS:
+        print(f"Encoder profile '{name}' can't be used for recording, using '{DEFAULT_PROFILE}'")
+        return DEFAULT_PROFILE
+    return name
+
+
+def build_profile_args(profile, preset=None, threads=0, qp=None):
+    """
+    Build FFmpeg output arguments that encode with a profile.
+
+    Args:
+        profile (dict): Encoder profile
+        preset (str): Preset overriding the profile's (e.g. chosen by the encoder governor)
+        threads (int): Encoder threads, 0 means automatic
+        qp (int): Constant quantizer overriding the profile's quality setting (0 is lossless)
+
+    Returns:
+        list: FFmpeg output arguments for the video (and audio) encoder
+    """
+    args = ["-vcodec", profile["codec"]]
+    preset = preset or profile.get("preset")
+    if preset:
+        args.extend(["-preset", preset])
+    if profile.get("tune"):
+        args.extend(["-tune", profile["tune"]])
+    if threads:
+        args.extend(["-threads", str(threads)])
+
+    qp = qp if qp is not None else profile.get("qp")
+    if qp is not None:
+        args.extend(["-qp", str(qp)])
+    elif profile.get("crf") is not None:
+        args.extend(["-crf", str(profile["crf"])])
+    if profile.get("bitrate") is not None:
+        args.extend(["-b:v", str(profile["bitrate"])])
+
+    if profile.get("gop"):
+        args.extend(["-g", str(profile["gop"])])
+    args.extend(["-pix_fmt", profile.get("pix_fmt", "yuv420p")])
+    args.extend(profile.get("args", []))
+    if profile.get("audio_codec"):
+        args.extend(["-c:a", profile["audio_codec"]])
+    return args
+
+
+def get_extension(profile):
+    """Get the file extension for a profile's container, e.g. ".mp4"."""
+    return "." + profile.get("container", "mp4")
+
+
+def get_filetypes(profile):
+    """Get file dialog filetypes for a profile's container, e.g. [("MP4 files", "*.mp4")]."""
+    extension = get_extension(profile)
+    return [(f"{extension[1:].upper()} files", f"*{extension}")]
@@ -0,0 +1,105 @@
+"""
+In/out ranges marked while recording.
+
+Each marker restarts the encoder, so the recording continues in a new part
+that starts with a keyframe exactly at the marker. The marked ranges are
+saved next to the video in a JSON sidecar, and can be extracted later by
+stream copy alone: a cut at a keyframe needs no re-encode.
+"""
+
+import json
+import os
+
+SIDECAR_SUFFIX = ".ranges.json"
+SEEK_MARGIN = 0.005  # Seconds, past the sidecar's millisecond rounding and well short of the next frame
+
+
+def get_sidecar_path(video_path):
+    return video_path + SIDECAR_SUFFIX
+
+
+def build_ranges(marks, part_starts, duration):
+    """
+    Pair up in/out marks into ranges.
+
+    Args:
+        marks (list): ("in" or "out", index of the part starting at the mark) tuples, in order
+        part_starts (dict): Part index -> start of that part in the final video, in seconds
+        duration (float): Length of the final video, closing a range left open at the end
+
+    Returns:
+        list: (start seconds, end seconds) tuples
+    """
+    ranges = []
+    start = None
+    for kind, part in marks:
+        position = part_starts.get(part)
+        if position is None:
+            continue
+        if kind == "in":
+            start = position
+        elif start is not None and position > start:
+            ranges.append((start, position))
+            start = None
+    if start is not None and duration > start:
+        ranges.append((start, duration))
+    return ranges
+
+
+def write_ranges(video_path, ranges):
+    """Save a video's marked ranges to its sidecar file."""
+    data = {"ranges": [{"start": round(start, 3), "end": round(end, 3)} for start, end in ranges]}
+    with open(get_sidecar_path(video_path), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def read_ranges(video_path):
+    """
+    Load a video's marked ranges from its sidecar file.
+
+    Returns:
+        list: (start seconds, end seconds) tuples, empty if the video has no sidecar
+    """
+    try:
+        with open(get_sidecar_path(video_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [(float(entry["start"]), float(entry["end"])) for entry in data.get("ranges", [])]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+
+def delete_ranges(video_path):
+    try:
+        os.unlink(get_sidecar_path(video_path))
+    except OSError:
+        pass
+
+
+def build_extract_command(ffmpeg_path, input_path, start, end, output_path):
+    """
+    Build an FFmpeg command that copies one marked range out of a video.
+
+    The range starts on a keyframe, whose exact timestamp was found when the
+    recording was finalized, so input seeking (which goes back to the nearest
+    keyframe) lands on it exactly. Aiming just past it keeps the millisecond
+    rounding of the sidecar from landing on the previous keyframe.
+    """
+    return [
+        ffmpeg_path,
+        "-y",
+        "-ss",
+        f"{start + SEEK_MARGIN:.3f}",
+        "-i",
+        input_path,
+        "-t",
+        f"{end - start:.3f}",
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        "-avoid_negative_ts",
+        "make_zero",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
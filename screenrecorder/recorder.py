@@ -5,116 +5,1179 @@ This module provides screen recording capabilities with support for:
 - Full screen or region-based recording
 - Cross-platform support (Windows/Linux)
 - Hardware-accelerated video encoding
+- Realtime encoder speed governing (cheaper presets when falling behind)
+- Crash-safe segmented output, joined by stream copy on stop
+- Non-blocking stop, with finalization on a background worker thread
+- Pre-armed capture, so recording starts without FFmpeg startup latency
+- Instant replay ring buffer, to save the last few seconds on demand
+- Two-stage capture (lossless capture, background transcode after stop)
+- Live progress telemetry (dropped frames, speed...) and a stall watchdog
+- Optional X11 MIT-SHM capture backend, with zero-copy access to each frame
+- Optional duplicate frame dropping, for variable frame rate output
+- Pause/resume, and idle auto-pause, joined into one file by stream copy
+- Multi-region recording: extra named regions cropped from a single capture
+- Spool storage with free space preflight, and automatic stop at size/duration caps
+- Adaptive capture frame rate and downscale for large regions
+- Live preview thumbnail, written by the capture's own FFmpeg process
+- Capture process scheduling: raised priority and capped encoder threads
 """
 
-import tempfile
+import io
 import os
 import subprocess
 import platform
 import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import config
+from .governor import EncoderGovernor, PRESETS, choose_capture_settings, get_lower_framerate
+from . import segments
+from . import replay
+from . import spool
+from . import ranges
+from . import redaction
+from . import probe
+from . import profiles
+from . import scheduling
+from .transcode import CAPTURE_SETTINGS, TranscodeJob
+from .telemetry import RecordingTelemetry
+from .idle import IdleDetector, build_sample_output_args, get_sample_path
+from .preview import build_preview_output_args, get_preview_path
+from .roi import CursorTracker, build_roi_intervals
+from .timelapse import TimelapseCapture
+from .streaming import build_stream_command
+from .commands import (
+    build_capture_input_args,
+    build_encoder_args,
+    build_filter_args,
+    build_split_crop_graph,
+    get_bounding_region,
+    get_decimate_filter,
+)
+
+FRAMERATE = 30
 
 
 class ScreenRecorder:
     def __init__(self):
         self.recording = False
+        self.paused = False  # Nothing is being captured, by the user's choice or while idle
+        self.paused_by_user = False
         self.region = None  # (x, y, w, h)
         self.temp_video_path = None
         self.ffmpeg_process = None
 
-    def start(self):
+        self.framerate = FRAMERATE
+        self.governor = EncoderGovernor(self.framerate)
+        self.encoder_settings = None
+        self.telemetry = None  # RecordingTelemetry of the current session
+        self.session_dir = None
+        self.armed = False
+        self.start_latency = None  # Seconds from pressing Record to the first recorded frame
+        self._ffmpeg_path = None
+        self._armed_region = None
+        self._part_index = 0
+        self._segment_seconds = None
+        self._first_process = None
+        self._capture_started_at = None
+        self._record_pressed_at = None
+        self._record_from = None  # time.monotonic() the recorded video starts at, once known
+        self._cut_seconds = 0
+        self.replay_process = None
+        self._replay_dir = None
+        self._replay_seconds = None
+        self._timelapse = None  # TimelapseCapture, while a timelapse is running
+        self.stream_process = None
+        self._stream_local_path = None  # MPEG-TS copy of the live stream, if saved
+        self._two_stage = False
+        self._roi = False
+        self._roi_frame = None  # (screen x, screen y, captured w, captured h, scale) of the main output
+        self._cursor_tracker = None
+        self._drop_duplicates = False
+        self._idle_detector = None
+        self._idle_since = None
+        self._markers = []  # (position in the recording in seconds, title)
+        self._range_marks = []  # ("in" or "out", index of the part starting at the mark)
+        self.range_open = False  # An in marker has been dropped, waiting for its out marker
+        self._mark_pending = False  # A marker is waiting for its encoder restart
+        self._capture_region = None  # Area actually grabbed, covering the region and any named regions
+        self._masks = []  # Redaction masks, relative to the captured area
+        self._preview = False  # FFmpeg also writes a live preview thumbnail
+        self._idle_sampling = False  # The capture also feeds idle detection samples
+        self._region_outputs = []  # (name, region, segment directory) of each extra named region
+        self._region_videos = {}  # Video path -> {name: video path} of its extra named regions
+        self._spool_monitor = None
+        self._start_size = 0  # Bytes on disk when Record was pressed (pre-armed pre-roll)
+        self._adaptive = False
+        self._capture_scale = 1.0  # Downscale applied to captured frames before encoding
+        self.auto_stopped = None  # Future of a recording stopped by a cap, until the UI picks it up
+        self._transcode_jobs = {}  # Captured video path -> TranscodeJob
+        self.frame_listeners = []  # Called with (frame, timestamp) by the MIT-SHM backend
+        self._frame_writers = {}  # FFmpeg process -> ShmFrameWriter feeding its stdin
+        self._lock = threading.RLock()
+        self._finalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording-finalizer")
+
+    def arm(self):
+        """
+        Pre-start capture for the current region, ahead of pressing Record.
+
+        FFmpeg is spawned and the capture device opened right away. Frames captured
+        before Record is pressed are discarded: only the newest segments are kept
+        while armed, and the rest is cut off exactly when the recording is finalized.
+        """
+        with self._lock:
+            if self.recording or not config.is_prearm_enabled():
+                return
+            if self.armed and self._armed_region == self.region:
+                return
+
+            spool.measure_write_speed_in_background()  # Ready for preflight() when Record is pressed
+            self._discard_session()
+            self._open_session()
+            self.armed = True
+            self._armed_region = self.region
+
+    def disarm(self):
+        """Stop pre-armed capture without recording anything."""
+        with self._lock:
+            if self.recording or not self.armed:
+                return
+            self._discard_session()
+
+    def _discard_session(self):
+        if not self.armed:
+            return
+
+        self.armed = False
+        self.telemetry.stop_watchdog()
+        process, session_dir, video_path = self.ffmpeg_process, self.session_dir, self.temp_video_path
+        self.ffmpeg_process = None
+        self.session_dir = None
+        self._finalizer.submit(self._discard, process, session_dir, video_path)
+
+    def _discard(self, process, session_dir, video_path):
+        """Stop FFmpeg and delete unused captured video. Runs on the finalizer thread."""
+        if process:
+            self._terminate_ffmpeg_process(process)
+        self._calibrate_when_idle()
+        segments.remove_session_dir(session_dir)
+        if video_path:
+            segments.delete_segments([video_path])
+
+    def start(self, defer_start=False):
         """
         Start screen recording.
 
-        Creates a temporary file and starts FFmpeg process for recording.
+        Uses the pre-armed capture if there is one for the current region, otherwise
+        creates a temporary file and starts FFmpeg process for recording.
         Supports full screen or region-based recording on Windows/Linux.
+
+        Args:
+            defer_start (bool): Start the recorded video when start_from_now() is
+                called rather than now, e.g. once the caller's overlay is off screen
+        """
+        pressed_at = time.monotonic()
+
+        with self._lock:
+            if self.recording:
+                return
+
+            lossless = self._is_two_stage_configured()
+            try:
+                report = spool.preflight(self.region, self.framerate, lossless)
+            except (RuntimeError, OSError) as e:
+                print(f"Cannot start recording: {e}")
+                return
+            self._spool_monitor = spool.SpoolMonitor(report["spool_dir"])
+
+            # The armed capture must also have been set up for the idle detection configured now
+            idle_sampling = bool(config.get_idle_pause_seconds())
+            if self.armed and (self._armed_region != self.region or self._idle_sampling != idle_sampling):
+                self._discard_session()
+            if not self.armed:
+                try:
+                    self._open_session()
+                except OSError as e:
+                    print(f"Cannot start recording: {e}")
+                    return
+
+            self.armed = False
+            self.recording = True
+            self.paused = False
+            self.paused_by_user = False
+            self._record_pressed_at = pressed_at
+            self._record_from = None if defer_start else pressed_at
+            self._start_size = segments.get_session_size(self.session_dir)  # Pre-roll isn't part of the recording
+            self._cut_seconds = 0
+            self.start_latency = None
+            self._markers = []
+            self._range_marks = []
+            self.range_open = False
+            self._mark_pending = False
+
+            if self._capture_started_at is not None and self._record_from is not None:
+                self._on_recording_started()
+
+            idle_seconds = config.get_idle_pause_seconds()
+            if idle_seconds:
+                self._idle_since = None
+                sample_path = get_sample_path(self.session_dir) if self._idle_sampling else None
+                self._idle_detector = IdleDetector(
+                    self.region, idle_seconds, self._on_region_idle, self._on_region_active, sample_path
+                )
+                self._idle_detector.start()
+
+            if self._roi:
+                self._cursor_tracker = CursorTracker(self._get_cursor_time)
+                self._cursor_tracker.start()
+
+    def start_from_now(self):
+        """
+        Start the recorded video at this moment, after start(defer_start=True).
+
+        Capture may already be running (pre-armed): frames grabbed before this
+        call are cut off, so they can't show the overlay the caller was clearing.
+        """
+        with self._lock:
+            if not self.recording or self._record_from is not None:
+                return
+            self._record_from = time.monotonic()
+            if self._capture_started_at is not None:
+                self._on_recording_started()
+
+    def is_capturing(self):
+        """Check whether anything is being captured: a recording, armed capture, replay ring, timelapse or stream."""
+        return self.recording or self.armed or self.replay_running or self.timelapse_running or self.stream_running
+
+    def _calibrate_when_idle(self):
+        """Benchmark the encoder for a region recorded without a calibration, if nothing is being captured now."""
+        if not self.is_capturing():
+            self.governor.calibrate_pending(self.is_capturing)
+
+    def _is_two_stage_configured(self):
+        """ROI encoding happens in the transcode, so it needs a two-stage capture too."""
+        return config.get_capture_profile() == config.CAPTURE_PROFILE_TWO_STAGE or self._is_roi_configured()
+
+    def _is_roi_configured(self):
+        """Check that ROI encoding is enabled, and that FFmpeg has the addroi filter it needs (4.4 and later)."""
+        if not config.is_roi_encoding_enabled():
+            return False
+        if not probe.get_capabilities().has_filter("addroi"):
+            print("ROI encoding needs FFmpeg's addroi filter, which this FFmpeg lacks")
+            return False
+        return True
+
+    def _open_session(self):
+        """
+        Create the output files and start capturing into a new session.
+
+        Raises:
+            FileNotFoundError: If FFmpeg executable is not found
+            OSError: If FFmpeg or the session's files can't be created. Nothing is left behind.
         """
         from .utils import get_ffmpeg_path
 
-        if self.recording:
-            return
+        self._ffmpeg_path = get_ffmpeg_path()
+        self.ffmpeg_process = None
+        self.session_dir = None
+        self.temp_video_path = None
+        self.telemetry = None
+        try:
+            self._start_session()
+        except BaseException:
+            self._close_failed_session()
+            raise
 
-        self.recording = True
+    def _close_failed_session(self):
+        """Undo whatever a failed _open_session() had set up."""
+        if self.telemetry:
+            self.telemetry.stop_watchdog()
+        if self.ffmpeg_process:
+            self._terminate_ffmpeg_process(self.ffmpeg_process)
+            self.ffmpeg_process = None
+        if self.session_dir:
+            segments.remove_session_dir(self.session_dir)
+            self.session_dir = None
+        if self.temp_video_path:
+            segments.delete_segments([self.temp_video_path])
+            self.temp_video_path = None
 
-        # Create temporary file for recording
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        self.temp_video_path = temp.name
-        temp.close()
+    def _start_session(self):
+        """Create the session's files and start its first FFmpeg process."""
+        # Create temporary file for the final recording
+        self.temp_video_path = spool.create_temp_file(".mp4")
 
-        # Build FFmpeg command
-        ffmpeg_cmd = self._build_ffmpeg_command(get_ffmpeg_path())
+        self.session_dir = segments.create_session_dir()
+        self._part_index = 0
 
-        # Start FFmpeg process
-        self.ffmpeg_process = self._start_ffmpeg_process(ffmpeg_cmd)
+        # Named regions are cropped from one capture of the area covering them all
+        named_regions = config.get_named_regions()
+        self._region_outputs = [
+            (name, region, segments.create_output_dir(self.session_dir, index, name))
+            for index, (name, region) in enumerate(named_regions, start=1)
+        ]
+        self._capture_region = self.region
+        if named_regions and self.region:
+            self._capture_region = get_bounding_region([self.region] + [region for _, region in named_regions])
+        self._masks = redaction.get_masks(self._capture_region)
+        self._preview = config.is_live_preview_enabled()
+        self._idle_sampling = bool(config.get_idle_pause_seconds())
 
-    def _build_ffmpeg_command(self, ffmpeg_path):
-        """Build FFmpeg command based on platform and region settings."""
-        system = platform.system()
-        cmd = [ffmpeg_path, "-y", "-framerate", "30"]
+        self._segment_seconds, _ = config.get_segment_rotation()
+        self._capture_started_at = None
+        self.telemetry = RecordingTelemetry()
+        self.telemetry.start_watchdog()
+        self._choose_capture_settings()
+        self.encoder_settings = self.governor.begin(self._ffmpeg_path, self.region)
 
-        if system == "Windows":
-            cmd.extend(["-f", "gdigrab"])
-            if self.region:
-                x, y, w, h = self.region
-                cmd.extend(["-offset_x", str(x), "-offset_y", str(y), "-video_size", f"{w}x{h}"])
-            cmd.extend(["-draw_mouse", "1", "-i", "desktop"])
-
-        elif system == "Linux":
-            cmd.extend(["-f", "x11grab"])
-            display = os.environ.get("DISPLAY", ":0.0")
-            if self.region:
-                x, y, w, h = self.region
-                cmd.extend(["-video_size", f"{w}x{h}", "-i", f"{display}+{x},{y}"])
+        # Two-stage capture is already as cheap as it gets, so the governor has nothing to do
+        self._two_stage = self._is_two_stage_configured()
+        self._roi = self._is_roi_configured()
+        self._roi_frame = self._get_roi_frame() if self._roi else None
+        if self._two_stage:
+            self.encoder_settings = dict(CAPTURE_SETTINGS)
+        self.encoder_settings["profile"] = profiles.get_recording_profile_name()
+        self._drop_duplicates = config.is_duplicate_frame_dropping_enabled()
+
+        self._start_segment()
+
+    def _choose_capture_settings(self):
+        """Pick the capture frame rate and downscale, adapting them to the region if enabled."""
+        self.framerate = FRAMERATE
+        self._capture_scale = 1.0
+        self._adaptive = config.is_adaptive_capture_enabled()
+
+        if self._adaptive:
+            if self._capture_region:
+                _, _, w, h = self._capture_region
             else:
-                cmd.extend(["-i", display])
+                from PIL import ImageGrab
+
+                w, h = ImageGrab.grab().size
+            budget = self.governor.get_pixel_budget(self.region)
+            settings = choose_capture_settings(w, h, budget)
+            self.framerate, self._capture_scale = settings["framerate"], settings["scale"]
+            print(
+                f"Adaptive capture: {self.framerate} fps, scale {self._capture_scale:g} for {w}x{h} "
+                f"(budget {budget / 1e6:.0f} Mpx/s)"
+            )
+
+        self.governor.set_capture(self.framerate, self._capture_scale)
+
+    def _get_roi_frame(self):
+        """Get where the main output's frames are on screen, to map cursor positions into them."""
+        if self.region:
+            x, y, w, h = self.region
+        else:
+            from PIL import ImageGrab
+
+            x, y = 0, 0
+            w, h = ImageGrab.grab().size
+        return x, y, w, h, self._capture_scale
+
+    def get_preview_path(self):
+        """
+        Get the live preview frame of the current recording.
+
+        Returns:
+            str: Path of the PPM file FFmpeg keeps overwriting, or None without a preview
+        """
+        if not self.recording or not self._preview or not self.session_dir:
+            return None
+        return get_preview_path(self.session_dir)
+
+    def _get_cursor_time(self):
+        """Get the position in the recording right now, or None while nothing is being recorded."""
+        stats = self.telemetry.stats
+        if not self.recording or self.paused or stats.updated_at is None:
+            return None
+        # Progress updates are half a second apart, so extrapolate from the last one
+        return self._get_position() + time.monotonic() - stats.updated_at
+
+    def _on_recording_started(self):
+        """Work out where the recording starts, once the recording's start and capture are both known."""
+        offset = self._record_from - self._capture_started_at
+        if offset > 0:
+            # Pre-armed: start at the first frame captured after the recording's start
+            frame_interval = 1 / self.framerate
+            first_frame = -(-offset // frame_interval) * frame_interval
+            self._cut_seconds = first_frame
         else:
-            raise RuntimeError(f"Unsupported OS for screen recording: {system}")
+            # Cold start: the first frame is the first one FFmpeg captured
+            self._cut_seconds = 0
+        self.start_latency = self._capture_started_at + self._cut_seconds - self._record_pressed_at
+
+        print(f"Hotkey-to-first-frame latency: {self.start_latency * 1000:.0f} ms")
+
+    def _start_segment(self):
+        """Start an FFmpeg process writing the next part of the recording's segments."""
+        output_dirs = [self.session_dir] + [output_dir for _, _, output_dir in self._region_outputs]
+        output_patterns = [segments.get_segment_pattern(output_dir, self._part_index) for output_dir in output_dirs]
+        self._part_index += 1
+
+        grabber = self._open_shm_grabber()
+        input_args = None
+        if grabber:
+            from .shm_capture import build_rawvideo_input_args
+
+            input_args = build_rawvideo_input_args(grabber.width, grabber.height, self.framerate)
+
+        # Build FFmpeg command
+        ffmpeg_cmd = self._build_ffmpeg_command(self._ffmpeg_path, output_patterns, input_args)
+
+        # Start FFmpeg process
+        try:
+            self.ffmpeg_process = self._start_ffmpeg_process(ffmpeg_cmd)
+        except BaseException:
+            if grabber:
+                grabber.close()
+            raise
+        if grabber:
+            self._start_frame_writer(self.ffmpeg_process, grabber)
+        if self._part_index == 1:
+            self._first_process = self.ffmpeg_process
+        self._monitor_ffmpeg_process(self.ffmpeg_process, self.telemetry.begin_part())
+
+    def _open_shm_grabber(self):
+        """
+        Open an MIT-SHM grabber for the region, if that backend is configured.
 
-        # Add encoding options
-        cmd.extend(["-vcodec", "libx264", "-pix_fmt", "yuv420p", self.temp_video_path])
+        Returns:
+            X11ShmGrabber: The grabber, or None to capture with FFmpeg itself
+        """
+        if platform.system() != "Linux" or config.get_capture_backend() != config.CAPTURE_BACKEND_X11SHM:
+            return None
+
+        try:
+            from .shm_capture import X11ShmGrabber
+
+            return X11ShmGrabber(self._capture_region)
+        except Exception as e:
+            print(f"MIT-SHM capture unavailable, falling back to x11grab: {e}")
+            return None
+
+    def _start_frame_writer(self, process, grabber):
+        """Feed frames grabbed through MIT-SHM into FFmpeg's stdin."""
+        from .shm_capture import ShmFrameWriter
+
+        writer = ShmFrameWriter(grabber, self.framerate, process.stdin)
+        writer.add_frame_listener(self._on_captured_frame)
+        for listener in self.frame_listeners:
+            writer.add_frame_listener(listener)
+        self._frame_writers[process] = writer
+        writer.start()
+
+    def _on_captured_frame(self, frame, timestamp):
+        """Frame listener of the MIT-SHM backend, feeding idle detection without another screen grab."""
+        idle_detector = self._idle_detector
+        if idle_detector:
+            idle_detector.add_frame(frame, timestamp)
+
+    def _build_ffmpeg_command(self, ffmpeg_path, output_patterns, input_args=None):
+        """
+        Build FFmpeg command based on platform and region settings.
+
+        Args:
+            ffmpeg_path (str): Path to FFmpeg executable
+            output_patterns (list): Segment pattern of the region, then of each named region
+            input_args (list): Capture input arguments, defaults to grabbing the screen with FFmpeg
+        """
+        # Progress goes to stdout as key=value blocks, which replaces the stats line on stderr
+        cmd = [ffmpeg_path, "-y", "-nostats", "-progress", "pipe:1"]
+        cmd.extend(input_args or build_capture_input_args(self._capture_region, self.framerate))
+        filters = self._get_video_filters()
+        # MIT-SHM frames (input_args) reach idle detection through a frame listener instead
+        idle_sample = self._idle_sampling and not input_args
+
+        if not self._region_outputs and not self._masks and not self._preview and not idle_sample:
+            cmd.extend(build_filter_args(filters, variable_frame_rate=self._drop_duplicates))
+            cmd.extend(self._build_output_args(output_patterns[0]))
+            return cmd
+
+        # Hide the redaction masks, then split the single capture into one cropped output per region
+        origin = self._capture_region[:2] if self._capture_region else (0, 0)
+        regions = [self.region if self.region != self._capture_region else None]
+        regions.extend(region for _, region, _ in self._region_outputs)
+        graph = build_split_crop_graph(
+            origin, regions, filters, self._masks, preview=self._preview, idle_sample=idle_sample
+        )
+        cmd.extend(["-filter_complex", graph])
+        for i, output_pattern in enumerate(output_patterns):
+            cmd.extend(["-map", f"[out{i}]"])
+            cmd.extend(build_filter_args([], variable_frame_rate=self._drop_duplicates))
+            cmd.extend(self._build_output_args(output_pattern))
+        if self._preview:
+            cmd.extend(build_preview_output_args(get_preview_path(self.session_dir)))
+        if idle_sample:
+            cmd.extend(build_sample_output_args(get_sample_path(self.session_dir)))
         return cmd
 
-    def _start_ffmpeg_process(self, cmd):
-        """Start FFmpeg process with appropriate flags for the platform."""
+    def _build_output_args(self, output_pattern):
+        """Build the encoding and segmenting arguments of one output."""
+        args = build_encoder_args(scheduling.apply_thread_cap(self.encoder_settings, scheduling.JOB_CAPTURE))
+
+        # Rotate MPEG-TS segments by time. Keyframes are forced on the segment
+        # boundaries so every segment starts cleanly, and each segment carries
+        # its own codec headers so parts with different presets join by copy.
+        segment_seconds = self._segment_seconds
+        args.extend(
+            [
+                "-force_key_frames",
+                f"expr:gte(t,n_forced*{segment_seconds})",
+                "-f",
+                "segment",
+                "-segment_time",
+                str(segment_seconds),
+                "-segment_format",
+                "mpegts",
+                output_pattern,
+            ]
+        )
+        return args
+
+    def _get_video_filters(self):
+        """Get the filter chain applied to captured frames before encoding."""
+        filters = []
+        if self._capture_scale < 1:
+            scale = self._capture_scale
+            filters.append(f"scale=trunc(iw*{scale}/2)*2:trunc(ih*{scale}/2)*2:flags=area")
+        if self._drop_duplicates:
+            # Encoder CPU and file size then follow how much changes on screen
+            filters.append(get_decimate_filter(self.framerate))
+        return filters
+
+    def _start_ffmpeg_process(self, cmd, capture_output=True):
+        """Start FFmpeg process with appropriate flags for the platform, as a capture job."""
         system = platform.system()
         creationflags = 0
 
         if system == "Windows":
             creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
 
-        return subprocess.Popen(cmd, stdin=subprocess.PIPE, creationflags=creationflags)
+        # Uncaptured output is discarded, since nothing would drain the pipes
+        output = subprocess.PIPE if capture_output else subprocess.DEVNULL
+        process = scheduling.popen(
+            cmd, scheduling.JOB_CAPTURE, creationflags, stdin=subprocess.PIPE, stdout=output, stderr=output
+        )
+
+        # stdin stays binary for rawvideo frames, the output is read as text
+        if capture_output:
+            process.stdout = io.TextIOWrapper(process.stdout, errors="replace")
+            process.stderr = io.TextIOWrapper(process.stderr, errors="replace")
+        return process
+
+    def _monitor_ffmpeg_process(self, process, part):
+        """Start threads reading FFmpeg's progress (stdout) and log (stderr) into the telemetry."""
+        telemetry = self.telemetry
+        threading.Thread(
+            target=telemetry.read_progress,
+            args=(process.stdout, part, lambda stats: self._on_progress(process, stats)),
+            daemon=True,
+        ).start()
+        threading.Thread(
+            target=telemetry.read_stderr,
+            args=(process.stderr, lambda line: self._on_stderr_line(process, line)),
+            daemon=True,
+        ).start()
+
+    def _on_stderr_line(self, process, line):
+        if line.startswith("Input #0") and process is self._first_process:
+            self._on_capture_started(process)
+
+    def _on_progress(self, process, stats):
+        """React to a progress update: prune pre-roll, govern speed and rotate segments."""
+        session_dir = self.session_dir
+        if stats.speed is None or process is not self.ffmpeg_process or not session_dir:
+            return
+        self.telemetry.set_output_size(segments.get_session_size(session_dir))
+
+        if self.armed:
+            # Only the segment holding the moment Record is pressed matters
+            segments.prune_segments(self.session_dir, keep=2)
+            for _, _, output_dir in self._region_outputs:
+                segments.prune_segments(output_dir, keep=2)
+            return
+
+        slow = self.governor.observe(stats.speed)
+        governed = not self._two_stage and config.is_encoder_governor_enabled()
+        reason = self._spool_monitor.check(stats.total_size - self._start_size, self._get_position())
+        if reason:
+            self._auto_stop(reason)
+        elif governed and slow:
+            self._restart_encoder(process, step_down=True)
+        elif self._adaptive and self.governor.is_overloaded():
+            # Out of cheaper presets (or not governing them), so capture fewer frames instead
+            self._restart_encoder(process, lower_framerate=True)
+        elif self._is_segment_too_large():
+            self._restart_encoder(process)
+
+    def _on_capture_started(self, process):
+        """FFmpeg has opened the capture device, so the first frame is being grabbed now."""
+        with self._lock:
+            if process is not self._first_process or self._capture_started_at is not None:
+                return
+            self._capture_started_at = time.monotonic()
+            if self.recording and self._record_from is not None:
+                self._on_recording_started()
+
+    def pause(self):
+        """
+        Pause the recording until resume() is called.
+
+        The encoder is stopped, so paused time produces no frames at all. Resuming
+        continues in a new part, joined to the earlier ones by stream copy.
+        """
+        with self._lock:
+            if not self.recording or self.paused_by_user:
+                return
+
+            self.paused_by_user = True
+            self._idle_since = None  # Only the user resumes a user pause
+            if not self.paused:
+                self._pause_capture()
+
+    def resume(self):
+        """Resume a recording paused with pause()."""
+        with self._lock:
+            if not self.recording or not self.paused_by_user:
+                return
+
+            self.paused_by_user = False
+            self._resume_capture()
+
+    def _pause_capture(self):
+        """Stop the current encoder, so that nothing is captured until _resume_capture(). Call with the lock held."""
+        self.paused = True
+        self.telemetry.stop_watchdog()
+        process = self.ffmpeg_process
+        self.ffmpeg_process = None
+        if process:
+            self._finalizer.submit(self._terminate_ffmpeg_process, process)
+
+    def _resume_capture(self):
+        """Continue capturing in a new part, joined to the earlier ones by stream copy. Call with the lock held."""
+        self.paused = False
+        self.telemetry.start_watchdog()
+        self._start_segment()
+
+    def _get_position(self):
+        """Get the length of the recording so far, in seconds."""
+        return max(0.0, self.telemetry.stats.out_time - self._cut_seconds)
+
+    def _on_region_idle(self):
+        with self._lock:
+            if not self.recording or self.paused:
+                return
+            print("Recorded region is idle, pausing encoding")
+            self._idle_since = time.monotonic()
+            self._pause_capture()
+
+    def _on_region_active(self):
+        with self._lock:
+            if not self.recording or self._idle_since is None:
+                return
+
+            idle_seconds = time.monotonic() - self._idle_since
+            self._idle_since = None
+            print(f"Recorded region changed after {idle_seconds:.0f}s idle, resuming encoding")
+            if config.is_idle_pause_marker_enabled():
+                self._markers.append((self._get_position(), f"After {idle_seconds:.0f}s idle"))
+            self._resume_capture()
+
+    def mark_range(self):
+        """
+        Drop an in or out marker (alternately) at this moment of the recording.
+
+        The encoder is restarted, so that the marker falls on the first frame of a
+        new part, which is a keyframe. The marked ranges can then be extracted by
+        stream copy alone (see ranges.py).
+
+        Returns:
+            str: "in" or "out", or None if nothing is being recorded or the previous marker is still pending
+        """
+        with self._lock:
+            if not self.recording or self.paused or not self.ffmpeg_process or self._mark_pending:
+                return None
+            kind = "out" if self.range_open else "in"
+            self._mark_pending = True
+            process = self.ffmpeg_process
+
+        # Don't block the caller while the old encoder finishes
+        threading.Thread(target=self._mark_range, args=(process, kind), daemon=True).start()
+        return kind
+
+    def _mark_range(self, process, kind):
+        try:
+            self._restart_encoder(process, mark=kind)
+        finally:
+            with self._lock:
+                self._mark_pending = False
+
+    def _is_segment_too_large(self):
+        _, max_segment_bytes = config.get_segment_rotation()
+        return max_segment_bytes and segments.get_latest_segment_size(self.session_dir) >= max_segment_bytes
+
+    def _restart_encoder(self, process, step_down=False, lower_framerate=False, mark=None):
+        """
+        Restart FFmpeg so that the recording continues in a new part.
+
+        Used to switch to a cheaper preset or a lower frame rate, to rotate
+        segments by size (which the segment muxer cannot do on its own), or to
+        start a marked range on a keyframe. Costs a brief gap in capture.
+        """
+        with self._lock:
+            if not self.recording or process is not self.ffmpeg_process:
+                return
+
+            if step_down:
+                settings = self.governor.step_down()
+                if not settings:
+                    return
+                self.encoder_settings = dict(settings, profile=self.encoder_settings.get("profile"))
+
+            if lower_framerate:
+                framerate = get_lower_framerate(self.framerate)
+                if not framerate:
+                    return
+                print(f"Capture overloaded, lowering the frame rate to {framerate} fps")
+                self.framerate = framerate
+                self.governor.set_capture(framerate, self._capture_scale)
+
+        # Wait for the old encoder outside the lock, so stop() never waits on FFmpeg
+        self._terminate_ffmpeg_process(process)
+
+        with self._lock:
+            if self.recording and process is self.ffmpeg_process:
+                self._start_segment()
+            if mark and self.recording and not self.paused:
+                # The part that just started begins with a keyframe at the marker.
+                # Only now is the range open (or closed): a dropped marker leaves it as it was.
+                self._range_marks.append((mark, self._part_index - 1))
+                self.range_open = mark == "in"
 
     def stop(self):
         """
-        Stop screen recording gracefully.
+        Stop screen recording without blocking the caller.
+
+        FFmpeg is stopped and the recorded segments are joined into the final
+        video on a background worker thread.
 
-        Sends appropriate signals to FFmpeg process and waits for completion.
+        Returns:
+            concurrent.futures.Future: Resolves to the final video path, or None
+            if nothing was recorded or finalization failed
         """
-        if not self.recording:
-            return
+        with self._lock:
+            if not self.recording:
+                future = Future()
+                future.set_result(None)
+                return future
 
-        self.recording = False
+            if self._record_from is None:
+                # start_from_now() was never called: start where Record was pressed
+                self._record_from = self._record_pressed_at
+                if self._capture_started_at is not None:
+                    self._on_recording_started()
 
-        if self.ffmpeg_process:
-            self._terminate_ffmpeg_process()
+            self.recording = False
+            self.paused = False
+            self.paused_by_user = False
+            self.range_open = False
+            if self._idle_detector:
+                self._idle_detector.stop()
+                self._idle_detector = None
+            if self._cursor_tracker:
+                self._cursor_tracker.stop()
+            cursor_samples = list(self._cursor_tracker.samples) if self._cursor_tracker else None
+            self._cursor_tracker = None
+
+            process = self.ffmpeg_process
+            session_dir = self.session_dir
+            self.telemetry.stop_watchdog()
             self.ffmpeg_process = None
+            self.session_dir = None
 
-        if self.temp_video_path:
-            print(f"Recording saved to: {self.temp_video_path}")
+            session = {
+                "ffmpeg_path": self._ffmpeg_path,
+                "session_dir": session_dir,
+                "video_path": self.temp_video_path,
+                "cut_seconds": self._cut_seconds,
+                "segment_seconds": self._segment_seconds,
+                "encoder_settings": dict(self.encoder_settings),
+                "encoder_report": self.governor.get_report(),
+                "capture_summary": self.governor.get_capture_summary(),
+                "two_stage": self._two_stage,
+                "telemetry": self.telemetry,
+                "markers": list(self._markers),
+                "range_marks": list(self._range_marks),
+                "cursor_samples": cursor_samples,
+                "roi_frame": self._roi_frame,
+                "region_outputs": [(name, output_dir) for name, _, output_dir in self._region_outputs],
+            }
+            return self._finalizer.submit(self._finalize, process, session)
+
+    def _auto_stop(self, reason):
+        """Stop the recording from a worker thread, leaving its future for the UI in auto_stopped."""
+        with self._lock:
+            if not self.recording:
+                return
+            print(f"Stopping recording: {reason}")
+            self.auto_stopped = self.stop()
+
+    def _finalize(self, process, session):
+        """Stop FFmpeg and join the recorded segments. Runs on the finalizer thread."""
+        if process:
+            self._terminate_ffmpeg_process(process)
+        self._calibrate_when_idle()
+        print(f"Recording stats: {session['telemetry'].stats.summary()}")
+
+        session_dir = session["session_dir"]
+        video_path = session["video_path"]
+        region_videos = {}
+        duration = session["telemetry"].stats.out_time - session["cut_seconds"]
+        try:
+            chapters = None
+            if session["markers"]:
+                chapters = segments.build_chapters(session["markers"], duration)
+
+            segment_paths = self._join_output(session, session_dir, video_path, chapters)
+            marked_ranges = []
+            if session["range_marks"]:
+                part_starts = segments.get_part_starts(session["ffmpeg_path"], segment_paths, video_path)
+                marked_ranges = ranges.build_ranges(session["range_marks"], part_starts, duration)
+            for name, output_dir in session["region_outputs"]:
+                region_path = f"{os.path.splitext(video_path)[0]}-{os.path.basename(output_dir)}.mp4"
+                region_videos[name] = region_path
+                self._join_output(session, output_dir, region_path, chapters)
+            segments.remove_session_dir(session_dir)
+        except Exception as e:
+            # Keep the session directory, so the segments can be recovered later
+            print(f"Failed to finalize recording: {e}")
+            for line in session["telemetry"].stderr_lines:
+                print(f"  ffmpeg: {line}")
+            segments.delete_segments([video_path] + list(region_videos.values()))
+            return None
+
+        if marked_ranges:
+            # Written before any transcode starts, which keeps keyframes at the marked ranges
+            ranges.write_ranges(video_path, marked_ranges)
+            print(f"Marked ranges saved to: {ranges.get_sidecar_path(video_path)}")
+
+        if region_videos:
+            self._region_videos[video_path] = region_videos
+            for name, region_path in region_videos.items():
+                print(f"Region '{name}' saved to: {region_path}")
+
+        if session["two_stage"]:
+            # The editor opens the lossless capture and shows the transcode's progress
+            profile_name = session["encoder_settings"].get("profile")
+            roi_intervals = None
+            if session["cursor_samples"] is not None:
+                roi_intervals = build_roi_intervals(session["cursor_samples"], session["roi_frame"], duration)
+            job = TranscodeJob(session["ffmpeg_path"], video_path, profile_name, roi_intervals)
+            self._transcode_jobs[video_path] = job
+            job.start()
+            for region_path in region_videos.values():
+                self._transcode_in_place(session["ffmpeg_path"], region_path, profile_name)
+        else:
+            print(session["encoder_report"])
+
+        print(f"Recording saved to: {video_path}")
+        return video_path
+
+    def _join_output(self, session, output_dir, video_path, chapters):
+        """
+        Cut the pre-roll off one output's segments and join them into its video.
+
+        Returns:
+            list: The joined segment files, in playback order
+        """
+        segment_paths = segments.list_segments(output_dir)
+        if session["cut_seconds"] > 0:
+            segment_paths = segments.trim_start(
+                session["ffmpeg_path"],
+                segment_paths,
+                session["cut_seconds"],
+                session["segment_seconds"],
+                session["encoder_settings"],
+            )
+        metadata = {"comment": f"Captured with {session['capture_summary']}"}
+        segments.join_segments(session["ffmpeg_path"], segment_paths, video_path, chapters, metadata)
+        return segment_paths
+
+    def _transcode_in_place(self, ffmpeg_path, video_path, profile_name):
+        """Replace a lossless two-stage capture with its transcode, once that is done."""
+
+        def on_done(output_path):
+            if output_path:
+                os.replace(output_path, video_path)
+
+        job = TranscodeJob(ffmpeg_path, video_path, profile_name)
+        job.add_event_listener("done", on_done)
+        job.start()
+
+    def get_region_videos(self, video_path):
+        """
+        Get the videos of the named regions recorded alongside a recording.
+
+        Returns:
+            dict: Region name -> video path, empty if no named regions were recorded
+        """
+        return self._region_videos.get(video_path, {})
+
+    def get_transcode_job(self, video_path):
+        """
+        Get the background transcode of a two-stage recording.
+
+        Returns:
+            TranscodeJob: The job, or None if the video needs no transcode
+        """
+        return self._transcode_jobs.get(video_path)
+
+    @property
+    def replay_running(self):
+        return self.replay_process is not None
+
+    def start_replay(self):
+        """
+        Start recording the saved region into the instant replay ring buffer.
+
+        Runs in the background, independently of regular recordings, with
+        fixed disk and memory use however long it is left on.
+        """
+        from .utils import get_ffmpeg_path
+
+        with self._lock:
+            if self.replay_process:
+                return
+
+            region = config.get_region()
+            if not region:
+                print("Select a region to record before starting instant replay")
+                return
+
+            replay.remove_stale_rings()
+            self._replay_dir = replay.create_ring_dir()
+            self._replay_seconds = config.get_replay_seconds()
+
+            # Runs all day, so never use a preset more expensive than the replay default
+            settings = self.governor.get_cached_settings(region) or {"preset": replay.REPLAY_PRESET, "threads": 0}
+            preset = max(settings["preset"], replay.REPLAY_PRESET, key=PRESETS.index)
+            encoder_settings = {"preset": preset, "threads": int(settings.get("threads", 0))}
+            encoder_settings = scheduling.apply_thread_cap(encoder_settings, scheduling.JOB_CAPTURE)
 
-    def _terminate_ffmpeg_process(self):
+            cmd = replay.build_ring_command(
+                get_ffmpeg_path(), region, self.framerate, encoder_settings, self._replay_dir, self._replay_seconds
+            )
+            self.replay_process = self._start_ffmpeg_process(cmd, capture_output=False)
+            print(f"Instant replay started, keeping the last {self._replay_seconds} seconds")
+
+    def stop_replay(self):
+        """Stop the instant replay ring buffer and discard its contents."""
+        with self._lock:
+            if not self.replay_process:
+                return
+
+            process, replay_dir = self.replay_process, self._replay_dir
+            self.replay_process = None
+            self._replay_dir = None
+            self._finalizer.submit(self._discard, process, replay_dir, None)
+
+    def save_replay(self, seconds=None):
+        """
+        Save the last few seconds of the instant replay ring buffer to an MP4.
+
+        Args:
+            seconds (float): How much to save, defaults to the whole ring
+
+        Returns:
+            concurrent.futures.Future: Resolves to the saved video path, or None
+        """
+        from .utils import get_ffmpeg_path
+
+        with self._lock:
+            if not self.replay_process:
+                future = Future()
+                future.set_result(None)
+                return future
+
+            seconds = min(seconds or self._replay_seconds, self._replay_seconds)
+            return self._finalizer.submit(self._save_replay, get_ffmpeg_path(), self._replay_dir, seconds)
+
+    def _save_replay(self, ffmpeg_path, replay_dir, seconds):
+        """Join the newest ring segments into an MP4. Runs on the finalizer thread."""
+        video_path = spool.create_temp_file(".mp4")
+
+        try:
+            replay.save_ring(ffmpeg_path, replay_dir, seconds, video_path)
+        except Exception as e:
+            print(f"Failed to save instant replay: {e}")
+            segments.delete_segments([video_path])
+            return None
+
+        print(f"Instant replay saved to: {video_path}")
+        return video_path
+
+    @property
+    def timelapse_running(self):
+        return self._timelapse is not None
+
+    def start_timelapse(self):
+        """
+        Start a timelapse of the saved region, grabbing one frame every few seconds.
+
+        Runs in the background, independently of regular recordings, until
+        stop_timelapse() assembles the frames into a video.
+        """
+        from .utils import get_ffmpeg_path
+
+        with self._lock:
+            if self._timelapse:
+                return
+
+            region = config.get_region()
+            if not region:
+                print("Select a region to record before starting a timelapse")
+                return
+
+            interval = config.get_timelapse_interval()
+            self._timelapse = TimelapseCapture(
+                get_ffmpeg_path(), region, interval, profiles.get_recording_profile_name()
+            )
+            self._timelapse.start()
+            print(f"Timelapse started, grabbing a frame every {interval:g} seconds")
+
+    def stop_timelapse(self):
+        """
+        Stop the timelapse and join its segments into an MP4.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the video path, or None
+        """
+        with self._lock:
+            if not self._timelapse:
+                future = Future()
+                future.set_result(None)
+                return future
+
+            timelapse = self._timelapse
+            self._timelapse = None
+            return self._finalizer.submit(self._finalize_timelapse, timelapse)
+
+    def _finalize_timelapse(self, timelapse):
+        """Stop the timelapse's encoder and join its segments. Runs on the finalizer thread."""
+        timelapse.stop()
+        video_path = spool.create_temp_file(".mp4")
+
+        try:
+            segments.join_segments(timelapse.ffmpeg_path, segments.list_segments(timelapse.session_dir), video_path)
+            segments.remove_session_dir(timelapse.session_dir)
+        except Exception as e:
+            # Keep the session directory, so the segments can be recovered later
+            print(f"Failed to save timelapse: {e}")
+            segments.delete_segments([video_path])
+            return None
+
+        print(f"Timelapse of {timelapse.frames} frames saved to: {video_path}")
+        return video_path
+
+    @property
+    def stream_running(self):
+        return self.stream_process is not None
+
+    def start_stream(self):
+        """
+        Start streaming the saved region live to the configured URL.
+
+        Runs in the background, independently of regular recordings. The same
+        encode is optionally saved locally, and turned into an MP4 by stop_stream().
+        """
+        from .utils import get_ffmpeg_path
+
+        with self._lock:
+            if self.stream_process:
+                return
+
+            url = config.get_stream_url()
+            if not url:
+                print("Set stream_url in the config file before starting a live stream")
+                return
+
+            self._stream_local_path = None
+            if config.is_stream_local_copy_enabled():
+                self._stream_local_path = spool.create_temp_file(".ts")
+
+            region = config.get_region()
+            try:
+                cmd = build_stream_command(
+                    get_ffmpeg_path(), region, FRAMERATE, url, self._stream_local_path, redaction.get_masks(region)
+                )
+            except ValueError as e:
+                print(f"Cannot start live stream: {e}")
+                return
+            self.stream_process = self._start_ffmpeg_process(cmd, capture_output=False)
+            print(f"Live streaming to {url}")
+
+    def stop_stream(self):
+        """
+        Stop the live stream.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the local MP4 of the stream, or None
+        """
+        with self._lock:
+            if not self.stream_process:
+                future = Future()
+                future.set_result(None)
+                return future
+
+            process, local_path = self.stream_process, self._stream_local_path
+            self.stream_process = None
+            self._stream_local_path = None
+            return self._finalizer.submit(self._finalize_stream, process, local_path)
+
+    def _finalize_stream(self, process, local_path):
+        """Stop the stream and remux its local copy into an MP4. Runs on the finalizer thread."""
+        from .utils import get_ffmpeg_path
+
+        self._terminate_ffmpeg_process(process)
+        if not local_path:
+            return None
+
+        video_path = spool.create_temp_file(".mp4")
+        try:
+            segments.join_segments(get_ffmpeg_path(), [local_path], video_path)
+        except Exception as e:
+            print(f"Failed to save live stream, its MPEG-TS copy is at {local_path}: {e}")
+            segments.delete_segments([video_path])
+            return None
+
+        segments.delete_segments([local_path])
+        print(f"Live stream saved to: {video_path}")
+        return video_path
+
+    def _terminate_ffmpeg_process(self, process):
         """Terminate FFmpeg process using platform-appropriate signals."""
+        writer = self._frame_writers.pop(process, None)
+        if writer:
+            # End of input on stdin lets FFmpeg finish the output cleanly
+            writer.stop()
+            process.wait()
+            return
+
         system = platform.system()
 
         try:
             if system == "Windows":
                 # Send CTRL+BREAK signal to process group
-                self.ffmpeg_process.send_signal(signal.CTRL_BREAK_EVENT)
+                process.send_signal(signal.CTRL_BREAK_EVENT)
             else:
                 # Send SIGINT to process group (Linux/macOS)
-                self.ffmpeg_process.send_signal(signal.SIGINT)
+                process.send_signal(signal.SIGINT)
         except Exception:
             # Fallback to forceful termination
-            self.ffmpeg_process.terminate()
+            process.terminate()
         finally:
             # Wait for process to finish
-            self.ffmpeg_process.wait()
+            process.wait()
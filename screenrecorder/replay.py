@@ -0,0 +1,100 @@
+"""
+Instant replay ring buffer ("save the last N seconds").
+
+The saved region is recorded continuously into a fixed-size ring of short
+MPEG-TS segments, held in RAM-backed storage where available. Saving joins
+the newest segments into an MP4 by stream copy, without re-encoding.
+
+Like recording sessions, each ring directory is locked by the process using
+it (see segments.py), so only rings left behind by a dead process are removed.
+"""
+
+import glob
+import math
+import os
+import tempfile
+
+from .commands import build_capture_input_args, build_encoder_args
+from .redaction import build_redaction_args, get_masks
+from .segments import claim_abandoned_dir, claim_session_dir, join_segments, remove_session_dir
+from .spool import get_ram_dir
+
+RING_PREFIX = "screenrecorder-replay-"
+RING_SEGMENT_SECONDS = 2  # Saved clips are rounded up to whole segments
+RING_SPARE_SEGMENTS = 2  # Segment being written, plus one being reused by FFmpeg
+REPLAY_PRESET = "veryfast"  # Most expensive preset used for the always-on capture
+
+
+def get_ring_parent_dir():
+    """Get the directory to hold ring buffers, preferring RAM-backed tmpfs."""
+    return get_ram_dir() or tempfile.gettempdir()
+
+
+def create_ring_dir():
+    """Create a directory to hold a ring buffer, owned by this process."""
+    ring_dir = tempfile.mkdtemp(prefix=RING_PREFIX, dir=get_ring_parent_dir())
+    claim_session_dir(ring_dir)
+    return ring_dir
+
+
+def remove_stale_rings():
+    """Delete ring buffers left behind by a previous run, leaving those of running instances alone."""
+    for path in glob.glob(os.path.join(get_ring_parent_dir(), f"{RING_PREFIX}*")):
+        if os.path.isdir(path) and claim_abandoned_dir(path):
+            remove_session_dir(path)
+
+
+def get_segment_count(seconds):
+    """Number of ring segments needed to hold `seconds` of video."""
+    return math.ceil(seconds / RING_SEGMENT_SECONDS) + RING_SPARE_SEGMENTS
+
+
+def build_ring_command(ffmpeg_path, region, framerate, encoder_settings, ring_dir, seconds):
+    """
+    Build the FFmpeg command that records into a ring of segments.
+
+    The segment muxer wraps its segment numbers, so the ring never grows beyond
+    get_segment_count(seconds) files.
+    """
+    cmd = [ffmpeg_path, "-y"]
+    cmd.extend(build_capture_input_args(region, framerate))
+    cmd.extend(build_redaction_args(get_masks(region)))
+    cmd.extend(build_encoder_args(encoder_settings))
+    cmd.extend(
+        [
+            "-force_key_frames",
+            f"expr:gte(t,n_forced*{RING_SEGMENT_SECONDS})",
+            "-f",
+            "segment",
+            "-segment_time",
+            str(RING_SEGMENT_SECONDS),
+            "-segment_wrap",
+            str(get_segment_count(seconds)),
+            "-segment_format",
+            "mpegts",
+            os.path.join(ring_dir, "ring_%03d.ts"),
+        ]
+    )
+    return cmd
+
+
+def list_ring_segments(ring_dir):
+    """List a ring's segments from oldest to newest (the last one is still being written)."""
+    segment_paths = glob.glob(os.path.join(ring_dir, "ring_*.ts"))
+    return sorted(segment_paths, key=os.path.getmtime)
+
+
+def save_ring(ffmpeg_path, ring_dir, seconds, output_path):
+    """
+    Save the last `seconds` of a ring buffer to an MP4 by stream copy.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        ring_dir (str): Ring buffer directory
+        seconds (float): How much of the most recent video to keep
+        output_path (str): Destination MP4 file
+    """
+    # One extra segment, since the newest one is only partially written
+    needed = math.ceil(seconds / RING_SEGMENT_SECONDS) + 1
+    segment_paths = list_ring_segments(ring_dir)[-needed:]
+    join_segments(ffmpeg_path, segment_paths, output_path)
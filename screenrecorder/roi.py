@@ -0,0 +1,265 @@
+"""
+Region-of-interest encoding around the mouse cursor.
+
+With screen content the detail that matters is usually near the pointer, so
+the encoder is told to spend more bits there and fewer everywhere else, using
+FFmpeg's addroi filter (honoured by libx264, libx265 and libvpx).
+
+addroi's region is fixed for the lifetime of the filter, so it can't follow
+the cursor in a live encode. Instead, ROI recordings are captured losslessly
+(like a two-stage capture) while the cursor position is sampled, and the
+transcode encodes each stretch of time where the cursor stays in one area with
+its own ROI. The encoded pieces are joined by stream copy.
+
+Run `python -m screenrecorder.roi [ffmpeg]` to compare file size and quality
+with and without ROI on synthetic content.
+"""
+
+import platform
+import threading
+
+ROI_SIZE = (480, 320)  # Area around the cursor that gets extra detail, in captured pixels
+ROI_QOFFSET = -0.1  # Quantizer offset of the area around the cursor (-1 to 1, scaled by the codec's QP range)
+BACKGROUND_QOFFSET = 0.12  # Quantizer offset of the rest of the frame
+
+SAMPLE_INTERVAL = 0.1  # Seconds between cursor samples
+MIN_INTERVAL_SECONDS = 2.0  # Shortest stretch encoded with one ROI, bounding the seek overhead of each piece
+
+_x11 = None  # (libX11, display) opened on first use
+
+
+def get_cursor_position():
+    """
+    Get the mouse cursor position on screen.
+
+    Returns:
+        tuple: (x, y) in screen pixels, or None if it can't be read
+    """
+    import ctypes
+
+    if platform.system() == "Windows":
+        point = (ctypes.c_long * 2)()
+        if ctypes.windll.user32.GetCursorPos(point):
+            return point[0], point[1]
+        return None
+
+    global _x11
+    if _x11 is None:
+        import ctypes.util
+
+        xlib = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XQueryPointer.argtypes = [ctypes.c_void_p, ctypes.c_ulong] + [ctypes.c_void_p] * 7
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            return None
+        _x11 = (xlib, display)
+
+    xlib, display = _x11
+    root, child = ctypes.c_ulong(), ctypes.c_ulong()
+    root_x, root_y, win_x, win_y = ctypes.c_int(), ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+    mask = ctypes.c_uint()
+    found = xlib.XQueryPointer(
+        display,
+        xlib.XDefaultRootWindow(display),
+        ctypes.byref(root),
+        ctypes.byref(child),
+        ctypes.byref(root_x),
+        ctypes.byref(root_y),
+        ctypes.byref(win_x),
+        ctypes.byref(win_y),
+        ctypes.byref(mask),
+    )
+    return (root_x.value, root_y.value) if found else None
+
+
+class CursorTracker:
+    """
+    Samples the cursor position over the course of a recording.
+
+    get_time() returns the current position in the recording in seconds, or
+    None while nothing is being recorded (e.g. paused), which skips the sample.
+    """
+
+    def __init__(self, get_time):
+        self.get_time = get_time
+        self.samples = []  # (position in the recording in seconds, screen x, screen y)
+
+        self._stop_event = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            t = self.get_time()
+            if t is None:
+                continue
+            try:
+                position = get_cursor_position()
+            except Exception as e:
+                print(f"Cursor tracking stopped: {e}")
+                return
+            if position:
+                self.samples.append((t, position[0], position[1]))
+
+
+def get_roi_box(x, y, frame_size, scale=1.0):
+    """
+    Get the ROI around a point, clamped to the frame.
+
+    Args:
+        x, y (int): Point in frame pixels
+        frame_size (tuple): (w, h) of the encoded frame
+        scale (float): Downscale applied to captured frames, which shrinks the ROI too
+
+    Returns:
+        tuple: (x, y, w, h) in frame pixels
+    """
+    frame_w, frame_h = frame_size
+    w = min(frame_w, int(ROI_SIZE[0] * scale))
+    h = min(frame_h, int(ROI_SIZE[1] * scale))
+    left = min(max(0, int(x) - w // 2), frame_w - w)
+    top = min(max(0, int(y) - h // 2), frame_h - h)
+    return left, top, w, h
+
+
+def build_roi_intervals(samples, frame, duration):
+    """
+    Split a recording into stretches where the cursor stays in one area.
+
+    A stretch lasts at least MIN_INTERVAL_SECONDS. Within that time its ROI grows
+    to cover wherever the cursor goes, after that a new stretch starts as soon as
+    the cursor leaves the ROI.
+
+    Args:
+        samples (list): (seconds, screen x, screen y) from a CursorTracker
+        frame (tuple): (screen x, screen y, captured w, captured h, scale) of the encoded frame
+        duration (float): Length of the recording in seconds
+
+    Returns:
+        list: (start seconds, end seconds, (x, y, w, h) ROI in frame pixels, or None for none)
+    """
+    origin_x, origin_y, captured_w, captured_h, scale = frame
+    frame_size = (int(captured_w * scale), int(captured_h * scale))
+
+    intervals = []
+    start, bounds = 0.0, None  # bounds: (min x, min y, max x, max y) of the cursor in the current stretch
+    for t, screen_x, screen_y in sorted(samples):
+        if t >= duration:
+            break
+        x, y = (screen_x - origin_x) * scale, (screen_y - origin_y) * scale
+        if not (0 <= x < frame_size[0] and 0 <= y < frame_size[1]):
+            continue  # Cursor is outside the recorded region
+
+        if bounds is not None:
+            box = _get_bounds_box(bounds, frame_size, scale)
+            inside = box[0] <= x < box[0] + box[2] and box[1] <= y < box[1] + box[3]
+            if not inside and t - start >= MIN_INTERVAL_SECONDS:
+                intervals.append((start, t, box))
+                start, bounds = t, None
+
+        if bounds is None:
+            bounds = (x, y, x, y)
+        else:
+            bounds = (min(bounds[0], x), min(bounds[1], y), max(bounds[2], x), max(bounds[3], y))
+
+    if start < duration:
+        intervals.append((start, duration, _get_bounds_box(bounds, frame_size, scale) if bounds else None))
+    return intervals
+
+
+def _get_bounds_box(bounds, frame_size, scale):
+    """Get the ROI covering all cursor positions within bounds."""
+    min_x, min_y, max_x, max_y = bounds
+    left, top, w, h = get_roi_box(min_x, min_y, frame_size, scale)
+    right, bottom, _, _ = get_roi_box(max_x, max_y, frame_size, scale)
+    return left, top, right + w - left, bottom + h - top
+
+
+def get_roi_filter(box):
+    """
+    Get the video filter that encodes an ROI with extra detail and the rest with less.
+
+    Args:
+        box (tuple): (x, y, w, h) in frame pixels, or None to encode the whole frame evenly
+
+    Returns:
+        str: Filter chain for -vf
+    """
+    if box is None:
+        return "null"
+    x, y, w, h = box
+    # Encoders apply the first region containing a block, so the ROI goes before the full frame
+    return f"addroi={x}:{y}:{w}:{h}:{ROI_QOFFSET},addroi=0:0:iw:ih:{BACKGROUND_QOFFSET}"
+
+
+def benchmark(ffmpeg_path="ffmpeg", size=(1280, 720), seconds=10):
+    """
+    Compare encoding synthetic content with and without an ROI.
+
+    Both encodes use the default encoder profile. Quality is measured as PSNR
+    against the source, inside the ROI and over the whole frame.
+
+    Returns:
+        dict: {"plain": {...}, "roi": {...}} with "bytes", "roi_psnr" and "frame_psnr"
+    """
+    import os
+    import re
+    import subprocess
+    import tempfile
+
+    from .profiles import DEFAULT_PROFILE, build_profile_args, get_profile
+
+    w, h = size
+    box = get_roi_box(w // 2, h // 2, size)
+    crop = "crop={2}:{3}:{0}:{1}".format(*box)
+    psnr_pattern = re.compile(r"average:([\d.]+|inf)")
+
+    def psnr(encoded, source, region_filter):
+        graph = f"[0:v]{region_filter}[a];[1:v]{region_filter}[b];[a][b]psnr"
+        cmd = [ffmpeg_path, "-hide_banner", "-i", encoded, "-i", source, "-lavfi", graph, "-f", "null", "-"]
+        match = psnr_pattern.search(subprocess.run(cmd, capture_output=True, text=True).stderr)
+        return float(match.group(1)) if match else None
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Lossless source, so both encodes start from identical frames
+        source = os.path.join(temp_dir, "source.mkv")
+        cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-f", "lavfi"]
+        cmd.extend(["-i", f"testsrc2=size={w}x{h}:rate=30", "-t", str(seconds)])
+        cmd.extend(["-vcodec", "libx264", "-preset", "ultrafast", "-qp", "0", source])
+        subprocess.run(cmd, check=True)
+
+        for name, video_filter in [("plain", "null"), ("roi", get_roi_filter(box))]:
+            output = os.path.join(temp_dir, f"{name}.mp4")
+            cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-i", source, "-vf", video_filter]
+            cmd.extend(build_profile_args(get_profile(DEFAULT_PROFILE)))
+            cmd.append(output)
+            subprocess.run(cmd, check=True)
+
+            results[name] = {
+                "bytes": os.path.getsize(output),
+                "roi_psnr": psnr(output, source, crop),
+                "frame_psnr": psnr(output, source, "null"),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    ffmpeg = sys.argv[1] if len(sys.argv) > 1 else "ffmpeg"
+    results = benchmark(ffmpeg)
+    for name, result in results.items():
+        print(
+            f"{name}: {result['bytes'] / 1024:.0f} KB, "
+            f"PSNR {result['roi_psnr']} dB around the cursor, {result['frame_psnr']} dB overall"
+        )
+    print(f"ROI file size: {results['roi']['bytes'] / results['plain']['bytes']:.0%} of plain")
@@ -0,0 +1,263 @@
+"""
+Process scheduling policies for the FFmpeg processes the app starts.
+
+Each FFmpeg process belongs to a job class:
+- capture: recordings, the instant replay ring and live streams. Runs above
+  normal priority (when the OS allows it), with a bounded number of encoder
+  threads pinned to as many cores, so it keeps up without taking every core
+  from the recorded app.
+- background: transcodes, joins and timelapses nobody is waiting on. Niced,
+  with idle I/O priority, and kept off the cores capture uses.
+- editor: trims, resizes and exports. Niced and ioniced like background jobs,
+  but a little less, since someone is waiting on them.
+
+Any policy field can be overridden per job class under "scheduling" in the
+config file, e.g. {"editor": {"nice": 15}}.
+
+A global limit caps how many background and editor FFmpeg jobs run at once.
+Only background jobs wait for a slot: editor jobs run on the Tk thread, which
+must never block, but they still count, so background jobs wait while the
+user is editing. Capture jobs don't count at all: a replay ring or an armed
+capture can run for hours, and would otherwise hold background jobs back all
+that time. Capture has cores of its own instead.
+
+On Windows, only the priority class is applied: the standard library can't
+set CPU affinity or I/O priority there.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import threading
+
+from . import config
+
+JOB_CAPTURE = "capture"
+JOB_BACKGROUND = "background"
+JOB_EDITOR = "editor"
+
+# nice: niceness on Linux (mapped to a priority class on Windows)
+# ionice: run with idle I/O priority
+# threads: encoder thread cap, None for half the cores, 0 for no cap
+# avoid_capture_cores: pin to the cores capture doesn't use, if there are any (capture itself is pinned to its own)
+DEFAULT_POLICIES = {
+    JOB_CAPTURE: {"nice": -5, "ionice": False, "threads": None, "avoid_capture_cores": False},
+    JOB_BACKGROUND: {"nice": 10, "ionice": True, "threads": 0, "avoid_capture_cores": True},
+    JOB_EDITOR: {"nice": 5, "ionice": True, "threads": 0, "avoid_capture_cores": True},
+}
+
+
+def get_cpu_cores():
+    """Get the CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_policy(job_class):
+    """
+    Get the scheduling policy of a job class, with the user's overrides applied.
+
+    Returns:
+        dict: Policy fields (see DEFAULT_POLICIES)
+    """
+    policy = dict(DEFAULT_POLICIES[job_class])
+    policy.update(config.get_scheduling_overrides().get(job_class, {}))
+    return policy
+
+
+def get_thread_cap(job_class):
+    """
+    Get the most encoder threads a job class may use.
+
+    Returns:
+        int: Thread cap, or 0 for no cap
+    """
+    threads = get_policy(job_class)["threads"]
+    if threads is None:
+        return max(2, len(get_cpu_cores()) // 2)
+    return int(threads)
+
+
+def apply_thread_cap(encoder_settings, job_class):
+    """
+    Cap the threads of encoder settings ({"preset", "threads", ...}, threads 0 meaning automatic).
+
+    Returns:
+        dict: Copy of the settings, with the cap applied
+    """
+    cap = get_thread_cap(job_class)
+    if not cap:
+        return encoder_settings
+    threads = encoder_settings.get("threads") or cap
+    return dict(encoder_settings, threads=min(threads, cap))
+
+
+def get_capture_cores():
+    """Get the cores capture's encoder threads are expected to run on: the first `threads` cores."""
+    cores = get_cpu_cores()
+    cap = get_thread_cap(JOB_CAPTURE)
+    return cores[:cap] if cap else cores
+
+
+def get_job_cores(job_class):
+    """
+    Get the cores a job class is pinned to.
+
+    Returns:
+        list: Cores, or None to leave the affinity alone
+    """
+    capture_cores = get_capture_cores()
+    other_cores = [core for core in get_cpu_cores() if core not in set(capture_cores)]
+    if not other_cores:
+        return None  # Too few cores to split, share them all
+    if job_class == JOB_CAPTURE:
+        return capture_cores
+    if get_policy(job_class)["avoid_capture_cores"]:
+        return other_cores
+    return None
+
+
+def get_max_jobs():
+    """Get how many FFmpeg jobs may run at once."""
+    return config.get_max_ffmpeg_jobs() or max(2, len(get_cpu_cores()) // 2)
+
+
+def get_popen_args(job_class, creationflags=0):
+    """
+    Build the Popen keyword arguments applying a job class's priority on Windows.
+
+    Elsewhere the policy is applied right after the process starts, with apply_policy():
+    preexec_fn isn't safe in a process with threads, and this one has several.
+
+    Args:
+        job_class (str): JOB_CAPTURE, JOB_BACKGROUND or JOB_EDITOR
+        creationflags (int): Other Windows creation flags to keep
+
+    Returns:
+        dict: Popen keyword arguments
+    """
+    if platform.system() != "Windows":
+        return {}
+
+    nice = int(get_policy(job_class)["nice"])
+    if nice < 0:
+        creationflags |= subprocess.ABOVE_NORMAL_PRIORITY_CLASS
+    elif nice >= 15:
+        creationflags |= subprocess.IDLE_PRIORITY_CLASS
+    elif nice > 0:
+        creationflags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+    return {"creationflags": creationflags}
+
+
+def apply_policy(process, job_class):
+    """
+    Apply a job class's niceness and CPU affinity to a started process (outside Windows).
+
+    Best effort: raising priority needs privileges the user may not have.
+    """
+    if platform.system() == "Windows":
+        return
+
+    nice = int(get_policy(job_class)["nice"])
+    if nice and hasattr(os, "setpriority"):
+        try:
+            # Relative to this process's niceness, which the child inherited
+            os.setpriority(os.PRIO_PROCESS, process.pid, os.getpriority(os.PRIO_PROCESS, 0) + nice)
+        except OSError:
+            pass
+
+    cores = get_job_cores(job_class)
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(process.pid, cores)
+        except OSError:
+            pass
+
+
+def wrap_command(cmd, job_class):
+    """Prefix a command with `ionice` if its job class runs with idle I/O priority and the tool is available."""
+    if get_policy(job_class)["ionice"] and platform.system() == "Linux" and shutil.which("ionice"):
+        return ["ionice", "-c", "3"] + list(cmd)
+    return cmd
+
+
+class JobLimiter:
+    """Counts running background and editor FFmpeg jobs, making background jobs wait while the limit is reached."""
+
+    def __init__(self):
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, job_class):
+        """
+        Take a slot for a job, waiting for one if it's a background job.
+
+        Returns:
+            bool: True if a slot was taken (to release when the job ends), False for jobs that aren't counted
+        """
+        if job_class == JOB_CAPTURE:
+            return False
+        with self._condition:
+            if job_class == JOB_BACKGROUND:
+                self._condition.wait_for(lambda: self.active < get_max_jobs())
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+
+_limiter = JobLimiter()
+
+
+def popen(cmd, job_class, creationflags=0, **kwargs):
+    """
+    Start an FFmpeg job with its class's scheduling policy (background jobs wait for the job limit).
+
+    The job's slot, if it took one, is released when the process exits.
+
+    Returns:
+        subprocess.Popen: The started process
+    """
+    counted = _limiter.acquire(job_class)
+    try:
+        process = subprocess.Popen(
+            wrap_command(cmd, job_class), **get_popen_args(job_class, creationflags), **kwargs
+        )
+    except BaseException:
+        if counted:
+            _limiter.release()
+        raise
+    apply_policy(process, job_class)
+
+    if counted:
+
+        def release_on_exit():
+            process.wait()
+            _limiter.release()
+
+        threading.Thread(target=release_on_exit, daemon=True).start()
+    return process
+
+
+def run(cmd, job_class, capture_output=False, **kwargs):
+    """
+    Run an FFmpeg job to completion with its class's scheduling policy (background jobs wait for the job limit).
+
+    Returns:
+        subprocess.CompletedProcess: As returned by subprocess.run()
+    """
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    process = popen(cmd, job_class, **kwargs)
+    try:
+        stdout, stderr = process.communicate()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
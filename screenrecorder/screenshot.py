@@ -0,0 +1,127 @@
+"""
+Screenshots and bursts of the recording region, without starting an encoder.
+
+The region is grabbed directly (through MIT-SHM when that capture backend is
+configured on Linux, otherwise with a PIL screen grab) and written with fast
+image encoder settings, keeping the time from click to file on disk in the
+tens of milliseconds. A burst grabs K frames at a fixed interval, while a
+separate thread writes them, so slow writes don't delay the next grab.
+"""
+
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageGrab
+
+from . import config
+from . import spool
+from .redaction import get_masks, redact_image
+
+# Favor speed over size: the result is usually pasted somewhere right away
+SAVE_OPTIONS = {
+    config.SCREENSHOT_PNG: {"format": "PNG", "compress_level": 1},
+    config.SCREENSHOT_WEBP: {"format": "WEBP", "lossless": True, "method": 0},
+}
+
+
+class RegionGrabber:
+    """Grabs still frames of a region, keeping the capture resources open between grabs."""
+
+    def __init__(self, region):
+        self.region = region
+        self.masks = get_masks(region)
+        self._shm_grabber = None
+
+        if platform.system() == "Linux" and config.get_capture_backend() == config.CAPTURE_BACKEND_X11SHM:
+            try:
+                from .shm_capture import X11ShmGrabber
+
+                self._shm_grabber = X11ShmGrabber(region)
+            except Exception as e:
+                print(f"MIT-SHM capture unavailable, falling back to a regular grab: {e}")
+
+    def grab(self):
+        """Grab the region as an RGB image, with the redaction masks hidden."""
+        if self._shm_grabber:
+            grabber = self._shm_grabber
+            grabber.grab()
+            size = (grabber.width, grabber.height)
+            # Copied out of the shared buffer, which the next grab overwrites
+            image = Image.frombytes("RGB", size, bytes(grabber.get_frame_bytes()), "raw", "BGRX")
+        else:
+            bbox = None
+            if self.region:
+                x, y, w, h = self.region
+                bbox = (x, y, x + w, y + h)
+            image = ImageGrab.grab(bbox=bbox, all_screens=True).convert("RGB")
+
+        redact_image(image, self.masks)
+        return image
+
+    def close(self):
+        if self._shm_grabber:
+            self._shm_grabber.close()
+            self._shm_grabber = None
+
+
+def save_image(image, image_format):
+    """
+    Write an image to a new file in the spool.
+
+    Returns:
+        str: Path to the image
+    """
+    path = spool.create_temp_file("." + image_format)
+    image.save(path, **SAVE_OPTIONS[image_format])
+    return path
+
+
+def take_screenshot(region, requested_at=None):
+    """
+    Grab a region once and save it in the configured image format.
+
+    Args:
+        region (tuple): (x, y, w, h) to grab, or None for the full screen
+        requested_at (float): time.monotonic() of the click, to measure latency from
+
+    Returns:
+        str: Path to the image
+    """
+    requested_at = requested_at or time.monotonic()
+    grabber = RegionGrabber(region)
+    try:
+        image = grabber.grab()
+    finally:
+        grabber.close()
+    path = save_image(image, config.get_screenshot_format())
+
+    print(f"Screenshot saved to {path} in {(time.monotonic() - requested_at) * 1000:.0f} ms")
+    return path
+
+
+def take_burst(region, count, interval):
+    """
+    Grab a region `count` times, `interval` seconds apart.
+
+    Returns:
+        list: Paths to the images, in the order they were grabbed
+    """
+    image_format = config.get_screenshot_format()
+    grabber = RegionGrabber(region)
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="burst-writer") as writer:
+        saved = []
+        try:
+            for index in range(count):
+                # Paced from the start, so the interval doesn't drift by the grab time
+                delay = started_at + index * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                saved.append(writer.submit(save_image, grabber.grab(), image_format))
+        finally:
+            grabber.close()
+        paths = [future.result() for future in saved]
+
+    print(f"Burst of {len(paths)} screenshots saved in {(time.monotonic() - started_at) * 1000:.0f} ms")
+    return paths
@@ -0,0 +1,456 @@
+"""
+Crash-safe segmented recordings.
+
+Recordings are written as a session directory of short MPEG-TS segments:
+- A crash or killed FFmpeg loses at most the segment being written
+- Stopping needs no index to be written, so FFmpeg exits immediately
+- Segments are joined into one MP4 by stream copy, never re-encoded
+- Sessions left behind by a crash are recovered on the next start. Each
+  session holds an exclusive lock on its owner.lock file for as long as it is
+  in use, and the OS drops the lock when its process dies, so sessions still
+  in use by another running instance (or a long timelapse) are left alone
+- Pre-roll captured before Record is cut off exactly at finalization
+- Extra region outputs of a recording keep their segments in subdirectories
+"""
+
+import glob
+import os
+import platform
+import re
+import shutil
+import tempfile
+import time
+
+from .commands import build_encoder_args
+from . import scheduling
+from . import spool
+
+SESSION_PREFIX = "screenrecorder-session-"
+SEGMENT_EXTENSION = ".ts"
+
+SEGMENT_NAME_PATTERN = re.compile(r"part(\d+)_(\d+)\.ts$")
+TIME_BASE_PATTERN = re.compile(r"#tb \d+: (\d+)/(\d+)")
+
+OWNER_LOCK_NAME = "owner.lock"
+UNLOCKED_GRACE_SECONDS = 60  # Newer sessions without a lock file may be about to take it
+
+_session_locks = {}  # Session directory -> open lock file, held while this process uses it
+
+
+def _try_lock(lock_file):
+    """Take an exclusive, non-blocking lock on an open file. Returns False if another process holds it."""
+    try:
+        if platform.system() == "Windows":
+            import msvcrt
+
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def claim_session_dir(session_dir):
+    """
+    Take ownership of a session directory, until remove_session_dir() or this process exits.
+
+    Returns:
+        bool: True if claimed, False if another running process (or this one) owns it
+    """
+    if session_dir in _session_locks:
+        return False
+    try:
+        lock_file = open(os.path.join(session_dir, OWNER_LOCK_NAME), "a+")
+    except OSError:
+        return False
+    if not _try_lock(lock_file):
+        lock_file.close()
+        return False
+    _session_locks[session_dir] = lock_file
+    return True
+
+
+def claim_abandoned_dir(session_dir):
+    """
+    Take ownership of a session (or replay ring) directory, if the process that created it is no longer running.
+
+    Returns:
+        bool: True if claimed, False if it's still in use
+    """
+    if not os.path.exists(os.path.join(session_dir, OWNER_LOCK_NAME)):
+        # Created by another instance that hasn't taken its lock yet, or by a version without locks
+        try:
+            if time.time() - os.path.getmtime(session_dir) < UNLOCKED_GRACE_SECONDS:
+                return False
+        except OSError:
+            return False
+    return claim_session_dir(session_dir)
+
+
+def release_session_dir(session_dir):
+    """Give up ownership of a session directory, leaving its files in place."""
+    lock_file = _session_locks.pop(session_dir, None)
+    if lock_file:
+        lock_file.close()
+
+
+def create_session_dir():
+    """Create a new directory to hold the segments of one recording, owned by this process."""
+    session_dir = tempfile.mkdtemp(prefix=SESSION_PREFIX, dir=spool.get_spool_dir())
+    claim_session_dir(session_dir)
+    return session_dir
+
+
+def remove_session_dir(session_dir):
+    """Delete a session directory and all of its segments."""
+    release_session_dir(session_dir)  # Windows can't delete the lock file while it's open
+    shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def create_output_dir(session_dir, index, name):
+    """Create the subdirectory holding the segments of a recording's extra region output."""
+    safe_name = re.sub(r"[^\w-]", "_", name)
+    output_dir = os.path.join(session_dir, f"region{index:02d}_{safe_name}")
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def list_output_dirs(session_dir):
+    """List the extra region output subdirectories of a session."""
+    return sorted(path for path in glob.glob(os.path.join(session_dir, "region*")) if os.path.isdir(path))
+
+
+def get_segment_pattern(session_dir, part_index):
+    """
+    Get the FFmpeg segment muxer filename pattern for one encoder run.
+
+    Each FFmpeg process in a session is a "part". Zero-padded names keep the
+    segments of all parts in playback order when sorted.
+    """
+    return os.path.join(session_dir, f"part{part_index:03d}_%05d{SEGMENT_EXTENSION}")
+
+
+def list_segments(session_dir):
+    """List a session's segment files in playback order."""
+    return sorted(glob.glob(os.path.join(session_dir, f"*{SEGMENT_EXTENSION}")))
+
+
+def get_latest_segment_size(session_dir):
+    """Get the size in bytes of the segment currently being written."""
+    segment_paths = list_segments(session_dir)
+    if not segment_paths:
+        return 0
+    try:
+        return os.path.getsize(segment_paths[-1])
+    except OSError:
+        return 0
+
+
+def get_session_size(session_dir):
+    """
+    Get how many bytes a session's segments take on disk, including those of its extra region outputs.
+
+    The segment muxer opens its files itself, so FFmpeg's progress reports no size for them.
+    """
+    total_size = 0
+    for output_dir in [session_dir] + list_output_dirs(session_dir):
+        for path in list_segments(output_dir):
+            try:
+                total_size += os.path.getsize(path)
+            except OSError:
+                pass  # Pruned or joined meanwhile
+    return total_size
+
+
+def get_segment_number(segment_path):
+    """
+    Get the part and segment numbers encoded in a segment's filename.
+
+    Returns:
+        tuple: (part index, segment index within the part), or None
+    """
+    match = SEGMENT_NAME_PATTERN.search(os.path.basename(segment_path))
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def prune_segments(session_dir, keep):
+    """Delete all but the newest `keep` segments of a session."""
+    delete_segments(list_segments(session_dir)[:-keep])
+
+
+def trim_start(ffmpeg_path, segment_paths, cut_seconds, segment_seconds, encoder_settings):
+    """
+    Cut a recording's first part so that it starts exactly at `cut_seconds`.
+
+    Whole segments before the cut are dropped. The segment containing the cut
+    is re-encoded from the cut onwards (at most one segment's worth of video),
+    so the rest of the recording can still be joined by stream copy.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        segment_paths (list): Segment files, in playback order
+        cut_seconds (float): Start of the recording, in seconds since capture began
+        segment_seconds (float): Duration of each segment
+        encoder_settings (dict): {"preset", "threads"} to re-encode the cut segment with
+
+    Returns:
+        list: Segment files to join, in playback order
+    """
+    first_segment = int(cut_seconds // segment_seconds)
+    head_offset = cut_seconds - first_segment * segment_seconds
+
+    kept = []
+    for path in segment_paths:
+        number = get_segment_number(path)
+        if number and number[0] == 0 and number[1] < first_segment:
+            continue
+        kept.append(path)
+
+    head_number = get_segment_number(kept[0]) if kept else None
+    if head_offset <= 0 or head_number != (0, first_segment):
+        return kept
+
+    head_path = kept[0]
+    cut_path = head_path + ".cut"
+    cmd = [ffmpeg_path, "-y", "-ss", f"{head_offset:.3f}", "-i", head_path]
+    cmd.extend(build_encoder_args(encoder_settings))
+    # Keep the segment's own timestamps, which are variable if duplicate frames were dropped
+    cmd.extend(["-fps_mode", "passthrough", "-f", "mpegts", cut_path])
+
+    process = scheduling.run(cmd, scheduling.JOB_BACKGROUND, capture_output=True, text=True)
+    if process.returncode != 0:
+        delete_segments([cut_path])
+        raise RuntimeError(f"Failed to cut the start of the recording: {process.stderr}")
+
+    os.replace(cut_path, head_path)
+    return kept
+
+
+def list_video_packets(ffmpeg_path, input_args):
+    """
+    List the video packets of an input by stream copy to FFmpeg's framecrc muxer, without decoding.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        input_args (list): FFmpeg input arguments, e.g. ["-i", path]
+
+    Returns:
+        tuple: (list of packet pts in decode order, time base as a float)
+
+    Raises:
+        RuntimeError: If FFmpeg can't read the input
+    """
+    cmd = [ffmpeg_path, "-hide_banner", *input_args, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"]
+    process = scheduling.run(cmd, scheduling.JOB_BACKGROUND, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to list video packets: {process.stderr}")
+
+    pts = []
+    time_base = None
+    for line in process.stdout.splitlines():
+        match = TIME_BASE_PATTERN.match(line)
+        if match:
+            time_base = int(match.group(1)) / int(match.group(2))
+        elif line and not line.startswith("#"):
+            # stream index, dts, pts, duration, size, hash[, flags...]
+            pts.append(int(line.split(",")[2]))
+    if time_base is None:
+        raise RuntimeError("Failed to read the time base of the video packets")
+    return pts, time_base
+
+
+def get_part_starts(ffmpeg_path, segment_paths, video_path):
+    """
+    Find exactly where each part starts in the joined video.
+
+    Each part's video packets are counted, which gives the index of its first
+    packet (a keyframe) in the joined video. That packet's timestamp is where
+    the part starts, with no rounding or adding up of durations involved.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        segment_paths (list): Segment files that were joined, in playback order
+        video_path (str): The joined video
+
+    Returns:
+        dict: Part index -> start of the part's first segment in the joined video, in seconds
+    """
+    parts = {}  # Part index -> its segment files, in playback order
+    for path in segment_paths:
+        number = get_segment_number(path)
+        if number:
+            parts.setdefault(number[0], []).append(path)
+
+    packet_pts, time_base = list_video_packets(ffmpeg_path, ["-i", video_path])
+    if not packet_pts:
+        return {}
+    # Input seeking (-ss) is relative to the video's start time
+    start_pts = min(packet_pts)
+
+    part_starts = {}
+    first_packet = 0
+    for part_index, part_paths in parts.items():
+        if first_packet >= len(packet_pts):
+            break
+        part_starts[part_index] = (packet_pts[first_packet] - start_pts) * time_base
+        list_path = write_concat_list(part_paths)
+        try:
+            part_pts, _ = list_video_packets(ffmpeg_path, ["-f", "concat", "-safe", "0", "-i", list_path])
+        finally:
+            os.unlink(list_path)
+        first_packet += len(part_pts)
+    return part_starts
+
+
+def write_concat_list(segment_paths):
+    """
+    Write an FFmpeg concat demuxer list for the given segments.
+
+    Returns:
+        str: Path to the list file (caller deletes it)
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(list_fd, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = path.replace("\\", "/").replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
+
+
+def build_chapters(markers, duration, first_title="Recording"):
+    """
+    Turn markers into chapters that cover the whole recording.
+
+    Args:
+        markers (list): (position seconds, title) tuples, in order
+        duration (float): Length of the recording, in seconds
+        first_title (str): Title of the chapter before the first marker
+
+    Returns:
+        list: (start seconds, end seconds, title) tuples
+    """
+    starts = [(0.0, first_title)] + [(position, title) for position, title in markers if position > 0]
+    chapters = []
+    for i, (start, title) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else max(duration, start)
+        chapters.append((start, end, title))
+    return chapters
+
+
+def write_chapter_metadata(chapters):
+    """
+    Write an FFmpeg metadata file holding chapters.
+
+    Args:
+        chapters (list): (start seconds, end seconds, title) tuples
+
+    Returns:
+        str: Path to the metadata file (caller deletes it)
+    """
+    metadata_fd, metadata_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(metadata_fd, "w", encoding="utf-8") as f:
+        f.write(";FFMETADATA1\n")
+        for start, end, title in chapters:
+            escaped = re.sub(r"([=;#\\\n])", r"\\\1", title)
+            f.write(f"[CHAPTER]\nTIMEBASE=1/1000\nSTART={int(start * 1000)}\nEND={int(end * 1000)}\n")
+            f.write(f"title={escaped}\n")
+    return metadata_path
+
+
+def join_segments(ffmpeg_path, segment_paths, output_path, chapters=None, metadata=None):
+    """
+    Join segment files into a single playable MP4 by stream copy.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        segment_paths (list): Segment files, in playback order
+        output_path (str): Destination MP4 file
+        chapters (list): Optional (start seconds, end seconds, title) tuples to add as chapters
+        metadata (dict): Optional metadata tags to write, e.g. {"comment": "..."}
+
+    Raises:
+        RuntimeError: If FFmpeg fails to join the segments
+    """
+    segment_paths = [p for p in segment_paths if os.path.exists(p) and os.path.getsize(p) > 0]
+    if not segment_paths:
+        raise RuntimeError("No recorded segments to join")
+
+    list_path = write_concat_list(segment_paths)
+    metadata_path = write_chapter_metadata(chapters) if chapters else None
+    try:
+        cmd = [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if metadata_path:
+            cmd.extend(["-i", metadata_path, "-map", "0", "-map_chapters", "1"])
+        for key, value in (metadata or {}).items():
+            cmd.extend(["-metadata", f"{key}={value}"])
+        cmd.extend(["-c", "copy", "-movflags", "+faststart", output_path])
+
+        process = scheduling.run(cmd, scheduling.JOB_BACKGROUND, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to join segments: {process.stderr}")
+    finally:
+        os.unlink(list_path)
+        if metadata_path:
+            os.unlink(metadata_path)
+
+
+def delete_segments(segment_paths):
+    """Delete segment files, ignoring ones that are already gone."""
+    for path in segment_paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def find_orphaned_sessions():
+    """
+    Find session directories left behind by a crashed recording, and claim them for recovery.
+
+    Sessions whose owner is still running are skipped.
+    """
+    session_dirs = set()
+    for parent_dir in {tempfile.gettempdir(), spool.get_spool_dir()}:
+        pattern = os.path.join(parent_dir, f"{SESSION_PREFIX}*")
+        session_dirs.update(path for path in glob.glob(pattern) if os.path.isdir(path))
+
+    return [session_dir for session_dir in sorted(session_dirs) if claim_abandoned_dir(session_dir)]
+
+
+def recover_sessions(ffmpeg_path, session_dirs):
+    """
+    Join the segments of crashed recordings into playable MP4 files.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        session_dirs (list): Orphaned session directories, found with
+            find_orphaned_sessions() before any new recording started
+
+    Returns:
+        list: Paths of the recovered videos
+    """
+    recovered = []
+    for session_dir in session_dirs:
+        segment_paths = list_segments(session_dir)
+        if not segment_paths:
+            remove_session_dir(session_dir)
+            continue
+
+        name = os.path.basename(session_dir)[len(SESSION_PREFIX) :]
+        outputs = [(session_dir, name)]
+        outputs.extend((path, f"{name}-{os.path.basename(path)}") for path in list_output_dirs(session_dir))
+        try:
+            for output_dir, output_name in outputs:
+                output_path = os.path.join(spool.get_spool_dir(), f"screenrecorder-recovered-{output_name}.mp4")
+                join_segments(ffmpeg_path, list_segments(output_dir), output_path)
+                recovered.append(output_path)
+            remove_session_dir(session_dir)
+        except Exception as e:
+            print(f"Failed to recover {session_dir}: {e}")
+            release_session_dir(session_dir)
+    return recovered
@@ -0,0 +1,429 @@
+"""
+X11 MIT-SHM capture backend, feeding FFmpeg rawvideo through its stdin.
+
+An alternative to FFmpeg's x11grab input:
+- The region is grabbed with XShmGetImage into one shared memory buffer, reused
+  for every frame and exposed as a NumPy view without copying
+- Frames are paced precisely from a monotonic clock, with per-frame timestamps
+- Frame listeners can analyse each frame without a second screen capture
+
+Run `python -m screenrecorder.shm_capture` (e.g. under Xvfb) to benchmark the
+CPU cost per frame against x11grab.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+
+import numpy as np
+
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+PIXEL_FORMAT = "bgr0"  # Little-endian 24/32-bit TrueColor visuals
+
+# int (*)(Display *, XErrorEvent *)
+X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage, up to the ones used here
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+def _load_libraries():
+    xlib = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+    xext = ctypes.CDLL(ctypes.util.find_library("Xext") or "libXext.so.6")
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XRootWindow.restype = ctypes.c_ulong
+    xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XDefaultVisual.restype = ctypes.c_void_p
+    xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+    # Handlers are passed as plain pointers, so the previous one can be restored as returned
+    xlib.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+    xlib.XSetErrorHandler.restype = ctypes.c_void_p
+
+    xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+    xext.XShmCreateImage.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+        ctypes.POINTER(XShmSegmentInfo),
+        ctypes.c_uint,
+        ctypes.c_uint,
+    ]
+    xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+    xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_ulong,
+        ctypes.POINTER(XImage),
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_ulong,
+    ]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    return xlib, xext, libc
+
+
+def get_frame_bytes(frame, frame_bytes=None):
+    """Get a frame as rawvideo bytes: the buffer's own memoryview if its rows are unpadded, else a packed copy."""
+    if frame_bytes is not None:
+        return frame_bytes
+    return np.ascontiguousarray(frame).data
+
+
+def get_frame_views(buffer, width, height, bytes_per_line):
+    """
+    Build zero-copy views of a BGRX image buffer, whose rows may be padded.
+
+    Args:
+        buffer: Writable buffer of height * bytes_per_line bytes
+        width, height (int): Image size in pixels
+        bytes_per_line (int): Length of each row in the buffer, padding included
+
+    Returns:
+        tuple: ((height, width, 4) numpy.ndarray, memoryview of the whole buffer, or None if rows are padded)
+    """
+    rows = np.frombuffer(buffer, dtype=np.uint8).reshape(height, bytes_per_line)
+    frame = rows[:, : width * 4].reshape(height, width, 4)
+    frame_bytes = memoryview(buffer) if bytes_per_line == width * 4 else None
+    return frame, frame_bytes
+
+
+class X11ShmGrabber:
+    """Grabs a screen region into a reused shared memory buffer."""
+
+    def __init__(self, region=None, display_name=None):
+        """
+        Open the display and allocate the shared memory image.
+
+        Args:
+            region (tuple): (x, y, w, h) to capture, or None for the full screen
+            display_name (str): X display, defaults to $DISPLAY
+
+        Raises:
+            RuntimeError: If the display can't be opened or has no MIT-SHM support
+        """
+        self._xlib, self._xext, self._libc = _load_libraries()
+        self._display = None
+        self._image = None
+        self._shminfo = XShmSegmentInfo()
+        self._shmid = -1  # Until the segment is marked for removal
+        self._attached = False
+
+        try:
+            self._open(region, display_name)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, region, display_name):
+        display_name = display_name or os.environ.get("DISPLAY", ":0")
+        self._display = self._xlib.XOpenDisplay(display_name.encode())
+        if not self._display:
+            raise RuntimeError(f"Cannot open X display {display_name}")
+        if not self._xext.XShmQueryExtension(self._display):
+            raise RuntimeError("X server does not support the MIT-SHM extension")
+
+        screen = self._xlib.XDefaultScreen(self._display)
+        self._root = self._xlib.XRootWindow(self._display, screen)
+        if region:
+            self.x, self.y, self.width, self.height = region
+        else:
+            self.x, self.y = 0, 0
+            self.width = self._xlib.XDisplayWidth(self._display, screen)
+            self.height = self._xlib.XDisplayHeight(self._display, screen)
+
+        self._image = self._xext.XShmCreateImage(
+            self._display,
+            self._xlib.XDefaultVisual(self._display, screen),
+            self._xlib.XDefaultDepth(self._display, screen),
+            ZPIXMAP,
+            None,
+            ctypes.byref(self._shminfo),
+            self.width,
+            self.height,
+        )
+        if not self._image:
+            self._image = None
+            raise RuntimeError("XShmCreateImage failed")
+
+        image = self._image.contents
+        if image.bits_per_pixel != 32:
+            raise RuntimeError(f"Unsupported X visual: {image.bits_per_pixel} bits per pixel")
+
+        size = image.bytes_per_line * image.height
+        self._shmid = self._libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self._shmid < 0:
+            raise RuntimeError(f"shmget failed: {os.strerror(ctypes.get_errno())}")
+        self._shminfo.shmid = self._shmid
+        address = self._libc.shmat(self._shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            raise RuntimeError(f"shmat failed: {os.strerror(ctypes.get_errno())}")
+        self._shminfo.shmaddr = address
+        image.data = address
+        self._attach()
+
+        # Freed automatically once both this process and the X server detach
+        self._libc.shmctl(self._shmid, IPC_RMID, None)
+        self._shmid = -1
+
+        buffer = (ctypes.c_ubyte * size).from_address(address)
+        self.frame, self.frame_bytes = get_frame_views(buffer, self.width, self.height, image.bytes_per_line)
+
+    def _attach(self):
+        """
+        Attach the X server to the shared memory segment.
+
+        The server reports a failed attach (e.g. when it runs on another host) as
+        an X error, which Xlib's default handler answers by exiting the process,
+        so a handler recording it is installed until the attach has been processed.
+
+        Raises:
+            RuntimeError: If the server could not attach
+        """
+        errors = []
+
+        def on_error(display, event):
+            errors.append(event)
+            return 0
+
+        handler = X_ERROR_HANDLER(on_error)
+        previous = self._xlib.XSetErrorHandler(ctypes.cast(handler, ctypes.c_void_p))
+        try:
+            attached = self._xext.XShmAttach(self._display, ctypes.byref(self._shminfo))
+            self._xlib.XSync(self._display, 0)
+        finally:
+            self._xlib.XSetErrorHandler(previous)
+
+        if not attached or errors:
+            raise RuntimeError("XShmAttach failed: the X server can't use this process's shared memory")
+        self._attached = True
+
+    def grab(self):
+        """
+        Grab the region into the shared buffer.
+
+        Returns:
+            numpy.ndarray: (height, width, 4) BGRX view of the buffer. It is
+            overwritten by the next grab, so copy it to keep a frame.
+        """
+        self._xext.XShmGetImage(self._display, self._root, self._image, self.x, self.y, ALL_PLANES)
+        return self.frame
+
+    def get_frame_bytes(self):
+        """Get the current frame as a bytes-like object, without copying when rows are unpadded."""
+        return get_frame_bytes(self.frame, self.frame_bytes)
+
+    def close(self):
+        """Release whatever was set up, which may be only part of it if opening failed."""
+        if self._attached:
+            self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._xlib.XSync(self._display, 0)
+            self._attached = False
+        if self._image:
+            # The data lives in shared memory, detached below, so Xlib must only free the struct
+            self._image.contents.data = None
+            self._xlib.XDestroyImage(self._image)
+            self._image = None
+        if self._shminfo.shmaddr:
+            self._libc.shmdt(self._shminfo.shmaddr)
+            self._shminfo.shmaddr = None
+        if self._shmid >= 0:
+            self._libc.shmctl(self._shmid, IPC_RMID, None)
+            self._shmid = -1
+        if self._display:
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+
+class ShmFrameWriter:
+    """
+    Grabs frames at a fixed rate and writes them as rawvideo to FFmpeg's stdin.
+
+    If a grab is late, the previous frame is written again for each missed
+    slot, so FFmpeg's frame-counted timestamps stay in step with wall time.
+    """
+
+    def __init__(self, grabber, framerate, stream):
+        self.grabber = grabber
+        self.framerate = framerate
+        self.stream = stream
+        self.frame_listeners = []  # Called with (frame, timestamp) on the writer thread
+        self.frames_written = 0
+        self.frames_repeated = 0
+        self.last_timestamp = None  # time.monotonic() of the newest frame
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_frame_listener(self, callback):
+        """Analyse frames as they are captured, without a second grab."""
+        self.frame_listeners.append(callback)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop writing frames and wait for the writer thread to finish."""
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        interval = 1 / self.framerate
+        start = time.monotonic()
+        next_index = 0
+
+        try:
+            while not self._stop_event.is_set():
+                frame = self.grabber.grab()
+                timestamp = time.monotonic()
+                self.last_timestamp = timestamp
+                for listener in self.frame_listeners:
+                    listener(frame, timestamp)
+
+                # Fill any slots missed while we were late, then this one
+                due_index = int((timestamp - start) / interval)
+                data = self.grabber.get_frame_bytes()
+                slots = max(1, due_index - next_index + 1)
+                for _ in range(slots):
+                    self.stream.write(data)
+                next_index += slots
+                self.frames_written += slots
+                self.frames_repeated += slots - 1
+
+                next_time = start + next_index * interval
+                self._stop_event.wait(max(0.0, next_time - time.monotonic()))
+        except (BrokenPipeError, OSError, ValueError):
+            pass  # FFmpeg exited
+        finally:
+            self.grabber.close()
+            try:
+                self.stream.close()
+            except OSError:
+                pass
+
+
+def build_rawvideo_input_args(width, height, framerate):
+    """FFmpeg input arguments for frames written by ShmFrameWriter to stdin."""
+    return [
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        PIXEL_FORMAT,
+        "-video_size",
+        f"{width}x{height}",
+        "-framerate",
+        str(framerate),
+        "-i",
+        "pipe:0",
+    ]
+
+
+def benchmark(ffmpeg_path="ffmpeg", region=None, framerate=30, seconds=5):
+    """
+    Compare CPU time per frame of MIT-SHM capture and FFmpeg's x11grab.
+
+    Both capture into FFmpeg's null muxer, so only capture and transport are measured.
+
+    Returns:
+        dict: {"x11shm": ms per frame, "x11grab": ms per frame}
+    """
+    import resource
+    import subprocess
+
+    def child_cpu():
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    frames = framerate * seconds
+    results = {}
+
+    # MIT-SHM: our own CPU time plus FFmpeg's for reading the rawvideo pipe
+    grabber = X11ShmGrabber(region)
+    cmd = [ffmpeg_path, "-hide_banner", "-nostats", "-loglevel", "error"]
+    cmd.extend(build_rawvideo_input_args(grabber.width, grabber.height, framerate))
+    cmd.extend(["-frames:v", str(frames), "-f", "null", "-"])
+
+    cpu_start, child_start = time.process_time(), child_cpu()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    writer = ShmFrameWriter(grabber, framerate, process.stdin)
+    writer.start()
+    process.wait()
+    writer.stop()
+    cpu = (time.process_time() - cpu_start) + (child_cpu() - child_start)
+    results["x11shm"] = cpu / frames * 1000
+
+    # x11grab: all the work happens in FFmpeg
+    display = os.environ.get("DISPLAY", ":0")
+    cmd = [ffmpeg_path, "-hide_banner", "-nostats", "-loglevel", "error", "-f", "x11grab"]
+    cmd.extend(["-framerate", str(framerate)])
+    if region:
+        x, y, w, h = region
+        cmd.extend(["-video_size", f"{w}x{h}", "-i", f"{display}+{x},{y}"])
+    else:
+        cmd.extend(["-i", display])
+    cmd.extend(["-frames:v", str(frames), "-f", "null", "-"])
+
+    child_start = child_cpu()
+    subprocess.run(cmd)
+    results["x11grab"] = (child_cpu() - child_start) / frames * 1000
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    ffmpeg = sys.argv[1] if len(sys.argv) > 1 else "ffmpeg"
+    for backend, ms_per_frame in benchmark(ffmpeg).items():
+        print(f"{backend}: {ms_per_frame:.3f} ms CPU per frame")
@@ -0,0 +1,199 @@
+"""
+Spool storage for recordings and editor outputs.
+
+All temporary video files (recording segments, finalized recordings, editor
+trim/resize results) are written to one spool directory, which provides:
+- A configurable location, including RAM-backed tmpfs
+- A preflight check of free space and write speed against the expected bitrate.
+  The write speed is measured once per run on a worker thread (at startup or
+  arm time), never on the Tk thread when Record is pressed
+- Live monitoring of the recording's write rate and the remaining free space
+- Hard size and duration caps, so a recording stops cleanly instead of filling the disk
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from . import config
+
+RAM_DISK_DIR = "/dev/shm"
+
+# Rough x264 output for screen content, in bits per pixel per frame
+BITS_PER_PIXEL = 0.1
+LOSSLESS_BITS_PER_PIXEL = 2.0
+
+MIN_FREE_SECONDS = 60  # Refuse to start with room for less than this much recording
+LOW_SPACE_SECONDS = 20  # Stop a recording with room for less than this much left
+SPEED_TEST_BYTES = 8 * 1024 * 1024
+
+_write_speeds = {}  # Spool directory -> measured bytes per second (None if untestable), tested once per run
+_write_speeds_lock = threading.Lock()
+
+
+def get_ram_dir():
+    """Get the RAM-backed tmpfs directory, or None if there is none."""
+    if os.path.isdir(RAM_DISK_DIR) and os.access(RAM_DISK_DIR, os.W_OK):
+        return RAM_DISK_DIR
+    return None
+
+
+def get_spool_dir():
+    """Get the directory for temporary video files, creating it if needed."""
+    spool_dir = config.get_spool_dir()
+    if spool_dir == config.SPOOL_RAM:
+        spool_dir = get_ram_dir()
+    if spool_dir:
+        try:
+            os.makedirs(spool_dir, exist_ok=True)
+            return spool_dir
+        except OSError as e:
+            print(f"Spool directory {spool_dir} is unusable, using the temp dir: {e}")
+    return tempfile.gettempdir()
+
+
+def create_temp_file(suffix):
+    """
+    Create an empty temporary file in the spool.
+
+    Returns:
+        str: Path to the file (caller deletes it)
+    """
+    temp_fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=get_spool_dir())
+    os.close(temp_fd)
+    return temp_path
+
+
+def estimate_bitrate(region, framerate, lossless=False):
+    """
+    Estimate how fast a recording of a region fills the spool.
+
+    Args:
+        region (tuple): (x, y, w, h), or None for the full screen (assumed 1920x1080)
+        framerate (int): Capture frame rate
+        lossless (bool): True for a lossless two-stage capture
+
+    Returns:
+        float: Expected bytes per second
+    """
+    _, _, w, h = region or (0, 0, 1920, 1080)
+    bits_per_pixel = LOSSLESS_BITS_PER_PIXEL if lossless else BITS_PER_PIXEL
+    return w * h * framerate * bits_per_pixel / 8
+
+
+def measure_write_speed(spool_dir):
+    """
+    Time a short synced write to the spool.
+
+    Returns:
+        float: Bytes per second, or None if the test could not be run
+    """
+    temp_fd, temp_path = tempfile.mkstemp(suffix=".speedtest", dir=spool_dir)
+    try:
+        data = os.urandom(SPEED_TEST_BYTES)
+        start_time = time.monotonic()
+        os.write(temp_fd, data)
+        os.fsync(temp_fd)
+        elapsed = time.monotonic() - start_time
+        return SPEED_TEST_BYTES / elapsed if elapsed > 0 else None
+    except OSError:
+        return None
+    finally:
+        os.close(temp_fd)
+        os.unlink(temp_path)
+
+
+def measure_write_speed_in_background(spool_dir=None):
+    """Measure the spool's write speed on a worker thread for preflight(), unless it's measured or being measured."""
+    spool_dir = spool_dir or get_spool_dir()
+    with _write_speeds_lock:
+        if spool_dir in _write_speeds:
+            return
+        _write_speeds[spool_dir] = None  # Until measured
+
+    def measure():
+        write_speed = measure_write_speed(spool_dir)
+        with _write_speeds_lock:
+            _write_speeds[spool_dir] = write_speed
+
+    threading.Thread(target=measure, daemon=True).start()
+
+
+def preflight(region, framerate, lossless=False):
+    """
+    Check that the spool can hold a recording, before it starts.
+
+    Raises:
+        RuntimeError: If there is room for less than MIN_FREE_SECONDS of recording
+
+    Returns:
+        dict: {"spool_dir", "free_bytes", "bitrate", "free_seconds", "write_speed"},
+        write_speed being None until measured
+    """
+    spool_dir = get_spool_dir()
+    free_bytes = shutil.disk_usage(spool_dir).free
+    bitrate = estimate_bitrate(region, framerate, lossless)
+    free_seconds = free_bytes / bitrate
+
+    if free_seconds < MIN_FREE_SECONDS:
+        raise RuntimeError(
+            f"Not enough free space in {spool_dir}: {free_bytes // (1024 * 1024)} MB, "
+            f"room for about {free_seconds:.0f}s of recording"
+        )
+
+    # Only ever the cached result: measuring here would freeze the Tk thread
+    measure_write_speed_in_background(spool_dir)
+    with _write_speeds_lock:
+        write_speed = _write_speeds[spool_dir]
+    if write_speed is not None and write_speed < bitrate * 2:
+        print(f"Warning: {spool_dir} writes at {write_speed / 1e6:.1f} MB/s, recording may fall behind")
+
+    print(f"Spool {spool_dir}: room for about {free_seconds / 60:.0f} minutes of recording")
+    return {
+        "spool_dir": spool_dir,
+        "free_bytes": free_bytes,
+        "bitrate": bitrate,
+        "free_seconds": free_seconds,
+        "write_speed": write_speed,
+    }
+
+
+class SpoolMonitor:
+    """Watches a recording's writes to the spool and enforces the recording caps."""
+
+    def __init__(self, spool_dir):
+        self.spool_dir = spool_dir
+        self.max_bytes, self.max_seconds = config.get_recording_caps()
+        self.write_rate = None  # Bytes per second, averaged over the last few seconds
+
+        self._samples = []  # (time.monotonic(), total bytes written)
+
+    def check(self, total_size, duration):
+        """
+        Check a recording's progress against the caps and the free space.
+
+        Args:
+            total_size (int): Bytes written by the recording so far
+            duration (float): Length of the recording so far, in seconds
+
+        Returns:
+            str: Why the recording must stop, or None to continue
+        """
+        now = time.monotonic()
+        self._samples = [(t, size) for t, size in self._samples if now - t <= 5] + [(now, total_size)]
+        (first_time, first_size), (last_time, last_size) = self._samples[0], self._samples[-1]
+        if last_time > first_time:
+            self.write_rate = (last_size - first_size) / (last_time - first_time)
+
+        if self.max_bytes and total_size >= self.max_bytes:
+            return f"size cap of {self.max_bytes // (1024 * 1024)} MB reached"
+        if self.max_seconds and duration >= self.max_seconds:
+            return f"duration cap of {self.max_seconds}s reached"
+
+        if self.write_rate:
+            free_bytes = shutil.disk_usage(self.spool_dir).free
+            if free_bytes / self.write_rate < LOW_SPACE_SECONDS:
+                return f"{self.spool_dir} is almost full"
+        return None
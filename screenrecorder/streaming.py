@@ -0,0 +1,173 @@
+"""
+Live streaming of the recording region to a URL.
+
+MPEG-TS over UDP or SRT, or FLV over RTMP, usually to a relay on the local
+machine. Streams are encoded with the "low-latency" encoder profile
+(zerolatency tune, one second GOP), with muxer buffering turned off. The same
+encode can also be written to a local file through FFmpeg's tee muxer, so
+saving a copy costs no extra encoding. The local copy is MPEG-TS while
+streaming, so it survives a crash, and is remuxed into an MP4 when the
+stream stops.
+
+Run `python -m screenrecorder.streaming [ffmpeg] [port]` to measure the
+latency from a frame entering the encoder to it being decoded by a local
+receiver.
+"""
+
+import time
+
+from .commands import build_capture_input_args
+from .profiles import build_profile_args, get_profile
+from .redaction import build_redaction_args
+
+STREAM_PROFILE = "low-latency"
+
+# Muxer formats by URL scheme
+STREAM_FORMATS = {"udp": "mpegts", "srt": "mpegts", "rtmp": "flv", "rtmps": "flv"}
+
+# No muxing delay or buffering: every packet goes out as soon as it is encoded
+LOW_LATENCY_MUXER_ARGS = ["-muxdelay", "0", "-muxpreload", "0", "-flush_packets", "1"]
+
+
+def get_stream_format(url):
+    """
+    Get the muxer format for a stream URL.
+
+    Raises:
+        ValueError: If the URL's scheme is not supported
+    """
+    scheme = url.split("://", 1)[0].lower()
+    if scheme not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported stream URL '{url}', use udp://, srt:// or rtmp://")
+    return STREAM_FORMATS[scheme]
+
+
+def build_stream_command(ffmpeg_path, region, framerate, url, local_path=None, masks=None, input_args=None):
+    """
+    Build the FFmpeg command that streams the screen to a URL.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        region (tuple): (x, y, w, h) to capture, or None for the full screen
+        framerate (int): Capture frame rate
+        url (str): udp://, srt:// or rtmp:// URL to stream to
+        local_path (str): Optional MPEG-TS file to write the same encode to
+        masks (list): Redaction masks to hide, from redaction.get_masks()
+        input_args (list): Input arguments, defaults to grabbing the screen
+    """
+    stream_format = get_stream_format(url)
+    cmd = [ffmpeg_path, "-y"]
+    cmd.extend(input_args or build_capture_input_args(region, framerate))
+    redaction_args = build_redaction_args(masks)
+    cmd.extend(redaction_args)
+    cmd.extend(build_profile_args(get_profile(STREAM_PROFILE)))
+    cmd.extend(LOW_LATENCY_MUXER_ARGS)
+
+    if not local_path:
+        cmd.extend(["-f", stream_format, url])
+        return cmd
+
+    # One encode, two outputs. A receiver going away must not end the local copy.
+    local_options = "f=mpegts"
+    if stream_format == "flv":
+        # The tee muxer can't ask the encoder for the global header FLV needs, so ask for it here.
+        # MPEG-TS needs the headers in the stream instead, so copy them in front of each keyframe.
+        cmd.extend(["-flags", "+global_header"])
+        local_options += ":bsfs/v=dump_extra"
+    local_path = local_path.replace("\\", "/")
+    outputs = f"[f={stream_format}:onfail=ignore]{url}|[{local_options}]{local_path}"
+    if not redaction_args:
+        cmd.extend(["-map", "0:v"])
+    cmd.extend(["-f", "tee", outputs])
+    return cmd
+
+
+def measure_latency(ffmpeg_path="ffmpeg", port=23000, seconds=10, framerate=30):
+    """
+    Measure the latency of a UDP stream against a local receiver.
+
+    The stream's input is black frames with a white frame once a second. The
+    receiver is a second FFmpeg listening on localhost, decoding to tiny raw
+    frames on its stdout. The latency is the time from writing a white frame
+    into the encoder to the receiver decoding it.
+
+    Returns:
+        dict: {"samples", "min_ms", "avg_ms", "max_ms"}
+    """
+    import subprocess
+    import threading
+
+    w, h = 640, 360
+    url = f"udp://127.0.0.1:{port}?pkt_size=1316"
+    black, white = bytes(w * h), b"\xff" * (w * h)
+    sent_at = []  # time.monotonic() of each white frame written
+    latencies = []
+
+    receiver_cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-fflags", "nobuffer", "-flags", "low_delay"]
+    receiver_cmd.extend(["-probesize", "32", "-analyzeduration", "0", "-i", url])
+    receiver_cmd.extend(["-vf", "scale=16:16,format=gray", "-f", "rawvideo", "-"])
+    receiver = subprocess.Popen(receiver_cmd, stdout=subprocess.PIPE)
+
+    def receive():
+        was_white = False
+        while True:
+            frame = receiver.stdout.read(256)
+            if len(frame) < 256:
+                return
+            is_white = sum(frame) / len(frame) > 128
+            if is_white and not was_white and sent_at:
+                # White frames are a second apart, so this is the newest one sent
+                latencies.append(time.monotonic() - sent_at[-1])
+            was_white = is_white
+
+    receive_thread = threading.Thread(target=receive, daemon=True)
+    receive_thread.start()
+    time.sleep(0.5)  # Let the receiver bind its port
+
+    input_args = ["-f", "rawvideo", "-pix_fmt", "gray", "-video_size", f"{w}x{h}"]
+    input_args.extend(["-framerate", str(framerate), "-i", "-"])
+    sender_cmd = build_stream_command(ffmpeg_path, None, framerate, url, input_args=input_args)
+    sender_cmd[1:1] = ["-hide_banner", "-loglevel", "error"]
+    sender = subprocess.Popen(sender_cmd, stdin=subprocess.PIPE)
+
+    started_at = time.monotonic()
+    for index in range(seconds * framerate):
+        delay = started_at + index / framerate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        # White for the middle frame of each second, skipping the first second while the stream starts
+        is_white = index >= framerate and index % framerate == framerate // 2
+        if is_white:
+            sent_at.append(time.monotonic())
+        sender.stdin.write(white if is_white else black)
+        sender.stdin.flush()
+
+    sender.stdin.close()
+    sender.wait()
+    time.sleep(1)
+    receiver.terminate()
+    receive_thread.join()
+
+    if not latencies:
+        return {"samples": 0, "min_ms": None, "avg_ms": None, "max_ms": None}
+    return {
+        "samples": len(latencies),
+        "min_ms": min(latencies) * 1000,
+        "avg_ms": sum(latencies) / len(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    ffmpeg = sys.argv[1] if len(sys.argv) > 1 else "ffmpeg"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 23000
+    result = measure_latency(ffmpeg, port)
+    if result["samples"]:
+        print(
+            f"{result['samples']} samples: latency {result['min_ms']:.0f} ms min, "
+            f"{result['avg_ms']:.0f} ms avg, {result['max_ms']:.0f} ms max"
+        )
+    else:
+        print("The receiver decoded no frames")
@@ -0,0 +1,195 @@
+"""
+Live FFmpeg progress telemetry and stall watchdog for recordings.
+
+FFmpeg is run with `-progress pipe:1`, which writes blocks of key=value lines
+to stdout. This module provides:
+- RecordingStats, parsed from those blocks (frames, fps, dup/drop, speed...)
+- The size and bitrate of the output, measured on disk: the segment muxer
+  writes its own files, so FFmpeg reports N/A for both
+- A bounded ring of recent stderr lines, for diagnosing failures
+- A watchdog that raises a "stall" event when frames stop advancing
+- The cost of showing the live preview thumbnail (see preview.py)
+"""
+
+import collections
+import threading
+import time
+
+from tkinter_videoplayer.events import EventDispatcher
+
+STDERR_LINES = 50  # Recent stderr lines kept for diagnostics
+STALL_SECONDS = 5  # No new frames for this long counts as a stall
+WATCHDOG_INTERVAL = 1
+BITRATE_WINDOW_SECONDS = 5  # Recorded seconds the bitrate is averaged over
+
+
+def parse_number(value):
+    """Parse a progress value like "1.01x", "2048.0kbits/s" or "N/A"."""
+    value = value.strip().replace("kbits/s", "").rstrip("x")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RecordingStats:
+    """Snapshot of a recording's progress, totalled across all encoder parts."""
+
+    def __init__(self):
+        self.frame = 0
+        self.fps = 0.0
+        self.dup_frames = 0
+        self.drop_frames = 0
+        self.bitrate = None  # kbit/s
+        self.total_size = 0  # bytes
+        self.speed = None  # Multiple of realtime
+        self.out_time = 0.0  # seconds
+        self.stalled = False
+        self.updated_at = None  # time.monotonic() of the last update
+        self.preview_frames = 0  # Live preview frames shown
+        self.preview_seconds = 0.0  # Total time spent loading them
+
+    def summary(self):
+        """One-line, human-readable summary."""
+        speed = f"{self.speed:.2f}x" if self.speed is not None else "n/a"
+        summary = (
+            f"frames={self.frame} dropped={self.drop_frames} duplicated={self.dup_frames} "
+            f"fps={self.fps:.1f} speed={speed} time={self.out_time:.1f}s"
+        )
+        if self.preview_frames:
+            load_ms = self.preview_seconds / self.preview_frames * 1000
+            summary += f" preview={self.preview_frames} frames ({load_ms:.1f} ms each)"
+        return summary
+
+
+class RecordingTelemetry(EventDispatcher):
+    """
+    Collects progress from the FFmpeg processes of one recording session.
+
+    Events (dispatched on reader/watchdog threads):
+        update: stats (RecordingStats)
+        stall: stats (RecordingStats)
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.stats = RecordingStats()
+        self.stderr_lines = collections.deque(maxlen=STDERR_LINES)
+
+        self._part = 0
+        self._base = RecordingStats()  # Totals of the encoder parts that have finished
+        self._last_frame_change = time.monotonic()
+        self._watchdog_stop = None
+        self._size_samples = []  # (out_time, total_size) of recent set_output_size() calls
+
+    def begin_part(self):
+        """
+        Start counting a new FFmpeg process, keeping the totals of the previous ones.
+
+        Returns:
+            int: Token to pass to read_progress() for the new process
+        """
+        self._base.frame = self.stats.frame
+        self._base.dup_frames = self.stats.dup_frames
+        self._base.drop_frames = self.stats.drop_frames
+        self._base.out_time = self.stats.out_time
+        self._last_frame_change = time.monotonic()
+        self._part += 1
+        return self._part
+
+    def read_progress(self, stream, part, on_update=None):
+        """
+        Parse `-progress` output from a stream until it closes.
+
+        Args:
+            stream: FFmpeg's stdout, opened in text mode
+            part (int): Token from begin_part(). Output of older parts is ignored.
+            on_update: Optional callback, called with the stats after each block
+        """
+        block = {}
+        for line in stream:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+
+            block[key] = value
+            if key == "progress":
+                if part == self._part:
+                    self._commit_block(block)
+                    if on_update:
+                        on_update(self.stats)
+                block = {}
+
+    def set_output_size(self, total_size):
+        """
+        Record how many bytes the outputs take on disk, and derive the bitrate from it.
+
+        Args:
+            total_size (int): Bytes of all the session's segments
+        """
+        stats = self.stats
+        samples = [(t, size) for t, size in self._size_samples if stats.out_time - t <= BITRATE_WINDOW_SECONDS]
+        if samples and total_size < samples[-1][1]:
+            samples = []  # Older segments were deleted (pre-roll pruning), so start over
+        self._size_samples = samples + [(stats.out_time, total_size)]
+
+        (first_time, first_size), (last_time, last_size) = self._size_samples[0], self._size_samples[-1]
+        stats.total_size = total_size
+        if last_time > first_time:
+            stats.bitrate = (last_size - first_size) * 8 / 1000 / (last_time - first_time)
+
+    def add_preview_frame(self, load_seconds):
+        """Count a live preview frame shown, and the time it took to load."""
+        self.stats.preview_frames += 1
+        self.stats.preview_seconds += load_seconds
+
+    def read_stderr(self, stream, on_line=None):
+        """Keep the recent lines of FFmpeg's stderr, optionally inspecting each one."""
+        for line in stream:
+            line = line.rstrip()
+            self.stderr_lines.append(line)
+            if on_line:
+                on_line(line)
+
+    def _commit_block(self, block):
+        stats = self.stats
+
+        frame = int(parse_number(block.get("frame", "")) or 0) + self._base.frame
+        if frame != stats.frame:
+            self._last_frame_change = time.monotonic()
+            stats.stalled = False
+
+        stats.frame = frame
+        stats.fps = parse_number(block.get("fps", "")) or 0.0
+        stats.dup_frames = int(parse_number(block.get("dup_frames", "")) or 0) + self._base.dup_frames
+        stats.drop_frames = int(parse_number(block.get("drop_frames", "")) or 0) + self._base.drop_frames
+        stats.speed = parse_number(block.get("speed", ""))
+        out_time_us = parse_number(block.get("out_time_us", ""))
+        if out_time_us is not None and out_time_us >= 0:
+            stats.out_time = out_time_us / 1_000_000 + self._base.out_time
+        stats.updated_at = time.monotonic()
+
+        self.dispatch_event("update", stats=stats)
+
+    def start_watchdog(self):
+        """Start watching for frames to stop advancing."""
+        self.stop_watchdog()
+        self._last_frame_change = time.monotonic()
+        self._watchdog_stop = threading.Event()
+        threading.Thread(target=self._watch, args=(self._watchdog_stop,), daemon=True).start()
+
+    def stop_watchdog(self):
+        if self._watchdog_stop:
+            self._watchdog_stop.set()
+            self._watchdog_stop = None
+
+    def _watch(self, stop_event):
+        while not stop_event.wait(WATCHDOG_INTERVAL):
+            stalled_for = time.monotonic() - self._last_frame_change
+            if stalled_for >= STALL_SECONDS and not self.stats.stalled:
+                self.stats.stalled = True
+                print(f"Recording stalled: no new frames for {stalled_for:.0f}s")
+                for line in list(self.stderr_lines)[-5:]:
+                    print(f"  ffmpeg: {line}")
+                self.dispatch_event("stall", stats=self.stats)
@@ -65,9 +65,16 @@ TEXTBOX_HIGHLIGHT_COLOR = COLOR_PRIMARY
 # Icon Styling
 RECORD_ICON_COLOR = COLOR_SECONDARY  # Red for recording
 STOP_ICON_COLOR = COLOR_SECONDARY  # Red for stop
+PAUSE_ICON_COLOR = COLOR_FG  # White for pause/resume
+SCREENSHOT_ICON_COLOR = COLOR_FG  # White for screenshot
 REGION_ICON_COLOR = COLOR_PRIMARY  # Blue for region selection
 ICON_SIZE = 18
 
+# Redaction Mask Styling
+MASK_OUTLINE_COLOR = COLOR_SECONDARY  # Red outline around each mask
+MASK_BOX_FILL = "#000000"  # Black for box masks
+MASK_BLUR_FILL = "#606060"  # Gray for blur masks
+
 # Toast styling
 TOAST_BG = COLOR_BG
 TOAST_FG = COLOR_FG
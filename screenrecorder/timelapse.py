@@ -0,0 +1,137 @@
+"""
+Timelapse capture: one frame every few seconds, for hours.
+
+Each frame is grabbed as a single screenshot, so no capture process runs
+between grabs. Frames are written straight into the stdin of one low-priority
+FFmpeg encoder (a background job, see scheduling.py), which sleeps in a blocking read until the next frame arrives.
+The encoder writes MPEG-TS segments into a regular session directory, so
+memory use stays flat however long the timelapse runs, and a timelapse
+interrupted by a crash is recovered like any other recording.
+
+Frames play back at TIMELAPSE_FRAMERATE: a frame every 5 seconds for 8 hours
+makes a 3 minute video.
+"""
+
+import subprocess
+import threading
+import time
+
+from PIL import Image, ImageGrab
+
+from . import scheduling
+from . import segments
+from .profiles import build_profile_args, get_profile
+from .redaction import get_masks, redact_image
+
+TIMELAPSE_FRAMERATE = 30
+SEGMENT_FRAMES = 300  # Frames per segment, so a crash loses at most this many grabs
+
+
+def grab_frame(region):
+    """Grab one RGB frame of a region, or of the full screen if region is None."""
+    bbox = None
+    if region:
+        x, y, w, h = region
+        bbox = (x, y, x + w, y + h)
+    return ImageGrab.grab(bbox=bbox, all_screens=True).convert("RGB")
+
+
+def build_timelapse_command(ffmpeg_path, size, profile_name, session_dir):
+    """
+    Build the FFmpeg command that encodes raw frames from stdin into segments.
+
+    Args:
+        ffmpeg_path (str): Path to FFmpeg executable
+        size (tuple): (w, h) of the frames written to stdin
+        profile_name (str): Encoder profile to encode with
+        session_dir (str): Directory to write the segments to
+    """
+    w, h = size
+    segment_seconds = SEGMENT_FRAMES / TIMELAPSE_FRAMERATE
+    cmd = [ffmpeg_path, "-y", "-f", "rawvideo", "-pix_fmt", "rgb24", "-video_size", f"{w}x{h}"]
+    cmd.extend(["-framerate", str(TIMELAPSE_FRAMERATE), "-i", "-"])
+    # 4:2:0 chroma needs even dimensions
+    cmd.extend(["-vf", "crop=trunc(iw/2)*2:trunc(ih/2)*2"])
+    cmd.extend(build_profile_args(get_profile(profile_name)))
+    cmd.extend(
+        [
+            "-force_key_frames",
+            f"expr:gte(t,n_forced*{segment_seconds})",
+            "-f",
+            "segment",
+            "-segment_time",
+            str(segment_seconds),
+            "-segment_format",
+            "mpegts",
+            segments.get_segment_pattern(session_dir, 0),
+        ]
+    )
+    return cmd
+
+
+class TimelapseCapture:
+    """Grabs a region every `interval` seconds into a new session directory until stopped."""
+
+    def __init__(self, ffmpeg_path, region, interval, profile_name=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.region = region
+        self.interval = interval
+        self.profile_name = profile_name
+        self.masks = get_masks(region)
+        self.session_dir = segments.create_session_dir()
+        self.frames = 0
+
+        self._process = None
+        self._size = None  # Frame size fixed by the first grab
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop grabbing and wait for the encoder to finish writing its segments."""
+        self._stop_event.set()
+        self._thread.join()
+        if self._process:
+            self._process.stdin.close()
+            self._process.wait()
+
+    def _run(self):
+        next_grab = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                image = grab_frame(self.region)
+                redact_image(image, self.masks)
+                self._write_frame(image)
+            except Exception as e:
+                print(f"Timelapse stopped: {e}")
+                return
+
+            # Skip grabs that are already late (e.g. after sleep), rather than bunching them up
+            next_grab += self.interval
+            now = time.monotonic()
+            if next_grab < now:
+                next_grab = now + self.interval
+            self._stop_event.wait(next_grab - now)
+
+    def _write_frame(self, image):
+        if self._process is None:
+            self._size = image.size
+            cmd = build_timelapse_command(self.ffmpeg_path, self._size, self.profile_name, self.session_dir)
+            # Asleep nearly all the time, so it runs as a background job without taking a job slot for hours
+            self._process = subprocess.Popen(
+                scheduling.wrap_command(cmd, scheduling.JOB_BACKGROUND),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **scheduling.get_popen_args(scheduling.JOB_BACKGROUND),
+            )
+            scheduling.apply_policy(self._process, scheduling.JOB_BACKGROUND)
+        elif image.size != self._size:
+            # The screen resolution changed, but the video's frame size can't
+            image = image.resize(self._size, Image.BILINEAR)
+
+        self._process.stdin.write(image.tobytes())
+        self._process.stdin.flush()
+        self.frames += 1
@@ -0,0 +1,204 @@
+"""
+Two-stage capture: cheap lossless capture, compact H.264 transcode after stop.
+
+Capturing with x264's ultrafast preset at qp 0 costs a fraction of the CPU of a
+regular encode, so the recorded app isn't slowed down. After recording stops,
+a background job (see scheduling.py) transcodes the capture into the same compact
+H.264 that a regular recording produces. Recordings with ROI encoding (see
+roi.py) are transcoded piece by piece, each piece with its own cursor ROI.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from tkinter_videoplayer.events import EventDispatcher
+
+from . import ranges
+from . import scheduling
+from . import spool
+from .profiles import build_profile_args, get_profile
+from .roi import get_roi_filter
+from .segments import join_segments
+
+# Near-zero-cost capture encoding (lossless, so the transcode loses nothing extra)
+CAPTURE_SETTINGS = {"preset": "ultrafast", "threads": 0, "qp": 0}
+
+DURATION_PATTERN = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+TIME_PATTERN = re.compile(r"time=\s*(\d+):(\d+):([\d.]+)")
+
+
+def parse_timestamp(pattern, line):
+    """
+    Extract an HH:MM:SS.ss timestamp from an FFmpeg output line.
+
+    Returns:
+        float: Time in seconds, or None if the line has none
+    """
+    match = pattern.search(line)
+    if match:
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return None
+
+
+def get_keyframe_args(times):
+    """FFmpeg output arguments forcing keyframes at the given times in seconds, if any."""
+    if not times:
+        return []
+    return ["-force_key_frames", ",".join(f"{time:.3f}" for time in times)]
+
+
+class TranscodeJob(EventDispatcher):
+    """
+    Background transcode of a two-stage capture into the final video.
+
+    Events (dispatched on the job's worker thread):
+        progress: fraction (0.0 to 1.0)
+        done: output_path (None if the transcode failed)
+    """
+
+    def __init__(self, ffmpeg_path, input_path, profile_name=None, roi_intervals=None):
+        super().__init__()
+
+        self.ffmpeg_path = ffmpeg_path
+        self.input_path = input_path
+        self.profile_name = profile_name
+        self.roi_intervals = roi_intervals  # From roi.build_roi_intervals(), to encode with a cursor ROI
+        self.output_path = None
+        self.progress = 0.0
+        self.done = False
+        self._detached = False  # Nobody tracks the job any more, so it cleans up after itself
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def detach(self):
+        """
+        Stop tracking the job, e.g. when its editor closes.
+
+        The job then deletes the lossless capture itself once it's transcoded (or
+        right away, if it already is), since nobody else will pick up the output.
+        """
+        with self._lock:
+            self._detached = True
+            finished = self.done
+        if finished and self.output_path:
+            self._delete_input()
+
+    def _delete_input(self):
+        try:
+            os.unlink(self.input_path)
+        except OSError:
+            pass
+        ranges.delete_ranges(self.input_path)
+        print(f"Transcoded recording kept at: {self.output_path}")
+
+    def _run(self):
+        output_path = None
+        try:
+            output_path = spool.create_temp_file(".mp4")
+
+            # Marked ranges must still start on keyframes after the transcode
+            marked_ranges = ranges.read_ranges(self.input_path)
+            keyframes = sorted({time for marked_range in marked_ranges for time in marked_range})
+
+            if self.roi_intervals:
+                ok = self._encode_with_roi(output_path, keyframes)
+            else:
+                # Same encoding as a regular recording, so the file size is the same
+                cmd = [self.ffmpeg_path, "-y", "-i", self.input_path]
+                cmd.extend(build_profile_args(get_profile(self.profile_name)))
+                cmd.extend(get_keyframe_args(keyframes))
+                cmd.extend(["-movflags", "+faststart", output_path])
+                ok = self._run_ffmpeg(cmd)
+
+            if ok:
+                if marked_ranges:
+                    ranges.write_ranges(output_path, marked_ranges)
+                self.output_path = output_path
+                self.progress = 1.0
+                print(f"Transcoded recording saved to: {output_path}")
+        except Exception as e:
+            print(f"Transcode failed: {e}")
+        finally:
+            if output_path and not self.output_path:
+                try:
+                    os.unlink(output_path)
+                except OSError:
+                    pass
+            # Whatever happened, the editor waiting on the job must hear that it's over
+            self._finish()
+
+    def _finish(self):
+        """Mark the job done, and report it (or clean up after it, if detached)."""
+        with self._lock:
+            self.done = True
+            detached = self._detached
+        if detached:
+            if self.output_path:
+                self._delete_input()
+            return
+        self.dispatch_event("done", output_path=self.output_path)
+
+    def _encode_with_roi(self, output_path, keyframes):
+        """Encode each of the ROI intervals on its own, then join the pieces by stream copy."""
+        total = self.roi_intervals[-1][1] or 1.0
+        piece_dir = tempfile.mkdtemp(prefix="roi-", dir=spool.get_spool_dir())
+        try:
+            piece_paths = []
+            for index, (start, end, box) in enumerate(self.roi_intervals):
+                piece_path = os.path.join(piece_dir, f"piece{index:05d}.ts")
+                cmd = [self.ffmpeg_path, "-y", "-ss", f"{start:.3f}", "-i", self.input_path]
+                cmd.extend(["-t", f"{end - start:.3f}", "-an", "-vf", get_roi_filter(box)])
+                cmd.extend(build_profile_args(get_profile(self.profile_name)))
+                cmd.extend(get_keyframe_args([time - start for time in keyframes if start < time < end]))
+                cmd.extend(["-f", "mpegts", piece_path])
+                if not self._run_ffmpeg(cmd, start / total, (end - start) / total, end - start):
+                    return False
+                piece_paths.append(piece_path)
+
+            join_segments(self.ffmpeg_path, piece_paths, output_path)
+            return True
+        except RuntimeError as e:
+            print(f"Transcode failed: {e}")
+            return False
+        finally:
+            shutil.rmtree(piece_dir, ignore_errors=True)
+
+    def _run_ffmpeg(self, cmd, progress_start=0.0, progress_span=1.0, duration=None):
+        """
+        Run one FFmpeg encode at low priority, reporting its progress.
+
+        Args:
+            cmd (list): FFmpeg command
+            progress_start (float): Overall progress when this encode starts
+            progress_span (float): Share of the overall progress this encode covers
+            duration (float): Length of the encoded output, read from FFmpeg's output if not given
+
+        Returns:
+            bool: True if FFmpeg succeeded
+        """
+        stderr_tail = []
+        process = scheduling.popen(cmd, scheduling.JOB_BACKGROUND, stderr=subprocess.PIPE, text=True)
+
+        # Universal newlines split FFmpeg's carriage-return progress updates into lines
+        for line in process.stderr:
+            stderr_tail = (stderr_tail + [line])[-20:]
+            if duration is None:
+                duration = parse_timestamp(DURATION_PATTERN, line)
+
+            position = parse_timestamp(TIME_PATTERN, line)
+            if position is not None and duration:
+                fraction = min(1.0, position / duration)
+                self.progress = min(1.0, progress_start + fraction * progress_span)
+                self.dispatch_event("progress", fraction=self.progress)
+
+        if process.wait() != 0:
+            print(f"Transcode failed: {''.join(stderr_tail)}")
+            return False
+        return True
@@ -30,12 +30,43 @@ def create_tray_icon(overlay_app):
         """Open project homepage in default browser."""
         webbrowser.open("https://github.com/cmdr2/screenrecorder/")
 
+    def toggle_replay(icon, item):
+        """Start or stop the instant replay buffer."""
+        if overlay_app.recorder.replay_running:
+            overlay_app.recorder.stop_replay()
+        else:
+            overlay_app.recorder.start_replay()
+
+    def toggle_timelapse(icon, item):
+        """Start a timelapse, or stop it and open the result in the editor."""
+        if overlay_app.recorder.timelapse_running:
+            overlay_app.stop_timelapse()
+        else:
+            overlay_app.recorder.start_timelapse()
+
+    def toggle_stream(icon, item):
+        """Start a live stream, or stop it and open its local copy in the editor."""
+        if overlay_app.recorder.stream_running:
+            overlay_app.stop_stream()
+        else:
+            overlay_app.recorder.start_stream()
+
     # Create simple red square icon
     image = _create_tray_image()
 
     # Build context menu
     menu = pystray.Menu(
         pystray.MenuItem("Record (Alt+S)", lambda icon, item: overlay_app.show(), default=True),
+        pystray.MenuItem("Instant replay", toggle_replay, checked=lambda item: overlay_app.recorder.replay_running),
+        pystray.MenuItem(
+            "Save replay (Alt+R)",
+            lambda icon, item: overlay_app.save_replay(),
+            enabled=lambda item: overlay_app.recorder.replay_running,
+        ),
+        pystray.MenuItem("Screenshot", lambda icon, item: overlay_app.take_screenshot()),
+        pystray.MenuItem("Burst screenshots", lambda icon, item: overlay_app.take_screenshot(burst=True)),
+        pystray.MenuItem("Live stream", toggle_stream, checked=lambda item: overlay_app.recorder.stream_running),
+        pystray.MenuItem("Timelapse", toggle_timelapse, checked=lambda item: overlay_app.recorder.timelapse_running),
         pystray.MenuItem("About", open_project_homepage),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("Quit", quit_app),
@@ -4,12 +4,12 @@ Utility functions for screen recorder application.
 This module provides platform-specific utilities for:
 - Window transparency and click-through behavior
 - File operations (copying to clipboard)
-- FFmpeg executable location
+- FFmpeg executable location (see probe.py)
 """
 
 import platform
-import sys
-import os
+
+from .probe import get_ffmpeg_path  # Callers import it from here
 
 # Constants
 UNSUPPORTED_PLATFORM_ERROR = (
@@ -113,33 +113,3 @@ def _copy_files_to_clipboard_windows(file_paths):
         print("Copied to clipboard")
     finally:
         wc.CloseClipboard()
-
-
-def get_ffmpeg_path():
-    """
-    Locate FFmpeg executable in common installation locations.
-
-    Returns:
-        str: Path to FFmpeg executable
-
-    Raises:
-        FileNotFoundError: If FFmpeg executable is not found
-    """
-    exe_dir = os.path.dirname(sys.executable)
-    module_dir = os.path.dirname(os.path.dirname(__file__))
-
-    ffmpeg_candidates = [
-        os.path.join(exe_dir, "bin", "ffmpeg.exe"),
-        os.path.join(exe_dir, "bin", "ffmpeg"),
-        os.path.join(module_dir, "bin", "ffmpeg.exe"),
-        os.path.join(module_dir, "bin", "ffmpeg"),
-    ]
-
-    for candidate in ffmpeg_candidates:
-        if os.path.exists(candidate):
-            return candidate
-
-    raise FileNotFoundError(
-        "FFmpeg executable not found. Please ensure ffmpeg.exe is in the 'bin' "
-        "folder next to the application or module directory."
-    )
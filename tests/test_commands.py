@@ -0,0 +1,50 @@
+from screenrecorder import config
+from screenrecorder.commands import build_split_crop_graph, get_bounding_region
+
+
+def test_bounding_region():
+    assert get_bounding_region([(10, 20, 100, 50), (200, 0, 40, 40)]) == (10, 0, 230, 70)
+
+
+def test_split_crop_graph_crops_relative_to_origin():
+    graph = build_split_crop_graph((10, 20), [(10, 20, 100, 50), (110, 70, 40, 30)], ["fps=30"])
+    assert graph == (
+        "[0:v]split=2[in0][in1];"
+        "[in0]crop=100:50:0:0,fps=30[out0];"
+        "[in1]crop=40:30:100:50,fps=30[out1]"
+    )
+
+
+def test_split_crop_graph_evens_out_dimensions():
+    graph = build_split_crop_graph((0, 0), [(5, 5, 101, 51)], [])
+    assert graph == "[0:v]split=1[in0];[in0]crop=100:50:5:5[out0]"
+
+
+def test_split_crop_graph_uncropped_output():
+    assert build_split_crop_graph((0, 0), [None], []) == "[0:v]split=1[in0];[in0]null[out0]"
+
+
+def test_split_crop_graph_preview_and_idle_branches_follow_the_first_region():
+    graph = build_split_crop_graph((0, 0), [(10, 10, 100, 100)], [], preview=True, idle_sample=True)
+    chains = graph.split(";")
+
+    assert chains[0] == "[0:v]split=3[in0][in1][in2]"
+    assert chains[1] == "[in0]crop=100:100:10:10[out0]"
+    assert chains[2].startswith("[in1]fps=3,crop=100:100:10:10,") and chains[2].endswith("[preview]")
+    assert chains[3].startswith("[in2]fps=2,crop=100:100:10:10,format=gray,") and chains[3].endswith("[idle]")
+
+
+def test_split_crop_graph_idle_branch_without_preview():
+    graph = build_split_crop_graph((0, 0), [None, (0, 0, 20, 20)], [], idle_sample=True)
+    assert graph.startswith("[0:v]split=3[in0][in1][in2];")
+    assert "[in2]fps=2,format=gray," in graph and graph.endswith("[idle]")
+    assert "[preview]" not in graph
+
+
+def test_split_crop_graph_redacts_before_splitting():
+    masks = [((5, 5, 10, 10), config.MASK_BOX)]
+    graph = build_split_crop_graph((0, 0), [(0, 0, 50, 50)], [], masks=masks)
+    redaction, split = graph.split(";")[:2]
+
+    assert redaction.startswith("[0:v]drawbox=x=5:y=5:w=10:h=10") and redaction.endswith("[redacted]")
+    assert split == "[redacted]split=1[in0]"
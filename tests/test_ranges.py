@@ -0,0 +1,38 @@
+from screenrecorder.ranges import build_ranges, read_ranges, write_ranges
+
+PART_STARTS = {0: 0.0, 1: 2.002, 2: 4.004, 3: 6.006}
+
+
+def test_marks_pair_into_ranges():
+    marks = [("in", 1), ("out", 2), ("in", 3)]
+    assert build_ranges(marks, PART_STARTS, 8.0) == [(2.002, 4.004), (6.006, 8.0)]
+
+
+def test_repeated_in_restarts_the_range():
+    assert build_ranges([("in", 0), ("in", 1), ("out", 3)], PART_STARTS, 8.0) == [(2.002, 6.006)]
+
+
+def test_out_without_in_is_dropped():
+    assert build_ranges([("out", 1), ("in", 2), ("out", 3)], PART_STARTS, 8.0) == [(4.004, 6.006)]
+
+
+def test_out_in_the_same_part_leaves_the_range_open():
+    assert build_ranges([("in", 2), ("out", 2)], PART_STARTS, 8.0) == [(4.004, 8.0)]
+
+
+def test_marks_on_missing_parts_are_skipped():
+    # Part 5 was never written, e.g. the recording stopped right after the mark
+    marks = [("in", 1), ("out", 5)]
+    assert build_ranges(marks, PART_STARTS, 8.0) == [(2.002, 8.0)]
+
+
+def test_range_open_at_the_end_needs_time_left():
+    assert build_ranges([("in", 3)], PART_STARTS, 6.006) == []
+
+
+def test_ranges_sidecar_round_trip(tmp_path):
+    video_path = str(tmp_path / "recording.mp4")
+    assert read_ranges(video_path) == []
+
+    write_ranges(video_path, [(2.002, 4.004), (6.006, 8.0)])
+    assert read_ranges(video_path) == [(2.002, 4.004), (6.006, 8.0)]
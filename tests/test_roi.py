@@ -0,0 +1,58 @@
+from screenrecorder.roi import MIN_INTERVAL_SECONDS, build_roi_intervals, get_roi_box, get_roi_filter
+
+FRAME = (100, 50, 1920, 1080, 1.0)  # Captured region at screen (100, 50), not scaled
+
+
+def test_roi_box_is_centered_and_clamped():
+    assert get_roi_box(960, 540, (1920, 1080)) == (720, 380, 480, 320)
+    assert get_roi_box(10, 10, (1920, 1080)) == (0, 0, 480, 320)
+    assert get_roi_box(1915, 1075, (1920, 1080)) == (1440, 760, 480, 320)
+
+
+def test_roi_box_shrinks_with_scale_and_small_frames():
+    assert get_roi_box(480, 270, (960, 540), scale=0.5) == (360, 190, 240, 160)
+    assert get_roi_box(100, 100, (300, 200)) == (0, 0, 300, 200)
+
+
+def test_no_samples_is_one_interval_without_roi():
+    assert build_roi_intervals([], FRAME, 5.0) == [(0.0, 5.0, None)]
+
+
+def test_still_cursor_is_one_interval():
+    samples = [(t / 10, 1060, 590) for t in range(50)]
+    assert build_roi_intervals(samples, FRAME, 5.0) == [(0.0, 5.0, (720, 380, 480, 320))]
+
+
+def test_cursor_moving_away_starts_a_new_interval():
+    samples = [(0.0, 700, 300), (1.0, 760, 300), (3.0, 1500, 800), (4.0, 1500, 800)]
+    intervals = build_roi_intervals(samples, FRAME, 6.0)
+
+    assert [(start, end) for start, end, _ in intervals] == [(0.0, 3.0), (3.0, 6.0)]
+    assert intervals[0][2] == (360, 90, 540, 320)  # Covers both early positions
+    assert intervals[1][2] == (1160, 590, 480, 320)
+
+
+def test_intervals_last_at_least_the_minimum():
+    # Jumps back and forth every half second, so the ROI grows instead of splitting
+    samples = [(t / 2, 300 if t % 2 else 1500, 300) for t in range(8)]
+    intervals = build_roi_intervals(samples, FRAME, 4.0)
+
+    for start, end, _ in intervals[:-1]:
+        assert end - start >= MIN_INTERVAL_SECONDS
+    assert intervals[0][0] == 0.0 and intervals[-1][1] == 4.0
+    assert all(previous[1] == following[0] for previous, following in zip(intervals, intervals[1:]))
+
+
+def test_samples_outside_region_or_recording_are_ignored():
+    samples = [(0.0, 50, 20), (1.0, 2500, 300), (9.0, 1060, 590)]
+    assert build_roi_intervals(samples, FRAME, 5.0) == [(0.0, 5.0, None)]
+
+
+def test_samples_are_scaled_to_frame_pixels():
+    frame = (0, 0, 1920, 1080, 0.5)
+    assert build_roi_intervals([(0.0, 1920 - 2, 1080 - 2)], frame, 1.0) == [(0.0, 1.0, (720, 380, 240, 160))]
+
+
+def test_roi_filter():
+    assert get_roi_filter(None) == "null"
+    assert get_roi_filter((10, 20, 480, 320)).startswith("addroi=10:20:480:320:-0.1,addroi=0:0:iw:ih:")
@@ -0,0 +1,149 @@
+import time
+
+import numpy as np
+
+from screenrecorder.idle import sample_from_frame
+from screenrecorder.shm_capture import ShmFrameWriter, build_rawvideo_input_args, get_frame_bytes, get_frame_views
+
+
+def make_buffer(width, height, bytes_per_line):
+    """A BGRX buffer whose pixel at (x, y) is (blue=x, green=y, red=255), padding filled with 0xEE."""
+    buffer = bytearray(b"\xee" * (bytes_per_line * height))
+    for y in range(height):
+        for x in range(width):
+            offset = y * bytes_per_line + x * 4
+            buffer[offset : offset + 4] = bytes((x, y, 255, 0))
+    return buffer
+
+
+def test_frame_views_unpadded_rows_share_the_buffer():
+    buffer = make_buffer(3, 2, 12)
+    frame, frame_bytes = get_frame_views(buffer, 3, 2, 12)
+
+    assert frame.shape == (2, 3, 4)
+    assert frame_bytes is not None
+    assert get_frame_bytes(frame, frame_bytes).tobytes() == bytes(buffer)
+
+    # Views, not copies: the next grab shows up without reading the buffer again
+    buffer[0] = 42
+    assert frame[0, 0, 0] == 42
+
+
+def test_frame_views_padded_rows_drop_the_padding():
+    buffer = make_buffer(3, 2, 16)
+    frame, frame_bytes = get_frame_views(buffer, 3, 2, 16)
+
+    assert frame.shape == (2, 3, 4)
+    assert frame_bytes is None
+    assert frame[1, 2].tolist() == [2, 1, 255, 0]
+
+    data = bytes(get_frame_bytes(frame, frame_bytes))
+    assert len(data) == 3 * 2 * 4
+    assert b"\xee" not in data
+    assert data == make_buffer(3, 2, 12)
+
+
+def test_rawvideo_input_args_match_frame_layout():
+    args = build_rawvideo_input_args(1280, 720, 30)
+    assert args[args.index("-pix_fmt") + 1] == "bgr0"
+    assert args[args.index("-video_size") + 1] == "1280x720"
+    assert args[args.index("-framerate") + 1] == "30"
+    assert args[-2:] == ["-i", "pipe:0"]
+
+
+def test_sample_from_frame_converts_bgrx_to_gray():
+    frame = np.zeros((4, 6, 4), dtype=np.uint8)
+    frame[:, :, 2] = 255  # Red
+    frame[:, 3:, :3] = 255  # White right half
+    frame[:, :, 3] = 123  # The X byte is ignored
+
+    sample = sample_from_frame(frame)
+
+    assert sample.mode == "L"
+    assert sample.size == (6, 4)
+    assert sample.getpixel((0, 0)) == 76  # ITU-R 601 luma of pure red
+    assert sample.getpixel((5, 3)) == 255
+
+
+def test_sample_from_frame_downscales_wide_frames():
+    sample = sample_from_frame(np.zeros((600, 1920, 4), dtype=np.uint8))
+    assert sample.size == (480, 150)
+
+
+class FakeGrabber:
+    def __init__(self, late_grab=None, delay=0.0):
+        self.frame, self.frame_bytes = get_frame_views(make_buffer(2, 2, 8), 2, 2, 8)
+        self.grabs = 0
+        self.late_grab = late_grab
+        self.delay = delay
+        self.closed = False
+
+    def grab(self):
+        self.grabs += 1
+        if self.grabs == self.late_grab:
+            time.sleep(self.delay)
+        return self.frame
+
+    def get_frame_bytes(self):
+        return get_frame_bytes(self.frame, self.frame_bytes)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStream:
+    def __init__(self):
+        self.written = []
+        self.closed = False
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def close(self):
+        self.closed = True
+
+
+def run_writer(grabber, framerate, seconds):
+    stream = FakeStream()
+    writer = ShmFrameWriter(grabber, framerate, stream)
+    frames = []
+    writer.add_frame_listener(lambda frame, timestamp: frames.append(timestamp))
+    writer.start()
+    time.sleep(seconds)
+    writer.stop()
+    return writer, stream, frames
+
+
+def test_frame_writer_writes_whole_frames_and_closes():
+    grabber = FakeGrabber()
+    writer, stream, frames = run_writer(grabber, 50, 0.2)
+
+    assert grabber.closed and stream.closed
+    assert writer.frames_written == len(stream.written) >= 2
+    assert all(data == bytes(grabber.frame_bytes) for data in stream.written)
+    assert len(frames) == grabber.grabs
+    assert writer.last_timestamp == frames[-1]
+
+
+def test_frame_writer_repeats_frames_for_late_grabs():
+    # The second grab takes 4 frame intervals, so at least 3 slots are filled with a repeat
+    grabber = FakeGrabber(late_grab=2, delay=0.2)
+    writer, stream, _ = run_writer(grabber, 20, 0.4)
+
+    assert writer.frames_repeated >= 3
+    assert writer.frames_written == len(stream.written)
+    assert writer.frames_written >= grabber.grabs + writer.frames_repeated - 1
+
+
+def test_frame_writer_stops_when_ffmpeg_exits():
+    class ClosedStream(FakeStream):
+        def write(self, data):
+            raise BrokenPipeError
+
+    grabber = FakeGrabber()
+    writer = ShmFrameWriter(grabber, 30, ClosedStream())
+    writer.start()
+    writer._thread.join(timeout=1)
+
+    assert not writer._thread.is_alive()
+    assert grabber.closed
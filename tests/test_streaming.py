@@ -0,0 +1,53 @@
+import pytest
+
+from screenrecorder import config
+from screenrecorder.streaming import LOW_LATENCY_MUXER_ARGS, build_stream_command, get_stream_format
+
+INPUT_ARGS = ["-f", "rawvideo", "-i", "pipe:0"]
+
+
+def test_stream_format_by_scheme():
+    assert get_stream_format("udp://127.0.0.1:1234") == "mpegts"
+    assert get_stream_format("SRT://host:9000") == "mpegts"
+    assert get_stream_format("rtmp://host/live/key") == "flv"
+
+
+def test_unsupported_stream_url():
+    with pytest.raises(ValueError):
+        get_stream_format("http://host/stream")
+    with pytest.raises(ValueError):
+        build_stream_command("ffmpeg", None, 30, "file.ts", input_args=INPUT_ARGS)
+
+
+def test_stream_command_without_local_copy():
+    cmd = build_stream_command("ffmpeg", None, 30, "udp://127.0.0.1:1234", input_args=INPUT_ARGS)
+
+    assert cmd[:2] == ["ffmpeg", "-y"]
+    assert cmd[2:6] == INPUT_ARGS
+    joined = " ".join(cmd)
+    assert " ".join(LOW_LATENCY_MUXER_ARGS) in joined
+    assert cmd[-3:] == ["-f", "mpegts", "udp://127.0.0.1:1234"]
+
+
+def test_stream_command_tees_a_local_copy():
+    cmd = build_stream_command("ffmpeg", None, 30, "udp://host:1234", "C:\\rec\\stream.ts", input_args=INPUT_ARGS)
+
+    assert cmd[-3:-1] == ["-f", "tee"]
+    assert cmd[-1] == "[f=mpegts:onfail=ignore]udp://host:1234|[f=mpegts]C:/rec/stream.ts"
+    assert cmd[cmd.index("-map") + 1] == "0:v"
+    assert "+global_header" not in cmd
+
+
+def test_stream_command_flv_tee_gets_headers_for_both_outputs():
+    cmd = build_stream_command("ffmpeg", None, 30, "rtmp://host/live", "/tmp/stream.ts", input_args=INPUT_ARGS)
+
+    assert cmd[cmd.index("-flags") + 1] == "+global_header"
+    assert cmd[-1] == "[f=flv:onfail=ignore]rtmp://host/live|[f=mpegts:bsfs/v=dump_extra]/tmp/stream.ts"
+
+
+def test_stream_command_redacts_the_single_output():
+    masks = [((0, 0, 10, 10), config.MASK_BOX)]
+    cmd = build_stream_command("ffmpeg", None, 30, "udp://host:1234", "/tmp/stream.ts", masks, INPUT_ARGS)
+
+    assert cmd[cmd.index("-map") + 1] == "[redacted]"
+    assert cmd.count("-map") == 1